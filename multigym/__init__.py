@@ -13,10 +13,41 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Import envs and wrappers to set up module."""
-# Import wrappers so it's accessible when installing with pip
-import gym_minigrid.wrappers
+"""Registers the envs, and gives lazy access to the multigrid and env names.
 
-# Import the envs module so that envs register themselves
-from .envs import *
-from .multigrid import *
+Only the table of envs is loaded on import, see multigym.envs. The names of
+multigym.multigrid and multigym.envs are attributes of this package, imported on
+first access. A star import of this package binds the public names of both, and
+therefore imports all the env modules.
+"""
+import importlib
+import importlib.util
+
+# Import the envs package so that envs are registered
+from . import envs
+
+
+def __getattr__(name):
+  """Look up names of the multigrid module, then of the envs package.
+
+  The multigrid module is imported on first access, and __all__ is computed on
+  first access, for star imports.
+  """
+  if name == '__all__':
+    multigrid = importlib.import_module(__name__ + '.multigrid')
+    names = set(envs.__all__) | set(envs.public_names(multigrid))
+    globals()['__all__'] = sorted(names | {'envs'})
+    return globals()['__all__']
+  # Submodules are left to the import system, e.g. from multigym import x
+  if name.startswith('__') or importlib.util.find_spec(
+      __name__ + '.' + name) is not None:
+    raise AttributeError(name)
+  multigrid = importlib.import_module(__name__ + '.multigrid')
+  try:
+    return getattr(multigrid, name)
+  except AttributeError:
+    try:
+      return getattr(envs, name)
+    except AttributeError:
+      raise AttributeError('module %r has no attribute %r' %
+                           (__name__, name)) from None
@@ -0,0 +1,279 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks the registered MultiGrid envs, and compares them to a baseline.
+
+For each env, measures the latency of reset, the steps per second with random
+actions, the time to generate observations and to render, and the peak memory
+allocated while creating and stepping the env. Everything runs under a fixed
+seed, so results only vary with the speed of the code and the machine. The time
+to import multigym in a fresh interpreter is measured as well, under the
+IMPORT_ID pseudo env.
+
+  python -m multigym.bench --output results.json
+  python -m multigym.bench --family maze --family empty --n_agents 1 \\
+      --baseline results.json --tolerance 0.2
+
+Exits with status 1 if any metric regresses beyond the tolerance.
+"""
+import argparse
+import collections
+import itertools
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import gym
+import multigym.envs  # pylint: disable=unused-import
+from multigym.register import env_list
+import numpy as np
+
+# Metrics, and whether higher values are better
+METRICS = collections.OrderedDict([
+    ('reset_ms', False),
+    ('steps_per_sec', True),
+    ('obs_ms', False),
+    ('render_ms', False),
+    ('peak_memory_kb', False),
+])
+
+# Metrics of the import of multigym, recorded under IMPORT_ID
+IMPORT_ID = 'import multigym'
+IMPORT_METRICS = collections.OrderedDict([
+    ('import_ms', False),
+])
+
+_IMPORT_SCRIPT = '''
+import time
+start = time.perf_counter()
+import %s
+print(time.perf_counter() - start)
+'''
+
+Regression = collections.namedtuple(
+    'Regression', ['env_id', 'metric', 'baseline', 'value', 'change'])
+
+
+def env_family(env_id):
+  """Family of an env, i.e. the name of the module defining it."""
+  entry_point = gym.envs.registry.env_specs[env_id].entry_point
+  return entry_point.split(':')[0].rsplit('.', 1)[-1]
+
+
+def env_ids(families=None):
+  """IDs of the registered MultiGrid envs, optionally of some families only."""
+  ids = list(env_list)
+  if families:
+    families = {family.lower() for family in families}
+    ids = [env_id for env_id in ids if env_family(env_id) in families]
+  return ids
+
+
+def _step_random(env, rng):
+  actions = rng.integers(len(env.actions), size=env.n_agents)
+  _, _, done, _ = env.step(
+      int(actions[0]) if env.minigrid_mode else actions.tolist())
+  if done:
+    env.reset()
+
+
+def _mean_time(fn, n):
+  start = time.perf_counter()
+  for _ in range(n):
+    fn()
+  return (time.perf_counter() - start) / n
+
+
+def benchmark_env(env_id, seed=0, n_resets=20, n_steps=1000, n_obs=200,
+                  n_renders=5, n_memory_steps=100):
+  """Benchmark one env.
+
+  Args:
+    env_id: ID of a registered env.
+    seed: Seed of the env and of the random actions.
+    n_resets: Number of timed resets.
+    n_steps: Number of timed steps.
+    n_obs: Number of timed observation generations.
+    n_renders: Number of timed renders.
+    n_memory_steps: Number of steps taken while tracing memory allocations,
+      in a separate env since tracing slows everything down.
+
+  Returns:
+    Dict with the family and number of agents of the env, and its METRICS.
+  """
+  env = gym.make(env_id, lazy_reset=True).unwrapped
+  env.seed(seed)
+  rng = np.random.default_rng(seed)
+  env.reset()
+
+  result = {'family': env_family(env_id), 'n_agents': env.n_agents}
+  result['reset_ms'] = 1e3 * _mean_time(env.reset, n_resets)
+  step_time = _mean_time(lambda: _step_random(env, rng), n_steps)
+  result['steps_per_sec'] = 1 / step_time
+  result['obs_ms'] = 1e3 * _mean_time(env.gen_obs, n_obs)
+  env.render('rgb_array')  # Build the tile atlas outside of the timings
+  result['render_ms'] = 1e3 * _mean_time(
+      lambda: env.render('rgb_array'), n_renders)
+  env.close()
+
+  tracemalloc.start()
+  try:
+    env = gym.make(env_id, lazy_reset=True).unwrapped
+    env.seed(seed)
+    rng = np.random.default_rng(seed)
+    env.reset()
+    for _ in range(n_memory_steps):
+      _step_random(env, rng)
+    result['peak_memory_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+    env.close()
+  finally:
+    tracemalloc.stop()
+  return result
+
+
+def import_time(module='multigym', n_runs=5):
+  """Time the import of a module in fresh interpreters.
+
+  Args:
+    module: Name of the module.
+    n_runs: Number of interpreters, each importing the module once.
+
+  Returns:
+    The fastest import time, in milliseconds.
+  """
+  times = []
+  for _ in range(n_runs):
+    output = subprocess.run(
+        [sys.executable, '-c', _IMPORT_SCRIPT % module], check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout
+    times.append(1e3 * float(output.split()[-1]))
+  return min(times)
+
+
+def run(ids, n_agents=None, log=None, **kwargs):
+  """Benchmark several envs.
+
+  Envs which fail are recorded with their error, instead of metrics.
+
+  Args:
+    ids: IDs of the envs.
+    n_agents: If not None, only benchmark envs with one of these numbers of
+      agents.
+    log: Optional file to which to print the progress.
+    **kwargs: Passed to benchmark_env.
+
+  Returns:
+    Dict mapping env IDs to their results.
+  """
+  results = collections.OrderedDict()
+  for env_id in ids:
+    try:
+      if n_agents is not None:
+        env = gym.make(env_id, lazy_reset=True).unwrapped
+        env.close()
+        if env.n_agents not in n_agents:
+          continue
+      results[env_id] = benchmark_env(env_id, **kwargs)
+    except Exception as e:  # pylint: disable=broad-except
+      results[env_id] = {'family': env_family(env_id), 'error': repr(e)}
+    if log is not None:
+      print(env_id, json.dumps(results[env_id]), file=log)
+  return results
+
+
+def compare(results, baseline, tolerance=0.1):
+  """Find the metrics worse than in a baseline by more than a tolerance.
+
+  Args:
+    results: Results returned by run.
+    baseline: Results of a previous run. Envs or metrics missing from either
+      are skipped.
+    tolerance: Relative change allowed, e.g. 0.1 for 10% slower or larger.
+
+  Returns:
+    List of Regressions, with the relative change of each metric in the
+    direction making it worse.
+  """
+  regressions = []
+  for env_id, result in results.items():
+    expected = baseline.get(env_id, {})
+    for metric, higher_is_better in itertools.chain(METRICS.items(),
+                                                    IMPORT_METRICS.items()):
+      if metric not in result or not expected.get(metric):
+        continue
+      change = result[metric] / expected[metric] - 1
+      if higher_is_better:
+        change = expected[metric] / result[metric] - 1
+      if change > tolerance:
+        regressions.append(Regression(env_id, metric, expected[metric],
+                                      result[metric], change))
+  return regressions
+
+
+def parse_args(argv=None):
+  parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+  parser.add_argument('--output', type=str, default=None,
+                      help='JSON file to write the results to.')
+  parser.add_argument('--baseline', type=str, default=None,
+                      help='JSON file of previous results to compare to.')
+  parser.add_argument('--tolerance', type=float, default=0.1,
+                      help='Relative change of a metric allowed.')
+  parser.add_argument('--env_id', action='append', default=None,
+                      help='Env ID to benchmark, may be repeated.')
+  parser.add_argument('--family', action='append', default=None,
+                      help='Env family to benchmark, e.g. maze. May be '
+                      'repeated.')
+  parser.add_argument('--n_agents', type=int, action='append', default=None,
+                      help='Number of agents of the envs to benchmark. May '
+                      'be repeated.')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--n_resets', type=int, default=20)
+  parser.add_argument('--n_steps', type=int, default=1000)
+  parser.add_argument('--n_obs', type=int, default=200)
+  parser.add_argument('--n_renders', type=int, default=5)
+  parser.add_argument('--import_runs', type=int, default=5,
+                      help='Number of interpreters in which to time the '
+                      'import of multigym, 0 to skip it.')
+  return parser.parse_args(argv)
+
+
+def main(args):
+  ids = args.env_id or env_ids(args.family)
+  config = {key: getattr(args, key) for key in
+            ['seed', 'n_resets', 'n_steps', 'n_obs', 'n_renders']}
+  results = run(ids, n_agents=args.n_agents, log=sys.stderr, **config)
+  if args.import_runs:
+    results[IMPORT_ID] = {'import_ms': import_time(n_runs=args.import_runs)}
+    print(IMPORT_ID, json.dumps(results[IMPORT_ID]), file=sys.stderr)
+
+  if args.output:
+    with open(args.output, 'w') as f:
+      json.dump({'config': config, 'results': results}, f, indent=2)
+
+  if args.baseline:
+    with open(args.baseline) as f:
+      baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance)
+    for r in regressions:
+      print('%s %s: %.4g -> %.4g (%+.1f%%)' % (
+          r.env_id, r.metric, r.baseline, r.value, 100 * r.change))
+    return 1 if regressions else 0
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main(parse_args()))
@@ -17,7 +17,7 @@ def distance_from(grid, init_pos, end_pos=None):
     q = queue.Queue()
     q.put(init_pos)
 
-    distances = np.ones(shape=grid.shape, dtype=np.float32) * np.infty
+    distances = np.ones(shape=grid.shape, dtype=np.float32) * np.inf
     distances[init_pos[0], init_pos[1]] = 0
 
     found = False
@@ -147,7 +147,7 @@ class ArenaGenerator:
     def _is_valid(self, arena, red_team, blue_team):
         distances = distance_from(arena, red_team.flag.init_pos[::-1], blue_team.flag.init_pos[::-1])
         distance_from_bases = distances[blue_team.flag.init_pos[1], blue_team.flag.init_pos[0]]
-        return distance_from_bases != np.infty and distance_from_bases > 6
+        return distance_from_bases != np.inf and distance_from_bases > 6
 
 
 
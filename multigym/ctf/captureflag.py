@@ -1,11 +1,9 @@
 import math
 from enum import IntEnum
 
-import numpy as np
 import labmaze
 
-from gym_minigrid import minigrid
-from multigym import multigrid, register
+from multigym import multigrid
 
 from .objects import Player, Team, Flag, RespawnPool, Beam
 from .arena import ArenaGenerator
@@ -39,6 +37,10 @@ class CapturingTheFlag(multigrid.MultiGridEnv):
         # do nothing
         no_op = 7
 
+    state_fields = multigrid.MultiGridEnv.state_fields + (
+        'players', 'respawn_pool', 'beam_collection'
+    )
+
     def __init__(self,
                  scores_to_win,
                  player_health=3,
@@ -49,6 +51,8 @@ class CapturingTheFlag(multigrid.MultiGridEnv):
                  see_through_walls=False,
                  seed=34,
                  agent_view_size=7,
+                 lazy_reset=False,
+                 simultaneous_moves=None,
              ):
         """
 
@@ -63,6 +67,9 @@ class CapturingTheFlag(multigrid.MultiGridEnv):
             see_through_walls:
             seed:
             agent_view_size:
+            lazy_reset: if True, the arena is generated by the first reset
+            simultaneous_moves: conflict rule of simultaneous moves, or None
+                for players acting in a random order
         """
         self.scores_to_win = scores_to_win
         self.player_health = player_health
@@ -83,12 +90,20 @@ class CapturingTheFlag(multigrid.MultiGridEnv):
             competitive=False,
             fixed_environment=False,
             minigrid_mode=False,
-            fully_observed=False
+            fully_observed=False,
+            lazy_reset=lazy_reset,
+            simultaneous_moves=simultaneous_moves
         )
 
     def _get_actions(self):
         return CaptureFlagClassicEnv.Actions
 
+    def state_objects(self):
+        """Flags may be held by players, so they are saved with the teams."""
+        teams = self.base_arena.teams
+        return super().state_objects() + [self.respawn_pool, self.base_arena] + \
+            teams + [team.flag for team in teams]
+
     def _gen_grid(self, width, height):
         self.players = []
         self.respawn_pool = RespawnPool()
@@ -102,7 +117,7 @@ class CapturingTheFlag(multigrid.MultiGridEnv):
             for j in range(self.height):
                 entry = arena[j, i]
                 if entry == '*':
-                    self.put_obj(minigrid.Wall(), i, j)
+                    self.put_obj(multigrid.shared_obj('wall'), i, j)
 
         for team in self.base_arena.teams:
             self.put_obj(
@@ -191,10 +206,8 @@ class CapturingTheFlag(multigrid.MultiGridEnv):
         """Attempts to move the forward one cell, returns True if successful."""
         fwd_cell = self.grid.get(*fwd_pos)
         # Make sure agents can't walk into each other
-        agent_blocking = False
-        for a in range(self.n_agents):
-            if a != agent_id and np.array_equal(self.agent_pos[a], fwd_pos):
-                agent_blocking = True
+        other_agent = self.agent_at(fwd_pos)
+        agent_blocking = other_agent >= 0 and other_agent != agent_id
 
         # Deal with object interactions
         if not agent_blocking and fwd_cell is None:
@@ -270,18 +283,16 @@ class CapturingTheFlag(multigrid.MultiGridEnv):
             return reward
 
         # Get the position in front of the agent
-        fwd_pos = self.front_pos[agent_id]
+        fwd_pos = self.front_pos[agent_id].copy()
 
         # Rotate left
         if action == self.actions.left:
-            self.agent_dir[agent_id] -= 1
-            if self.agent_dir[agent_id] < 0:
-                self.agent_dir[agent_id] += 4
+            self.set_agent_dir(agent_id, (self.agent_dir[agent_id] - 1) % 4)
             self.rotate_agent(agent_id)
 
         # Rotate right
         elif action == self.actions.right:
-            self.agent_dir[agent_id] = (self.agent_dir[agent_id] + 1) % 4
+            self.set_agent_dir(agent_id, (self.agent_dir[agent_id] + 1) % 4)
             self.rotate_agent(agent_id)
 
         # Move forward
@@ -337,20 +348,12 @@ class CapturingTheFlag(multigrid.MultiGridEnv):
 
 
 class CaptureFlagClassicEnv(CapturingTheFlag):
-    def __init__(self, seed=34):
+    def __init__(self, seed=34, lazy_reset=False, simultaneous_moves=None):
         super().__init__(
             scores_to_win=2,
             height=13,
             width=13,
-            seed=seed
+            seed=seed,
+            lazy_reset=lazy_reset,
+            simultaneous_moves=simultaneous_moves
         )
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-CTF-Classic-v0',
-    entry_point=module_path + ':CaptureFlagClassicEnv'
-)
\ No newline at end of file
@@ -0,0 +1,236 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Offline RL datasets of rollouts, stored in memory-mapped shards.
+
+collect steps copies of a registered env in a process pool. Each copy fills one
+shard, a directory holding a .npy file per field, written sequentially through
+a memory map. A manifest.json lists the fields and the shards, and Dataset
+reads transitions from the shards without loading them in memory.
+
+A shard holds n consecutive steps of one env copy, which is reset whenever an
+episode ends. Its fields are:
+  - each observation key: (n + 1,) + shape, the observation before each step
+    followed by the observation after the last step.
+  - action: (n,) + action shape.
+  - reward: (n,) + reward shape.
+  - done: (n,).
+The observation following a transition is the next row, which is the first
+observation of the next episode when the transition is done.
+"""
+import json
+import math
+import multiprocessing as mp
+import os
+
+import gym
+import multigym.envs  # pylint: disable=unused-import
+import numpy as np
+
+MANIFEST = 'manifest.json'
+
+
+def random_policy(env, obs, rng):  # pylint: disable=unused-argument
+  """Policy choosing uniformly among the actions of every agent."""
+  shape = env.action_space.shape
+  return rng.integers(len(env.actions), size=shape)
+
+
+def _field_specs(env, obs):
+  """Shapes and dtypes of the fields, for one step."""
+  specs = {}
+  for key, value in obs.items():
+    if key in env.observation_space.spaces:
+      space = env.observation_space[key]
+      specs[key] = (space.shape, space.dtype)
+    else:
+      value = np.asarray(value)
+      specs[key] = (value.shape, value.dtype)
+  specs['action'] = (env.action_space.shape, np.dtype(np.int64))
+  reward_shape = () if env.minigrid_mode else (env.n_agents,)
+  specs['reward'] = (reward_shape, np.dtype(np.float64))
+  specs['done'] = ((), np.dtype(bool))
+  return specs
+
+
+def _collect_shard(task):
+  """Step an env copy to fill one shard, returning its manifest entry."""
+  env_id, env_kwargs, path, name, n_transitions, seed, policy = task
+  env = gym.make(env_id, **dict(env_kwargs, lazy_reset=True)).unwrapped
+  env.seed(seed)
+  rng = np.random.default_rng(seed)
+  obs = env.reset()
+  specs = _field_specs(env, obs)
+
+  os.makedirs(os.path.join(path, name))
+  arrays = {}
+  for key, (shape, dtype) in specs.items():
+    n_rows = n_transitions + 1 if key in obs else n_transitions
+    arrays[key] = np.lib.format.open_memmap(
+        os.path.join(path, name, key + '.npy'), mode='w+', dtype=dtype,
+        shape=(n_rows,) + tuple(shape))
+
+  obs_keys = list(obs)
+  n_episodes = 0
+  for t in range(n_transitions):
+    for key in obs_keys:
+      arrays[key][t] = np.asarray(obs[key]).reshape(specs[key][0])
+    action = np.asarray(policy(env, obs, rng)).reshape(specs['action'][0])
+    obs, reward, done, _ = env.step(
+        action.tolist() if action.ndim else int(action))
+    arrays['action'][t] = action
+    arrays['reward'][t] = reward
+    arrays['done'][t] = done
+    if done:
+      n_episodes += 1
+      obs = env.reset()
+  for key in obs_keys:
+    arrays[key][n_transitions] = np.asarray(obs[key]).reshape(specs[key][0])
+
+  for array in arrays.values():
+    array.flush()
+  env.close()
+
+  fields = {key: {'shape': list(shape), 'dtype': np.dtype(dtype).str}
+            for key, (shape, dtype) in specs.items()}
+  return {'name': name, 'n_transitions': n_transitions, 'seed': seed,
+          'n_episodes': n_episodes, 'observation_keys': obs_keys,
+          'fields': fields}
+
+
+def collect(env_id, path, n_transitions, shard_size=2**18, processes=None,
+            seed=0, policy=random_policy, env_kwargs=None, context=None):
+  """Collect rollouts of a registered env into a dataset.
+
+  Args:
+    env_id: ID of a registered MultiGrid env.
+    path: Directory of the dataset, which must not exist yet.
+    n_transitions: Total number of steps to collect.
+    shard_size: Number of steps per shard. Each shard is filled by its own copy
+      of the env, so this is also the number of steps per copy.
+    processes: Number of worker processes, see multiprocessing.Pool. If 0,
+      shards are filled in this process.
+    seed: Seed of the envs and the policy, each shard getting its own seed.
+    policy: Function mapping the env, its observation and a numpy Generator to
+      the action to take. It must be picklable to run in worker processes.
+    env_kwargs: Keyword arguments passed to gym.make.
+    context: Start method of the worker processes, see
+      multiprocessing.get_context. Uses the default method if None.
+
+  Returns:
+    The collected Dataset.
+  """
+  env_kwargs = env_kwargs or {}
+  os.makedirs(path)
+  n_shards = int(math.ceil(n_transitions / shard_size))
+  seeds = np.random.SeedSequence(seed).generate_state(n_shards)
+  tasks = [(env_id, env_kwargs, path, '%05d' % i,
+            min(shard_size, n_transitions - i * shard_size), int(seeds[i]),
+            policy)
+           for i in range(n_shards)]
+
+  if processes == 0:
+    shards = [_collect_shard(task) for task in tasks]
+  else:
+    with mp.get_context(context).Pool(processes) as pool:
+      shards = list(pool.imap(_collect_shard, tasks))
+
+  # Shards all have the same fields
+  manifest = {
+      'env_id': env_id,
+      'env_kwargs': env_kwargs,
+      'n_transitions': n_transitions,
+      'observation_keys': shards[0].pop('observation_keys'),
+      'fields': shards[0].pop('fields'),
+      'shards': shards,
+  }
+  for shard in shards[1:]:
+    del shard['observation_keys'], shard['fields']
+  with open(os.path.join(path, MANIFEST), 'w') as f:
+    json.dump(manifest, f, indent=2)
+  return Dataset(path)
+
+
+class Dataset(object):
+  """Reads transitions of a dataset written by collect.
+
+  Shards are memory-mapped when first read, so only the rows of the sampled
+  transitions are loaded from disk.
+  """
+
+  def __init__(self, path):
+    self.path = path
+    with open(os.path.join(path, MANIFEST)) as f:
+      self.manifest = json.load(f)
+    self.observation_keys = self.manifest['observation_keys']
+    self.fields = {key: (tuple(spec['shape']), np.dtype(spec['dtype']))
+                   for key, spec in self.manifest['fields'].items()}
+    sizes = [shard['n_transitions'] for shard in self.manifest['shards']]
+    self._ends = np.cumsum(sizes)
+    self._starts = self._ends - sizes
+    self._shards = [None] * len(sizes)
+
+  def __len__(self):
+    return int(self._ends[-1]) if len(self._ends) else 0
+
+  def shard(self, i):
+    """Memory-mapped arrays of the fields of a shard."""
+    if self._shards[i] is None:
+      name = self.manifest['shards'][i]['name']
+      self._shards[i] = {
+          key: np.load(os.path.join(self.path, name, key + '.npy'),
+                       mmap_mode='r')
+          for key in self.fields}
+    return self._shards[i]
+
+  def transitions(self, indices):
+    """Gather transitions, given their indices in the dataset.
+
+    Args:
+      indices: Integer array of indices, in [0, len(self)).
+
+    Returns:
+      A dict holding, for each observation key, the observations before the
+      transitions and under 'next_' + key the observations after them, as
+      well as their 'action', 'reward' and 'done'. Arrays are stacked along a
+      first dimension of the shape of indices.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    flat = indices.ravel()
+    if np.any((flat < 0) | (flat >= len(self))):
+      raise IndexError('Transition indices out of [0, %d)' % len(self))
+
+    batch = {}
+    for key, (shape, dtype) in self.fields.items():
+      batch[key] = np.empty(flat.shape + shape, dtype=dtype)
+      if key in self.observation_keys:
+        batch['next_' + key] = np.empty(flat.shape + shape, dtype=dtype)
+
+    shard_ids = np.searchsorted(self._ends, flat, side='right')
+    for i in np.unique(shard_ids):
+      selected = shard_ids == i
+      rows = flat[selected] - self._starts[i]
+      for key, array in self.shard(i).items():
+        batch[key][selected] = array[rows]
+        if key in self.observation_keys:
+          batch['next_' + key][selected] = array[rows + 1]
+
+    return {key: value.reshape(indices.shape + value.shape[1:])
+            for key, value in batch.items()}
+
+  def sample(self, batch_size, rng=None):
+    """Sample transitions uniformly, see transitions."""
+    rng = np.random.default_rng(rng)
+    return self.transitions(rng.integers(len(self), size=batch_size))
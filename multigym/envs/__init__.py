@@ -13,23 +13,194 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Imports all environments so that they register themselves with the Gym API.
+"""Registers all environments with the Gym API, without importing them.
 
-This protocol is the same as Minigrid, and allows all environments to be
-simultaneously registered with Gym as a package.
+Envs are registered from a static table of their IDs and entry points, so
+importing multigym only costs the import of gym. The module defining an env is
+imported by gym.make, the first time one of its envs is created.
+
+The classes of the env modules can still be accessed as attributes of this
+package, which imports the module defining them on first access. A star import
+of this package imports all the env modules, and binds their public names.
 """
+import importlib
+
+from multigym.register import register
+
+# Modules defining envs, with the IDs and class names of their envs
+ENVS = [
+    ('multigym.envs.adversarial', [
+        ('MultiGrid-Adversarial-v0', 'AdversarialEnv'),
+        ('MultiGrid-ReparameterizedAdversarial-v0',
+         'ReparameterizedAdversarialEnv'),
+        ('MultiGrid-MiniAdversarial-v0', 'MiniAdversarialEnv'),
+        ('MultiGrid-MiniReparameterizedAdversarial-v0',
+         'MiniReparameterizedAdversarialEnv'),
+        ('MultiGrid-NoisyAdversarial-v0', 'NoisyAdversarialEnv'),
+        ('MultiGrid-MediumAdversarial-v0', 'MediumAdversarialEnv'),
+        ('MultiGrid-GoalLastAdversarial-v0', 'GoalLastAdversarialEnv'),
+        ('MultiGrid-MiniGoalLastAdversarial-v0', 'MiniGoalLastAdversarialEnv'),
+    ]),
+    ('multigym.envs.cluttered', [
+        ('MultiGrid-Cluttered-v0', 'ClutteredMultiGrid'),
+        ('MultiGrid-Cluttered-Single-v0', 'ClutteredMultiGridSingle'),
+        ('MultiGrid-Cluttered-Single-6x6-v0', 'ClutteredMultiGridSingle6x6'),
+        ('MultiGrid-Cluttered40-Minigrid-v0', 'Cluttered40Minigrid'),
+        ('MultiGrid-Cluttered10-Minigrid-v0', 'Cluttered10Minigrid'),
+        ('MultiGrid-Cluttered50-Minigrid-v0', 'Cluttered50Minigrid'),
+        ('MultiGrid-Cluttered5-Minigrid-v0', 'Cluttered5Minigrid'),
+        ('MultiGrid-MiniCluttered1-Minigrid-v0', 'Cluttered1MinigridMini'),
+        ('MultiGrid-MiniCluttered6-Minigrid-v0', 'Cluttered6MinigridMini'),
+        ('MultiGrid-MiniCluttered7-Minigrid-v0', 'Cluttered7MinigridMini'),
+        ('MultiGrid-Cluttered-Lava-Minigrid-v0', 'ClutteredMinigridLava'),
+        ('MultiGrid-MiniCluttered-Lava-Minigrid-v0',
+         'ClutteredMinigridLavaMini'),
+        ('MultiGrid-MediumCluttered-Lava-Minigrid-v0',
+         'ClutteredMinigridLavaMedium'),
+        ('MultiGrid-MediumCluttered15-Minigrid-v0',
+         'Cluttered15MinigridMedium'),
+    ]),
+    ('multigym.envs.coingame', [
+        ('MultiGrid-CoinGame-v0', 'CoinGameEnv'),
+        ('MultiGrid-CoinGame-Empty-6x6-Minigrid-v0',
+         'EmptyCoinGameEnv10x10Minigrid'),
+        ('MultiGrid-CoinGame-Empty-10x10-v0', 'EmptyCoinGameEnv10x10'),
+    ]),
+    ('multigym.envs.doorkey', [
+        ('MultiGrid-DoorKey-6x6-v0', 'DoorKeyEnv6x6'),
+        ('MultiGrid-DoorKey-8x8-v0', 'DoorKeyEnv'),
+        ('MultiGrid-DoorKey-16x16-v0', 'DoorKeyEnv16x16'),
+        ('MultiGrid-DoorKey-5x5-Single-v0', 'DoorKeyEnv5x5Single'),
+        ('MultiGrid-DoorKey-6x6-Single-v0', 'DoorKeyEnv6x6Single'),
+        ('MultiGrid-DoorKey-8x8-Single-v0', 'DoorKeyEnv8x8Single'),
+        ('MultiGrid-DoorKey-16x16-Single-v0', 'DoorKeyEnv16x16Single'),
+    ]),
+    ('multigym.envs.empty', [
+        ('MultiGrid-Empty-5x5-v0', 'EmptyEnv'),
+        ('MultiGrid-Empty-Random-5x5-v0', 'EmptyRandomEnv5x5'),
+        ('MultiGrid-Empty-8x8-v0', 'EmptyEnv8x8'),
+        ('MultiGrid-Empty-Random-8x8-v0', 'EmptyRandomEnv8x8'),
+        ('MultiGrid-Empty-16x16-v0', 'EmptyEnv16x16'),
+        ('MultiGrid-Empty-Random-16x16-v0', 'EmptyRandomEnv16x16'),
+        ('MultiGrid-Empty-5x5-Single-v0', 'EmptyEnv5x5Single'),
+        ('MultiGrid-Empty-Random-6x6-Minigrid-v0', 'EmptyRandomEnv6x6Minigrid'),
+        ('MultiGrid-Empty-Random-15x15-Minigrid-v0',
+         'EmptyRandomEnv15x15Minigrid'),
+    ]),
+    ('multigym.envs.fourrooms', [
+        ('MultiGrid-FourRooms-v0', 'FourRoomsEnv'),
+        ('MultiGrid-FourRooms-15x15-v0', 'FourRoomsEnv15x15'),
+        ('MultiGrid-FourRooms-Single-v0', 'FourRoomsEnvSingle'),
+        ('MultiGrid-TwoRooms-Minigrid-v0', 'TwoRoomsEnvMinigrid'),
+        ('MultiGrid-FourRooms-Minigrid-v0', 'FourRoomsEnvMinigrid'),
+        ('MultiGrid-MiniTwoRooms-Minigrid-v0', 'MiniTwoRoomsEnvMinigrid'),
+        ('MultiGrid-MiniFourRooms-Minigrid-v0', 'MiniFourRoomsEnvMinigrid'),
+    ]),
+    ('multigym.envs.gather', [
+        ('MultiGrid-Gather-v0', 'GatherEnv'),
+        ('MultiGrid-Gather-Empty-6x6-v0', 'EmptyGatherEnv6x6'),
+        ('MultiGrid-Gather-Random-8x8-v0', 'RandomGatherEnv8x8'),
+        ('MultiGrid-Gather-Random-10x10-v0', 'RandomGatherEnv10x10'),
+        ('MultiGrid-Color-Gather-Empty-6x6-v0', 'EmptyColorGatherEnv6x6'),
+        ('MultiGrid-Color-Gather-Random-8x8-v0', 'RandomColorGatherEnv8x8'),
+        ('MultiGrid-Color-Gather-Empty-10x10-v0', 'EmptyColorGatherEnv10x10'),
+        ('MultiGrid-Color-Gather-Empty-12x12-v0', 'EmptyColorGatherEnv12x12'),
+        ('MultiGrid-Color-Gather-RandomCountsColorGatherEnv12x12-12x12-v0',
+         'RerandomColorGatherEnv12x12'),
+        ('MultiGrid-Color-Gather-Empty-15x15-v0', 'EmptyColorGatherEnv15x15'),
+    ]),
+    ('multigym.envs.lava_walls', [
+        ('MultiGrid-WallsAreLava-v0', 'WallsAreLavaMultiGrid'),
+    ]),
+    ('multigym.envs.maze', [
+        ('MultiGrid-Maze-v0', 'MazeEnv'),
+        ('MultiGrid-MiniMaze-v0', 'MiniMazeEnv'),
+        ('MultiGrid-MediumMaze-v0', 'MediumMazeEnv'),
+        ('MultiGrid-Maze2-v0', 'HorizontalMazeEnv'),
+        ('MultiGrid-Maze3-v0', 'Maze3Env'),
+        ('MultiGrid-Labyrinth-v0', 'LabyrinthEnv'),
+        ('MultiGrid-Labyrinth2-v0', 'Labyrinth2Env'),
+        ('MultiGrid-SixteenRooms-v0', 'SixteenRoomsEnv'),
+        ('MultiGrid-SixteenRoomsFewerDoors-v0', 'SixteenRoomsFewerDoorsEnv'),
+        ('MultiGrid-NineRooms-v0', 'NineRoomsEnv'),
+        ('MultiGrid-NineRoomsFewerDoors-v0', 'NineRoomsFewerDoorsEnv'),
+    ]),
+    ('multigym.envs.meetup', [
+        ('MultiGrid-Meetup-v0', 'MeetupEnv'),
+        ('MultiGrid-Meetup-Empty-6x6-v0', 'EmptyMeetupEnv6x6'),
+        ('MultiGrid-Meetup-SingleTarget-6x6-Minigrid-v0',
+         'SingleTargetMeetupEnv6x6Minigrid'),
+        ('MultiGrid-Meetup-Empty-6x6-Minigrid-v0', 'EmptyMeetupEnv6x6Minigrid'),
+        ('MultiGrid-Meetup-Single-6x6-v0', 'SingleMeetupEnv6x6'),
+        ('MultiGrid-Meetup-Random-8x8-v0', 'RandomMeetupEnv8x8'),
+        ('MultiGrid-Meetup-Random-8x8-Minigrid-v0',
+         'RandomMeetupEnv8x8Minigrid'),
+        ('MultiGrid-Meetup-Single-8x8-v0', 'SingleMeetupEnv8x8'),
+        ('MultiGrid-Meetup-Random-10x10-v0', 'RandomMeetupEnv10x10'),
+        ('MultiGrid-Meetup-Empty-12x12-v0', 'EmptyMeetupEnv12x12'),
+        ('MultiGrid-Meetup-Empty-15x15-v0', 'EmptyMeetupEnv15x15'),
+        ('MultiGrid-Meetup-Random-12x12-v0', 'RandomMeetupEnv12x12'),
+        ('MultiGrid-Meetup-Single-12x12-v0', 'SingleMeetupEnv12x12'),
+        ('MultiGrid-Meetup-Multi-12x12-v0', 'MultiMeetupEnv12x12'),
+    ]),
+    ('multigym.envs.stag_hunt', [
+        ('MultiGrid-StagHunt-v0', 'StagHuntEnv'),
+        ('MultiGrid-StagHunt-Empty-6x6-v0', 'EmptyStagHuntEnv6x6'),
+        ('MultiGrid-StagHunt-Empty-8x8-v0', 'EmptyStagHuntEnv8x8'),
+        ('MultiGrid-StagHunt-NoStag-8x8-v0', 'NoStagHuntEnv8x8'),
+        ('MultiGrid-StagHunt-AllStag-8x8-v0', 'AllStagHuntEnv8x8'),
+        ('MultiGrid-StagHunt-Random-8x8-v0', 'RandomStagHuntEnv8x8'),
+        ('MultiGrid-StagHunt-Empty-10x10-v0', 'EmptyStagHuntEnv10x10'),
+    ]),
+    ('multigym.envs.tag', [
+        ('MultiGrid-Tag-v0', 'TagEnv'),
+        ('MultiGrid-Tag-Random-6x6-v0', 'RandomTagEnv6x6'),
+        ('MultiGrid-Tag-Random-8x8-v0', 'RandomTagEnv8x8'),
+    ]),
+    ('multigym.envs.tasklist', [
+        ('MultiGrid-TaskList-8x8-v0', 'TaskListEnv8x8'),
+        ('MultiGrid-TaskList-Sparse-8x8-v0', 'TaskListEnvSparse8x8'),
+        ('MultiGrid-TaskList-8x8-Minigrid-v0', 'TaskListEnv8x8Minigrid'),
+    ]),
+    ('multigym.ctf.captureflag', [
+        ('MultiGrid-CTF-Classic-v0', 'CaptureFlagClassicEnv'),
+    ]),
+]
+
+for _module, _envs in ENVS:
+  for _env_id, _class_name in _envs:
+    register(env_id=_env_id, entry_point=_module + ':' + _class_name)
+
+_CLASS_MODULES = {class_name: module for module, envs in ENVS
+                  for _, class_name in envs}
+
+
+def public_names(module):
+  """Names a star import of a module binds, i.e. its __all__ or public names."""
+  return getattr(module, '__all__',
+                 [name for name in vars(module) if not name.startswith('_')])
+
+
+def __getattr__(name):
+  """Import the env module defining an attribute, on first access.
 
-# Import all environments and register them, so pylint: disable=wildcard-import
-from .adversarial import *
-from .cluttered import *
-from .coingame import *
-from .doorkey import *
-from .empty import *
-from .fourrooms import *
-from .gather import *
-from .lava_walls import *
-from .maze import *
-from .meetup import *
-from .stag_hunt import *
-from .tag import *
-from .tasklist import *
+  __all__ is also computed on first access, for star imports. It imports every
+  env module, and lists the names a star import of each of them binds.
+  """
+  modules = [module for module, _ in ENVS if module.startswith(__name__ + '.')]
+  if name == '__all__':
+    names = []
+    for module in modules:
+      names.extend(public_names(importlib.import_module(module)))
+    globals()['__all__'] = sorted(set(names))
+    return globals()['__all__']
+  # Submodules are left to the import system, e.g. from multigym.envs import x
+  if name.startswith('__') or __name__ + '.' + name in modules:
+    raise AttributeError(name)
+  if name in _CLASS_MODULES:
+    modules.insert(0, _CLASS_MODULES[name])
+  for module in modules:
+    value = getattr(importlib.import_module(module), name, None)
+    if value is not None:
+      return value
+  raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -34,7 +34,6 @@ from networkx import grid_graph
 import numpy as np
 
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class AdversarialEnv(multigrid.MultiGridEnv):
@@ -45,8 +44,14 @@ class AdversarialEnv(multigrid.MultiGridEnv):
   chooses where the next item should be placed.
   """
 
+  state_fields = multigrid.MultiGridEnv.state_fields + (
+      'agent_start_pos', 'agent_start_dir', 'goal_pos', 'adversary_step_count',
+      'wall_locs', 'graph', 'distance_to_goal', 'n_clutter_placed',
+      'deliberate_agent_placement', 'passable', 'shortest_path_length')
+
   def __init__(self, n_clutter=50, size=15, agent_view_size=5, max_steps=250,
-               goal_noise=0., random_z_dim=50, choose_goal_last=False):
+               goal_noise=0., random_z_dim=50, choose_goal_last=False,
+               **kwargs):
     """Initializes environment in which adversary places goal, agent, obstacles.
 
     Args:
@@ -63,10 +68,14 @@ class AdversarialEnv(multigrid.MultiGridEnv):
         adversary. This gives the dimension of that vector.
       choose_goal_last: If True, will place the goal and agent as the last
         actions, rather than the first actions.
+      **kwargs: See superclass.
     """
     self.agent_start_pos = None
     self.goal_pos = None
     self.n_clutter = n_clutter
+    # NetworkX graph used for computing shortest path, built by reset
+    self.graph = None
+    self.wall_locs = []
     self.goal_noise = goal_noise
     self.random_z_dim = random_z_dim
     self.choose_goal_last = choose_goal_last
@@ -82,6 +91,7 @@ class AdversarialEnv(multigrid.MultiGridEnv):
         agent_view_size=agent_view_size,
         see_through_walls=True,  # Set this to True for maximum speed
         competitive=True,
+        **kwargs
     )
 
     # Metrics
@@ -108,10 +118,6 @@ class AdversarialEnv(multigrid.MultiGridEnv):
          'time_step': self.adversary_ts_obs_space,
          'random_z': self.adversary_randomz_obs_space})
 
-    # NetworkX graph used for computing shortest path
-    self.graph = grid_graph(dim=[size-2, size-2])
-    self.wall_locs = []
-
   def _gen_grid(self, width, height):
     """Grid is initially empty, because adversary will create it."""
     # Create an empty grid
@@ -171,8 +177,7 @@ class AdversarialEnv(multigrid.MultiGridEnv):
 
   def reset_agent_status(self):
     """Reset the agent's position, direction, done, and carrying status."""
-    self.agent_pos = [None] * self.n_agents
-    self.agent_dir = [self.agent_start_dir] * self.n_agents
+    self._reset_kinematics(agent_dir=self.agent_start_dir)
     self.done = [False] * self.n_agents
     self.carrying = [None] * self.n_agents
 
@@ -180,7 +185,7 @@ class AdversarialEnv(multigrid.MultiGridEnv):
     """Resets the agent's start position, but leaves goal and walls."""
     # Remove the previous agents from the world
     for a in range(self.n_agents):
-      if self.agent_pos[a] is not None:
+      if self.agent_is_placed(a):
         self.grid.set(self.agent_pos[a][0], self.agent_pos[a][1], None)
 
     # Current position and direction of the agent
@@ -192,8 +197,7 @@ class AdversarialEnv(multigrid.MultiGridEnv):
       self.place_agent_at_pos(0, self.agent_start_pos, rand_dir=False)
 
     for a in range(self.n_agents):
-      assert self.agent_pos[a] is not None
-      assert self.agent_dir[a] is not None
+      assert self.agent_is_placed(a)
 
       # Check that the agent doesn't overlap with an object
       start_cell = self.grid.get(*self.agent_pos[a])
@@ -243,7 +247,7 @@ class AdversarialEnv(multigrid.MultiGridEnv):
       self.shortest_path_length = (self.width - 2) * (self.height - 2) + 1
 
   def generate_random_z(self):
-    return np.random.uniform(size=(self.random_z_dim,)).astype(np.float32)
+    return self.np_random.uniform(size=(self.random_z_dim,)).astype(np.float32)
 
   def step_adversary(self, loc):
     """The adversary gets n_clutter + 2 moves to place the goal, agent, blocks.
@@ -301,7 +305,7 @@ class AdversarialEnv(multigrid.MultiGridEnv):
     elif self.adversary_step_count < self.adversary_max_steps:
       # If there is already an object there, action does nothing
       if self.grid.get(x, y) is None:
-        self.put_obj(minigrid.Wall(), x, y)
+        self.put_obj(multigrid.shared_obj('wall'), x, y)
         self.n_clutter_placed += 1
         self.wall_locs.append((x-1, y-1))
 
@@ -352,7 +356,7 @@ class AdversarialEnv(multigrid.MultiGridEnv):
 
     # Randomly place walls
     for _ in range(int(self.n_clutter / 2)):
-      self.place_obj(minigrid.Wall(), max_tries=100)
+      self.place_obj(multigrid.shared_obj('wall'), max_tries=100)
 
     self.compute_shortest_path()
     self.n_clutter_placed = int(self.n_clutter / 2)
@@ -370,9 +374,11 @@ class ReparameterizedAdversarialEnv(AdversarialEnv):
   been placed at a different location, they will move to the new location.
   """
 
-  def __init__(self, n_clutter=50, size=15, agent_view_size=5, max_steps=250):
+  def __init__(self, n_clutter=50, size=15, agent_view_size=5, max_steps=250,
+               **kwargs):
     super().__init__(n_clutter=n_clutter, size=size,
-                     agent_view_size=agent_view_size, max_steps=max_steps)
+                     agent_view_size=agent_view_size, max_steps=max_steps,
+                     **kwargs)
 
     # Adversary has four actions: place agent, goal, wall, or nothing
     self.adversary_action_dim = 4
@@ -393,8 +399,6 @@ class ReparameterizedAdversarialEnv(AdversarialEnv):
 
     self.adversary_max_steps = (size - 2)**2
 
-    self.wall_locs = []
-
   def reset(self):
     self.wall_locs = []
     obs = super().reset()
@@ -460,7 +464,7 @@ class ReparameterizedAdversarialEnv(AdversarialEnv):
 
       # Place wall
       elif action == 2:
-        self.put_obj(minigrid.Wall(), x, y)
+        self.put_obj(multigrid.shared_obj('wall'), x, y)
         self.n_clutter_placed += 1
 
         self.wall_locs.append((x-1, y-1))
@@ -508,81 +512,39 @@ class ReparameterizedAdversarialEnv(AdversarialEnv):
 
 class MiniAdversarialEnv(AdversarialEnv):
 
-  def __init__(self):
-    super().__init__(n_clutter=7, size=6, agent_view_size=5, max_steps=50)
+  def __init__(self, **kwargs):
+    super().__init__(n_clutter=7, size=6, agent_view_size=5, max_steps=50,
+                     **kwargs)
 
 
 class MiniReparameterizedAdversarialEnv(ReparameterizedAdversarialEnv):
 
-  def __init__(self):
-    super().__init__(n_clutter=7, size=6, agent_view_size=5, max_steps=50)
+  def __init__(self, **kwargs):
+    super().__init__(n_clutter=7, size=6, agent_view_size=5, max_steps=50,
+                     **kwargs)
 
 
 class NoisyAdversarialEnv(AdversarialEnv):
 
-  def __init__(self):
-    super().__init__(goal_noise=0.3)
+  def __init__(self, **kwargs):
+    super().__init__(goal_noise=0.3, **kwargs)
 
 
 class MediumAdversarialEnv(AdversarialEnv):
 
-  def __init__(self):
-    super().__init__(n_clutter=30, size=10, agent_view_size=5, max_steps=200)
+  def __init__(self, **kwargs):
+    super().__init__(n_clutter=30, size=10, agent_view_size=5, max_steps=200,
+                     **kwargs)
 
 
 class GoalLastAdversarialEnv(AdversarialEnv):
 
-  def __init__(self):
-    super().__init__(choose_goal_last=True)
+  def __init__(self, **kwargs):
+    super().__init__(choose_goal_last=True, **kwargs)
 
 
 class MiniGoalLastAdversarialEnv(AdversarialEnv):
 
-  def __init__(self):
+  def __init__(self, **kwargs):
     super().__init__(n_clutter=7, size=6, agent_view_size=5, max_steps=50,
-                     choose_goal_last=True)
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-Adversarial-v0',
-    entry_point=module_path + ':AdversarialEnv'
-)
-
-register(
-    env_id='MultiGrid-ReparameterizedAdversarial-v0',
-    entry_point=module_path + ':ReparameterizedAdversarialEnv'
-)
-
-register(
-    env_id='MultiGrid-MiniAdversarial-v0',
-    entry_point=module_path + ':MiniAdversarialEnv'
-)
-
-register(
-    env_id='MultiGrid-MiniReparameterizedAdversarial-v0',
-    entry_point=module_path + ':MiniReparameterizedAdversarialEnv'
-)
-
-register(
-    env_id='MultiGrid-NoisyAdversarial-v0',
-    entry_point=module_path + ':NoisyAdversarialEnv'
-)
-
-register(
-    env_id='MultiGrid-MediumAdversarial-v0',
-    entry_point=module_path + ':MediumAdversarialEnv'
-)
-
-register(
-    env_id='MultiGrid-GoalLastAdversarial-v0',
-    entry_point=module_path + ':GoalLastAdversarialEnv'
-)
-
-register(
-    env_id='MultiGrid-MiniGoalLastAdversarial-v0',
-    entry_point=module_path + ':MiniGoalLastAdversarialEnv'
-)
+                     choose_goal_last=True, **kwargs)
@@ -19,7 +19,6 @@
 
 import gym_minigrid.minigrid as minigrid
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class ClutteredMultiGrid(multigrid.MultiGridEnv):
@@ -43,9 +42,9 @@ class ClutteredMultiGrid(multigrid.MultiGridEnv):
       self.put_obj(minigrid.Goal(), width - 2, height - 2)
     for _ in range(self.n_clutter):
       if self.walls_are_lava:
-        self.place_obj(minigrid.Lava(), max_tries=100)
+        self.place_obj(multigrid.shared_obj('lava'), max_tries=100)
       else:
-        self.place_obj(minigrid.Wall(), max_tries=100)
+        self.place_obj(multigrid.shared_obj('wall'), max_tries=100)
 
     self.place_agent()
 
@@ -141,79 +140,3 @@ class Cluttered15MinigridMedium(ClutteredMultiGrid):
   def __init__(self, **kwargs):
     super().__init__(n_agents=1, n_clutter=15, minigrid_mode=True, size=10,
                      **kwargs)
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-Cluttered-v0',
-    entry_point=module_path + ':ClutteredMultiGrid'
-)
-
-register(
-    env_id='MultiGrid-Cluttered-Single-v0',
-    entry_point=module_path + ':ClutteredMultiGridSingle'
-)
-
-register(
-    env_id='MultiGrid-Cluttered-Single-6x6-v0',
-    entry_point=module_path + ':ClutteredMultiGridSingle6x6'
-)
-
-register(
-    env_id='MultiGrid-Cluttered40-Minigrid-v0',
-    entry_point=module_path + ':Cluttered40Minigrid'
-)
-
-register(
-    env_id='MultiGrid-Cluttered10-Minigrid-v0',
-    entry_point=module_path + ':Cluttered10Minigrid'
-)
-
-register(
-    env_id='MultiGrid-Cluttered50-Minigrid-v0',
-    entry_point=module_path + ':Cluttered50Minigrid'
-)
-
-register(
-    env_id='MultiGrid-Cluttered5-Minigrid-v0',
-    entry_point=module_path + ':Cluttered5Minigrid'
-)
-
-register(
-    env_id='MultiGrid-MiniCluttered1-Minigrid-v0',
-    entry_point=module_path + ':Cluttered1MinigridMini'
-)
-
-register(
-    env_id='MultiGrid-MiniCluttered6-Minigrid-v0',
-    entry_point=module_path + ':Cluttered6MinigridMini'
-)
-
-register(
-    env_id='MultiGrid-MiniCluttered7-Minigrid-v0',
-    entry_point=module_path + ':Cluttered7MinigridMini'
-)
-
-register(
-    env_id='MultiGrid-Cluttered-Lava-Minigrid-v0',
-    entry_point=module_path + ':ClutteredMinigridLava'
-)
-
-register(
-    env_id='MultiGrid-MiniCluttered-Lava-Minigrid-v0',
-    entry_point=module_path + ':ClutteredMinigridLavaMini'
-)
-
-register(
-    env_id='MultiGrid-MediumCluttered-Lava-Minigrid-v0',
-    entry_point=module_path + ':ClutteredMinigridLavaMedium'
-)
-
-register(
-    env_id='MultiGrid-MediumCluttered15-Minigrid-v0',
-    entry_point=module_path + ':Cluttered15MinigridMedium'
-)
-
@@ -24,7 +24,6 @@ import gym
 import gym_minigrid.minigrid as minigrid
 import numpy as np
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class Coin(minigrid.Ball):
@@ -43,6 +42,9 @@ class Coin(minigrid.Ball):
 class CoinGameEnv(multigrid.MultiGridEnv):
   """Coin gathering environment."""
 
+  state_fields = multigrid.MultiGridEnv.state_fields + (
+      'metrics', 'objects', 'agent_colors')
+
   def __init__(self,
                size=15,
                n_agents=2,
@@ -98,6 +100,16 @@ class CoinGameEnv(multigrid.MultiGridEnv):
     self.metrics = {'self_pickups': 0, 'friend_pickups': 0, 'wrong_pickups': 0}
 
   def _get_color_obs(self, obs):
+    if self.array_obs:
+      colors = obs['position'].reshape(self.n_agents, -1)[:, 2:]
+      if not colors.size:
+        # Reset by the superclass constructor, before extending the space
+        return obs
+      colors[:] = 0
+      for i in range(self.n_agents):
+        colors[i, minigrid.COLOR_TO_IDX[self.agent_colors[i]]] = 1
+      return obs
+
     for i in range(self.n_agents):
       color = np.zeros(self.n_colors)
       color[minigrid.COLOR_TO_IDX[self.agent_colors[i]]] = 1
@@ -108,7 +120,7 @@ class CoinGameEnv(multigrid.MultiGridEnv):
     return obs
 
   def reset(self):
-    np.random.shuffle(self.agent_colors)
+    self.np_random.shuffle(self.agent_colors)
     obs = super(CoinGameEnv, self).reset()
     return self._get_color_obs(obs)
 
@@ -118,7 +130,7 @@ class CoinGameEnv(multigrid.MultiGridEnv):
     for i in range(self.n_goals):
       self.place_obj(self.objects[i], max_tries=100)
     for _ in range(self.n_clutter):
-      self.place_obj(minigrid.Wall(), max_tries=100)
+      self.place_obj(multigrid.shared_obj('wall'), max_tries=100)
 
     self.place_agent()
 
@@ -171,20 +183,3 @@ class EmptyCoinGameEnv10x10(CoinGameEnv):
 
   def __init__(self, **kwargs):
     super().__init__(size=10, n_agents=2, n_goals=12, n_clutter=0, **kwargs)
-
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-CoinGame-v0', entry_point=module_path + ':CoinGameEnv')
-
-register(
-    env_id='MultiGrid-CoinGame-Empty-6x6-Minigrid-v0',
-    entry_point=module_path + ':EmptyCoinGameEnv10x10Minigrid')
-
-register(
-    env_id='MultiGrid-CoinGame-Empty-10x10-v0',
-    entry_point=module_path + ':EmptyCoinGameEnv10x10')
@@ -22,12 +22,13 @@ import math
 
 import gym_minigrid.minigrid as minigrid
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class DoorKeyEnv(multigrid.MultiGridEnv):
   """Environment with a door and key, sparse reward."""
 
+  state_fields = multigrid.MultiGridEnv.state_fields + ('split_idx',)
+
   def __init__(self, size=8, n_agents=3, **kwargs):
     super().__init__(
         grid_size=size, max_steps=10 * size * size, n_agents=n_agents, **kwargs)
@@ -78,7 +79,7 @@ class DoorKeyEnv(multigrid.MultiGridEnv):
     if size is None:
       size = (self.split_idx, self.height)
 
-    self.agent_pos[agent_id] = None
+    self.set_agent_pos(agent_id, None)
     pos = self.place_obj(None, top, size, max_tries=max_tries)
 
     self.place_agent_at_pos(agent_id, pos, agent_obj=agent_obj,
@@ -121,43 +122,3 @@ class DoorKeyEnv16x16Single(DoorKeyEnv):
 
   def __init__(self, **kwargs):
     super().__init__(size=16, n_agents=1, **kwargs)
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-DoorKey-6x6-v0',
-    entry_point=module_path + ':DoorKeyEnv6x6'
-)
-
-register(
-    env_id='MultiGrid-DoorKey-8x8-v0',
-    entry_point=module_path + ':DoorKeyEnv'
-)
-
-register(
-    env_id='MultiGrid-DoorKey-16x16-v0',
-    entry_point=module_path + ':DoorKeyEnv16x16'
-)
-
-register(
-    env_id='MultiGrid-DoorKey-5x5-Single-v0',
-    entry_point=module_path + ':DoorKeyEnv5x5Single'
-)
-
-register(
-    env_id='MultiGrid-DoorKey-6x6-Single-v0',
-    entry_point=module_path + ':DoorKeyEnv6x6Single'
-)
-
-register(
-    env_id='MultiGrid-DoorKey-8x8-Single-v0',
-    entry_point=module_path + ':DoorKeyEnv8x8Single'
-)
-
-register(
-    env_id='MultiGrid-DoorKey-16x16-Single-v0',
-    entry_point=module_path + ':DoorKeyEnv16x16Single'
-)
@@ -24,7 +24,6 @@ import numpy as np
 
 import gym_minigrid.minigrid as minigrid
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class EmptyEnv(multigrid.MultiGridEnv):
@@ -53,18 +52,26 @@ class EmptyEnv(multigrid.MultiGridEnv):
         **kwargs
     )
 
-  def _gen_grid(self, width, height):
+  def _gen_layout(self, width, height):
     # Create an empty grid
-    self.grid = multigrid.Grid(width, height)
+    grid = multigrid.Grid(width, height)
 
     # Generate the surrounding walls
-    self.grid.wall_rect(0, 0, width, height)
+    grid.wall_rect(0, 0, width, height)
+
+    if not self.randomize_goal:
+      # Place a goal square in the bottom-right corner
+      goal = minigrid.Goal()
+      grid.set(width - 2, height - 2, goal)
+      goal.init_pos = goal.cur_pos = (width - 2, height - 2)
+
+    return grid
+
+  def _gen_grid(self, width, height):
+    self.grid = self.layout_grid(width, height)
 
     if self.randomize_goal:
       self.place_obj(minigrid.Goal(), max_tries=100)
-    else:
-      # Place a goal square in the bottom-right corner
-      self.put_obj(minigrid.Goal(), width - 2, height - 2)
 
     # Place the agents
     self.place_agent()
@@ -88,16 +95,16 @@ class EmptyEnv(multigrid.MultiGridEnv):
         self.place_one_agent(other_agent.agent_id, agent_obj=other_agent)
 
       # Agents always start in the same location
-      self.agent_pos[agent_id] = pos
-      self.agent_dir[agent_id] = self.agent_start_dir[agent_id]
+      self.set_agent_pos(agent_id, pos)
+      self.set_agent_dir(agent_id, self.agent_start_dir[agent_id])
     else:
       # Randomly place agent
-      self.agent_pos[agent_id] = None
+      self.set_agent_pos(agent_id, None)
       pos = self.place_obj(None, top, size, max_tries=max_tries)
-      self.agent_pos[agent_id] = pos
+      self.set_agent_pos(agent_id, pos)
 
       if rand_dir:
-        self.agent_dir[agent_id] = self._rand_int(0, 4)
+        self.set_agent_dir(agent_id, self._rand_int(0, 4))
 
     # Place the agent object into the grid
     if not agent_obj:
@@ -160,55 +167,4 @@ class EmptyRandomEnv15x15Minigrid(EmptyEnv):
   def __init__(self, **kwargs):
     super().__init__(n_agents=1, size=15, agent_view_size=5,
                      agent_start='random', randomize_goal=True,
-                     minigrid_mode=True)
-
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-Empty-5x5-v0',
-    entry_point=module_path + ':EmptyEnv'
-)
-
-register(
-    env_id='MultiGrid-Empty-Random-5x5-v0',
-    entry_point=module_path + ':EmptyRandomEnv5x5'
-)
-
-register(
-    env_id='MultiGrid-Empty-8x8-v0',
-    entry_point=module_path + ':EmptyEnv8x8'
-)
-
-register(
-    env_id='MultiGrid-Empty-Random-8x8-v0',
-    entry_point=module_path + ':EmptyRandomEnv8x8'
-)
-
-register(
-    env_id='MultiGrid-Empty-16x16-v0',
-    entry_point=module_path + ':EmptyEnv16x16'
-)
-
-register(
-    env_id='MultiGrid-Empty-Random-16x16-v0',
-    entry_point=module_path + ':EmptyRandomEnv16x16'
-)
-
-register(
-    env_id='MultiGrid-Empty-5x5-Single-v0',
-    entry_point=module_path + ':EmptyEnv5x5Single'
-)
-
-register(
-    env_id='MultiGrid-Empty-Random-6x6-Minigrid-v0',
-    entry_point=module_path + ':EmptyRandomEnv6x6Minigrid'
-)
-
-register(
-    env_id='MultiGrid-Empty-Random-15x15-Minigrid-v0',
-    entry_point=module_path + ':EmptyRandomEnv15x15Minigrid'
-)
+                     minigrid_mode=True, **kwargs)
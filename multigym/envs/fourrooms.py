@@ -21,8 +21,8 @@ in one of four rooms.
 """
 
 import gym_minigrid.minigrid as minigrid
+import numpy as np
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class FourRoomsEnv(multigrid.MultiGridEnv):
@@ -54,15 +54,32 @@ class FourRoomsEnv(multigrid.MultiGridEnv):
                      agent_view_size=agent_view_size,
                      minigrid_mode=minigrid_mode, **kwargs)
 
-  def _gen_grid(self, width, height):
+  def _gen_layout(self, width, height):
     # Create the grid
-    self.grid = multigrid.Grid(width, height)
+    grid = multigrid.Grid(width, height)
 
     # Generate the surrounding walls
-    self.grid.horz_wall(0, 0)
-    self.grid.horz_wall(0, height - 1)
-    self.grid.vert_wall(0, 0)
-    self.grid.vert_wall(width - 1, 0)
+    grid.horz_wall(0, 0)
+    grid.horz_wall(0, height - 1)
+    grid.vert_wall(0, 0)
+    grid.vert_wall(width - 1, 0)
+
+    # Generate the walls between rooms, the doors are added by _gen_grid
+    room_w = width // 2
+    room_h = height // 2
+    for j in range(0, 2):
+      for i in range(0, 2):
+        if i + 1 < 2:
+          grid.vert_wall((i + 1) * room_w, j * room_h, room_h)
+        if not self.two_rooms and j + 1 < 2:
+          grid.horz_wall(i * room_w, (j + 1) * room_h, room_w)
+
+    return grid
+
+  def _gen_grid(self, width, height):
+    # The walls never change, only the doors are drawn at random. No wall
+    # crosses a door, so the doors can be opened after building all walls.
+    self.grid = self.layout_grid(width, height)
 
     room_w = width // 2
     room_h = height // 2
@@ -76,19 +93,17 @@ class FourRoomsEnv(multigrid.MultiGridEnv):
         x_right = x_left + room_w
         y_bottom = y_top + room_h
 
-        # Vertical wall and door
+        # Vertical door
         if i + 1 < 2:
-          self.grid.vert_wall(x_right, y_top, room_h)
           if not (j == 1 and self.two_rooms and height < 7):
             pos = (x_right, self._rand_int(y_top + 1, y_bottom))
             if not (pos[0] <= 1 or pos[0] >= width -1 or
                     pos[1] <= 0 or pos[1] >= height -1):
               self.grid.set(*pos, None)
 
-        # Horizontal wall and door
+        # Horizontal door
         if not self.two_rooms:
           if j + 1 < 2:
-            self.grid.horz_wall(x_left, y_bottom, room_w)
             pos = (self._rand_int(x_left + 1, x_right), y_bottom)
             if not (pos[0] <= 1 or pos[0] >= width -1 or
                     pos[1] <= 0 or pos[1] >= height -1):
@@ -96,9 +111,12 @@ class FourRoomsEnv(multigrid.MultiGridEnv):
 
     # Randomize the player start position and orientation
     if self._agent_default_pos is not None:
-      self.agent_pos = self._agent_default_pos
+      # The first agent starts at the default position, facing a random
+      # direction
       self.grid.set(*self._agent_default_pos, None)
-      self.agent_dir = self._rand_int(0, 4)  # random start direction
+      self.place_agent_at_pos(0, np.array(self._agent_default_pos))
+      for a in range(1, self.n_agents):
+        self.place_one_agent(a)
     else:
       self.place_agent()
 
@@ -154,43 +172,3 @@ class MiniFourRoomsEnvMinigrid(FourRoomsEnv):
   def __init__(self, **kwargs):
     super().__init__(grid_size=6, agent_view_size=5, minigrid_mode=True,
                      n_agents=1, **kwargs)
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-FourRooms-v0',
-    entry_point=module_path + ':FourRoomsEnv'
-)
-
-register(
-    env_id='MultiGrid-FourRooms-15x15-v0',
-    entry_point=module_path + ':FourRoomsEnv15x15'
-)
-
-register(
-    env_id='MultiGrid-FourRooms-Single-v0',
-    entry_point=module_path + ':FourRoomsEnvSingle'
-)
-
-register(
-    env_id='MultiGrid-TwoRooms-Minigrid-v0',
-    entry_point=module_path + ':TwoRoomsEnvMinigrid'
-)
-
-register(
-    env_id='MultiGrid-FourRooms-Minigrid-v0',
-    entry_point=module_path + ':FourRoomsEnvMinigrid'
-)
-
-register(
-    env_id='MultiGrid-MiniTwoRooms-Minigrid-v0',
-    entry_point=module_path + ':MiniTwoRoomsEnvMinigrid'
-)
-
-register(
-    env_id='MultiGrid-MiniFourRooms-Minigrid-v0',
-    entry_point=module_path + ':MiniFourRoomsEnvMinigrid'
-)
@@ -19,14 +19,15 @@
 The agents must pick up (move on top of) items in the environment.
 """
 import gym_minigrid.minigrid as minigrid
-import numpy as np
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class GatherEnv(multigrid.MultiGridEnv):
   """Object gathering environment."""
 
+  state_fields = multigrid.MultiGridEnv.state_fields + (
+      'metrics', 'collected_colors', 'objects', 'colors')
+
   def __init__(self,
                size=15,
                n_agents=3,
@@ -73,18 +74,18 @@ class GatherEnv(multigrid.MultiGridEnv):
     self.grid = multigrid.Grid(width, height)
     self.grid.wall_rect(0, 0, width, height)
     self.objects = []
-    self.colors = (np.random.choice(
+    self.colors = (self.np_random.choice(
         len(minigrid.IDX_TO_COLOR) - 1, size=self.n_colors, replace=False) +
                    1).tolist()
     for i in range(self.n_goals):
       if self.random_colors:
-        color = minigrid.IDX_TO_COLOR[np.random.choice(self.colors)]
+        color = minigrid.IDX_TO_COLOR[self.np_random.choice(self.colors)]
       else:
         color = minigrid.IDX_TO_COLOR[self.colors[i % self.n_colors]]
       self.objects.append(minigrid.Ball(color=color))
       self.place_obj(self.objects[i], max_tries=100)
     for _ in range(self.n_clutter):
-      self.place_obj(minigrid.Wall(), max_tries=100)
+      self.place_obj(multigrid.shared_obj('wall'), max_tries=100)
 
     self.place_agent()
 
@@ -165,47 +166,3 @@ class EmptyColorGatherEnv15x15(GatherEnv):
   def __init__(self, **kwargs):
     super().__init__(
         size=15, n_agents=3, n_goals=12, n_clutter=0, n_colors=4, **kwargs)
-
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(env_id='MultiGrid-Gather-v0', entry_point=module_path + ':GatherEnv')
-
-register(
-    env_id='MultiGrid-Gather-Empty-6x6-v0',
-    entry_point=module_path + ':EmptyGatherEnv6x6')
-
-register(
-    env_id='MultiGrid-Gather-Random-8x8-v0',
-    entry_point=module_path + ':RandomGatherEnv8x8')
-
-register(
-    env_id='MultiGrid-Gather-Random-10x10-v0',
-    entry_point=module_path + ':RandomGatherEnv10x10')
-
-register(
-    env_id='MultiGrid-Color-Gather-Empty-6x6-v0',
-    entry_point=module_path + ':EmptyColorGatherEnv6x6')
-
-register(
-    env_id='MultiGrid-Color-Gather-Random-8x8-v0',
-    entry_point=module_path + ':RandomColorGatherEnv8x8')
-
-register(
-    env_id='MultiGrid-Color-Gather-Empty-10x10-v0',
-    entry_point=module_path + ':EmptyColorGatherEnv10x10')
-
-register(
-    env_id='MultiGrid-Color-Gather-Empty-12x12-v0',
-    entry_point=module_path + ':EmptyColorGatherEnv12x12')
-
-register(
-    env_id='MultiGrid-Color-Gather-RandomCountsColorGatherEnv12x12-12x12-v0',
-    entry_point=module_path + ':RerandomColorGatherEnv12x12')
-
-register(
-    env_id='MultiGrid-Color-Gather-Empty-15x15-v0',
-    entry_point=module_path + ':EmptyColorGatherEnv15x15')
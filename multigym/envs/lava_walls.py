@@ -20,7 +20,6 @@
 import gym_minigrid.minigrid as minigrid
 import gym_minigrid.rendering as rendering
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class LavaWall(minigrid.WorldObj):
@@ -87,14 +86,3 @@ class WallsAreLavaMultiGrid(multigrid.MultiGridEnv):
   def step(self, action):
     obs, reward, done, info = multigrid.MultiGridEnv.step(self, action)
     return obs, reward, done, info
-
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-WallsAreLava-v0',
-    entry_point=module_path + ':WallsAreLavaMultiGrid'
-)
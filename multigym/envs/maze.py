@@ -22,7 +22,6 @@ location of the agent, and the goal location.
 import gym_minigrid.minigrid as minigrid
 import numpy as np
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class MazeEnv(multigrid.MultiGridEnv):
@@ -79,25 +78,33 @@ class MazeEnv(multigrid.MultiGridEnv):
         **kwargs
     )
 
-  def _gen_grid(self, width, height):
+  def _gen_layout(self, width, height):
     # Create an empty grid
-    self.grid = multigrid.Grid(width, height)
+    grid = multigrid.Grid(width, height)
 
     # Generate the surrounding walls
-    self.grid.wall_rect(0, 0, width, height)
+    grid.wall_rect(0, 0, width, height)
 
     # Goal
-    self.put_obj(minigrid.Goal(), self.goal_pos[0], self.goal_pos[1])
-
-    # Agent
-    self.place_agent_at_pos(0, self.start_pos)
+    goal = minigrid.Goal()
+    grid.set(self.goal_pos[0], self.goal_pos[1], goal)
+    goal.init_pos = goal.cur_pos = (self.goal_pos[0], self.goal_pos[1])
 
     # Walls
     for x in range(self.bit_map.shape[0]):
       for y in range(self.bit_map.shape[1]):
         if self.bit_map[y, x]:
           # Add an offset of 1 for the outer walls
-          self.put_obj(minigrid.Wall(), x+1, y+1)
+          grid.set(x+1, y+1, multigrid.shared_obj('wall'))
+
+    return grid
+
+  def _gen_grid(self, width, height):
+    # The maze never changes, so it is only generated once
+    self.grid = self.layout_grid(width, height)
+
+    # Agent
+    self.place_agent_at_pos(0, self.start_pos)
 
 
 class HorizontalMazeEnv(MazeEnv):
@@ -342,63 +349,3 @@ class MediumMazeEnv(MazeEnv):
     ])
     super().__init__(size=10, bit_map=bit_map, start_pos=start_pos,
                      goal_pos=goal_pos, **kwargs)
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-Maze-v0',
-    entry_point=module_path + ':MazeEnv'
-)
-
-register(
-    env_id='MultiGrid-MiniMaze-v0',
-    entry_point=module_path + ':MiniMazeEnv'
-)
-
-register(
-    env_id='MultiGrid-MediumMaze-v0',
-    entry_point=module_path + ':MediumMazeEnv'
-)
-
-register(
-    env_id='MultiGrid-Maze2-v0',
-    entry_point=module_path + ':HorizontalMazeEnv'
-)
-
-register(
-    env_id='MultiGrid-Maze3-v0',
-    entry_point=module_path + ':Maze3Env'
-)
-
-register(
-    env_id='MultiGrid-Labyrinth-v0',
-    entry_point=module_path + ':LabyrinthEnv'
-)
-
-register(
-    env_id='MultiGrid-Labyrinth2-v0',
-    entry_point=module_path + ':Labyrinth2Env'
-)
-
-register(
-    env_id='MultiGrid-SixteenRooms-v0',
-    entry_point=module_path + ':SixteenRoomsEnv'
-)
-
-register(
-    env_id='MultiGrid-SixteenRoomsFewerDoors-v0',
-    entry_point=module_path + ':SixteenRoomsFewerDoorsEnv'
-)
-
-register(
-    env_id='MultiGrid-NineRooms-v0',
-    entry_point=module_path + ':NineRoomsEnv'
-)
-
-register(
-    env_id='MultiGrid-NineRoomsFewerDoors-v0',
-    entry_point=module_path + ':NineRoomsFewerDoorsEnv'
-)
@@ -19,15 +19,16 @@
 The agents must meet at one of several predetermined locations.
 """
 import numpy as np
-import gym_minigrid.minigrid as minigrid
 
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class MeetupEnv(multigrid.MultiGridEnv):
   """Meetup environment."""
 
+  state_fields = multigrid.MultiGridEnv.state_fields + (
+      'metrics', 'goal_pos', 'past_goal_dist')
+
   def __init__(self,
                size=15,
                n_agents=3,
@@ -71,7 +72,7 @@ class MeetupEnv(multigrid.MultiGridEnv):
           multigrid.Door(color='red', is_locked=True), max_tries=100)
       self.goal_pos[i] = pos
     for _ in range(self.n_clutter):
-      self.place_obj(minigrid.Wall(), max_tries=100)
+      self.place_obj(multigrid.shared_obj('wall'), max_tries=100)
 
     self.place_agent()
 
@@ -176,63 +177,3 @@ class MultiMeetupEnv12x12(MeetupEnv):
 
   def __init__(self, **kwargs):
     super().__init__(size=12, n_agents=3, n_goals=5, n_clutter=0, **kwargs)
-
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(env_id='MultiGrid-Meetup-v0', entry_point=module_path + ':MeetupEnv')
-
-register(
-    env_id='MultiGrid-Meetup-Empty-6x6-v0',
-    entry_point=module_path + ':EmptyMeetupEnv6x6')
-
-register(
-    env_id='MultiGrid-Meetup-SingleTarget-6x6-Minigrid-v0',
-    entry_point=module_path + ':SingleTargetMeetupEnv6x6Minigrid')
-
-register(
-    env_id='MultiGrid-Meetup-Empty-6x6-Minigrid-v0',
-    entry_point=module_path + ':EmptyMeetupEnv6x6Minigrid')
-
-register(
-    env_id='MultiGrid-Meetup-Single-6x6-v0',
-    entry_point=module_path + ':SingleMeetupEnv6x6')
-
-register(
-    env_id='MultiGrid-Meetup-Random-8x8-v0',
-    entry_point=module_path + ':RandomMeetupEnv8x8')
-
-register(
-    env_id='MultiGrid-Meetup-Random-8x8-Minigrid-v0',
-    entry_point=module_path + ':RandomMeetupEnv8x8Minigrid')
-
-register(
-    env_id='MultiGrid-Meetup-Single-8x8-v0',
-    entry_point=module_path + ':SingleMeetupEnv8x8')
-
-register(
-    env_id='MultiGrid-Meetup-Random-10x10-v0',
-    entry_point=module_path + ':RandomMeetupEnv10x10')
-
-register(
-    env_id='MultiGrid-Meetup-Empty-12x12-v0',
-    entry_point=module_path + ':EmptyMeetupEnv12x12')
-
-register(
-    env_id='MultiGrid-Meetup-Empty-15x15-v0',
-    entry_point=module_path + ':EmptyMeetupEnv15x15')
-
-register(
-    env_id='MultiGrid-Meetup-Random-12x12-v0',
-    entry_point=module_path + ':RandomMeetupEnv12x12')
-
-register(
-    env_id='MultiGrid-Meetup-Single-12x12-v0',
-    entry_point=module_path + ':SingleMeetupEnv12x12')
-
-register(
-    env_id='MultiGrid-Meetup-Multi-12x12-v0',
-    entry_point=module_path + ':MultiMeetupEnv12x12')
@@ -21,7 +21,6 @@ One agent must toggle the stag while another agent is adjacent.
 import gym_minigrid.minigrid as minigrid
 import numpy as np
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class Stag(minigrid.Box):
@@ -55,6 +54,9 @@ class Plant(minigrid.Ball):
 class StagHuntEnv(multigrid.MultiGridEnv):
   """Grid world environment with two competing goals."""
 
+  state_fields = multigrid.MultiGridEnv.state_fields + (
+      'metrics', 'stags', 'plants')
+
   def __init__(self,
                size=15,
                n_agents=2,
@@ -102,7 +104,7 @@ class StagHuntEnv(multigrid.MultiGridEnv):
     for plant in self.plants:
       self.place_obj(plant, max_tries=100)
     for _ in range(self.n_clutter):
-      self.place_obj(minigrid.Wall(), max_tries=100)
+      self.place_obj(multigrid.shared_obj('wall'), max_tries=100)
 
     self.place_agent()
 
@@ -187,36 +189,3 @@ class EmptyStagHuntEnv10x10(StagHuntEnv):
   def __init__(self, **kwargs):
     super().__init__(
         size=10, n_agents=2, n_stags=2, n_plants=3, n_clutter=0, **kwargs)
-
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(
-    env_id='MultiGrid-StagHunt-v0', entry_point=module_path + ':StagHuntEnv')
-
-register(
-    env_id='MultiGrid-StagHunt-Empty-6x6-v0',
-    entry_point=module_path + ':EmptyStagHuntEnv6x6')
-
-register(
-    env_id='MultiGrid-StagHunt-Empty-8x8-v0',
-    entry_point=module_path + ':EmptyStagHuntEnv8x8')
-
-register(
-    env_id='MultiGrid-StagHunt-NoStag-8x8-v0',
-    entry_point=module_path + ':NoStagHuntEnv8x8')
-
-register(
-    env_id='MultiGrid-StagHunt-AllStag-8x8-v0',
-    entry_point=module_path + ':AllStagHuntEnv8x8')
-
-register(
-    env_id='MultiGrid-StagHunt-Random-8x8-v0',
-    entry_point=module_path + ':RandomStagHuntEnv8x8')
-
-register(
-    env_id='MultiGrid-StagHunt-Empty-10x10-v0',
-    entry_point=module_path + ':EmptyStagHuntEnv10x10')
@@ -21,9 +21,7 @@ near the other team and the other team has a symmetric penalty.
 """
 import numpy as np
 
-import gym_minigrid.minigrid as minigrid
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class TagEnv(multigrid.MultiGridEnv):
@@ -62,7 +60,7 @@ class TagEnv(multigrid.MultiGridEnv):
     self.grid.wall_rect(0, 0, width, height)
 
     for _ in range(self.n_clutter):
-      self.place_obj(minigrid.Wall(), max_tries=100)
+      self.place_obj(multigrid.shared_obj('wall'), max_tries=100)
 
     self.place_agent()
 
@@ -91,19 +89,3 @@ class RandomTagEnv8x8(TagEnv):
   def __init__(self, **kwargs):
     super().__init__(
         size=8, hide_agents=2, seek_agents=3, n_clutter=10, **kwargs)
-
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-register(env_id='MultiGrid-Tag-v0', entry_point=module_path + ':TagEnv')
-
-register(
-    env_id='MultiGrid-Tag-Random-6x6-v0',
-    entry_point=module_path + ':RandomTagEnv6x6')
-
-register(
-    env_id='MultiGrid-Tag-Random-8x8-v0',
-    entry_point=module_path + ':RandomTagEnv8x8')
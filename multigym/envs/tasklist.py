@@ -30,12 +30,14 @@ import gym
 import gym_minigrid.minigrid as minigrid
 import numpy as np
 import multigym.multigrid as multigrid
-from multigym.register import register
 
 
 class TaskListEnv(multigrid.MultiGridEnv):
   """Environment with a list of tasks, sparse reward."""
 
+  state_fields = multigrid.MultiGridEnv.state_fields + (
+      'metrics', 'task_idx', 'last_carrying', 'doors', 'keys', 'boxes', 'balls')
+
   def __init__(self,
                size=8,
                n_agents=3,
@@ -121,6 +123,19 @@ class TaskListEnv(multigrid.MultiGridEnv):
     self.mission = 'Do some random tasks'
 
   def add_extra_info(self, obs):
+    if self.array_obs:
+      # Task one-hot in columns 2-8, carried object encoding in columns 9-11
+      extra_info = obs['position'].reshape(self.n_agents, -1)[:, 2:]
+      if not extra_info.size:
+        # Reset by the superclass constructor, before extending the space
+        return obs
+      extra_info[:] = 0
+      extra_info[np.arange(self.n_agents), self.task_idx] = 1
+      for i in range(self.n_agents):
+        if self.carrying[i]:
+          extra_info[i, 7:] = self.carrying[i].encode()
+      return obs
+
     for i in range(self.n_agents):
       carried_encoding = np.zeros(3)
       if self.carrying[i]:
@@ -150,21 +165,19 @@ class TaskListEnv(multigrid.MultiGridEnv):
     reward = 0
 
     # Get the position in front of the agent
-    fwd_pos = self.front_pos[agent_id]
+    fwd_pos = self.front_pos[agent_id].copy()
 
     # Get the contents of the cell in front of the agent
     fwd_cell = self.grid.get(*fwd_pos)
 
     # Rotate left
     if action == self.actions.left:
-      self.agent_dir[agent_id] -= 1
-      if self.agent_dir[agent_id] < 0:
-        self.agent_dir[agent_id] += 4
+      self.set_agent_dir(agent_id, (self.agent_dir[agent_id] - 1) % 4)
       self.rotate_agent(agent_id)
 
     # Rotate right
     elif action == self.actions.right:
-      self.agent_dir[agent_id] = (self.agent_dir[agent_id] + 1) % 4
+      self.set_agent_dir(agent_id, (self.agent_dir[agent_id] + 1) % 4)
       self.rotate_agent(agent_id)
 
     # Move forward
@@ -262,26 +275,3 @@ class TaskListEnv8x8Minigrid(TaskListEnv):
   def __init__(self, **kwargs):
     super().__init__(size=8, n_agents=1, reward_shaping=1, minigrid_mode=True,
                      **kwargs)
-
-if hasattr(__loader__, 'name'):
-  module_path = __loader__.name
-elif hasattr(__loader__, 'fullname'):
-  module_path = __loader__.fullname
-
-
-register(
-    env_id='MultiGrid-TaskList-8x8-v0',
-    entry_point=module_path + ':TaskListEnv8x8'
-)
-
-
-register(
-    env_id='MultiGrid-TaskList-Sparse-8x8-v0',
-    entry_point=module_path + ':TaskListEnvSparse8x8'
-)
-
-
-register(
-    env_id='MultiGrid-TaskList-8x8-Minigrid-v0',
-    entry_point=module_path + ':TaskListEnv8x8Minigrid'
-)
@@ -33,11 +33,16 @@ within this step budget.
 Unlike Minigrid, Multigrid does not include the string text of the 'mission'
 with each observation.
 """
+import itertools
 import math
 
 import gym
 import gym_minigrid.minigrid as minigrid
 import gym_minigrid.rendering as rendering
+from multigym import observation
+from multigym import profiling
+from multigym import tile_atlas
+from multigym import visibility
 import numpy as np
 
 # Map of color names to RGB values
@@ -49,6 +54,22 @@ AGENT_COLOURS = [
     np.array([252, 227, 35]),  # Yellow
 ]
 
+# Encodings of an empty cell and of the walls surrounding the world
+_EMPTY_IDX = minigrid.OBJECT_TO_IDX['empty']
+_EMPTY_ENCODING = (_EMPTY_IDX, 0, 0)
+_WALL_ENCODING = (minigrid.OBJECT_TO_IDX['wall'],
+                  minigrid.COLOR_TO_IDX['grey'], 0)
+
+# Forward and right vectors of each direction
+_DIR_VECS = np.array(minigrid.DIR_TO_VEC, dtype=np.int64)
+_RIGHT_VECS = np.stack([-_DIR_VECS[:, 1], _DIR_VECS[:, 0]], axis=1)
+
+
+def _read_only(array):
+  view = array.view()
+  view.flags.writeable = False
+  return view
+
 
 class WorldObj(minigrid.WorldObj):
   """Override MiniGrid base class to deal with Agent objects."""
@@ -79,10 +100,8 @@ class WorldObj(minigrid.WorldObj):
     if obj_type == 'empty' or obj_type == 'unseen':
       return None
 
-    if obj_type == 'wall':
-      v = minigrid.Wall(color)
-    elif obj_type == 'floor':
-      v = minigrid.Floor(color)
+    if obj_type == 'wall' or obj_type == 'floor':
+      v = shared_obj(obj_type, color)
     elif obj_type == 'ball':
       v = minigrid.Ball(color)
     elif obj_type == 'key':
@@ -97,7 +116,7 @@ class WorldObj(minigrid.WorldObj):
     elif obj_type == 'goal':
       v = minigrid.Goal()
     elif obj_type == 'lava':
-      v = minigrid.Lava()
+      v = shared_obj('lava')
     elif obj_type == 'agent':
       v = Agent(color_idx, state)
     else:
@@ -152,8 +171,220 @@ class Agent(WorldObj):
     rendering.fill_coords(img, tri_fn, color)
 
 
+# Objects of these exact classes are fully described by their encoding and
+# never change while in the grid. Any other object is tracked by the grid,
+# since its encoding may change without the grid being notified (e.g. a door
+# being opened).
+_PLAIN_OBJECTS = frozenset([
+    minigrid.Wall, minigrid.Floor, minigrid.Ball, minigrid.Key, minigrid.Box,
+    minigrid.Goal, minigrid.Lava, Agent
+])
+
+
+def encode_obj(obj):
+  """Encode an object as it appears in the grid encoding.
+
+  Agents are always encoded as (type, agent ID, direction), even when a
+  subclass extends their own encoding with extra fields.
+
+  Args:
+    obj: WorldObj instance, or None for an empty cell.
+
+  Returns:
+    A 3-tuple of integers.
+  """
+  if obj is None:
+    return _EMPTY_ENCODING
+  if obj.type == 'agent':
+    return (minigrid.OBJECT_TO_IDX['agent'], obj.agent_id, obj.dir)
+  return obj.encode()
+
+
+# Objects of these types have no state besides their colour, so all grids share
+# a single instance per colour instead of allocating one per cell.
+_SHARED_TYPES = {
+    'wall': minigrid.Wall,
+    'floor': minigrid.Floor,
+    'lava': minigrid.Lava,
+}
+_SHARED_OBJECTS = {}
+
+
+def shared_obj(obj_type, color=None):
+  """Get the shared instance of a stateless object type.
+
+  Args:
+    obj_type: 'wall', 'floor' or 'lava'.
+    color: Colour of the object, or None for the type's default colour.
+
+  Returns:
+    The WorldObj instance shared by every caller asking for the same object.
+    It must not be modified, and has no position since it is in many cells.
+  """
+  obj = _SHARED_OBJECTS.get((obj_type, color))
+  if obj is None:
+    cls = _SHARED_TYPES[obj_type]
+    obj = cls() if color is None else cls(color)
+    obj = _SHARED_OBJECTS.setdefault((obj_type, obj.color), obj)
+    _SHARED_OBJECTS[(obj_type, color)] = obj
+  return obj
+
+
+def _new_obj(obj_type):
+  """Instantiate an object class, using the shared instance if there is one."""
+  for name, cls in _SHARED_TYPES.items():
+    if obj_type is cls:
+      return shared_obj(name)
+  return obj_type()
+
+
+def is_shared(obj):
+  """Whether obj is one of the instances returned by shared_obj."""
+  key = (obj.type, getattr(obj, 'color', None))
+  return _SHARED_OBJECTS.get(key) is obj
+
+
 class Grid(minigrid.Grid):
-  """Extends Grid class, overrides some functions to cope with multi-agent case."""
+  """Extends Grid class, overrides some functions to cope with multi-agent case.
+
+  The grid is stored as arrays rather than as minigrid's list of objects:
+    - objects: (width, height) object array holding the WorldObj in each cell.
+    - encoding: (width, height, 3) uint8 array with the type, color and state
+      of each cell, i.e. the result of encode().
+    - opaque: (width, height) boolean array, True where agents can't see
+      behind the cell contents.
+  Objects not fully described by their encoding (see _PLAIN_OBJECTS) are also
+  kept in the tracked dict, indexed by position, and re-encoded by sync().
+
+  The dirty (width, height) boolean array marks the cells whose encoding or
+  opacity may have changed, through set or sync, since it was last cleared.
+  Code writing to the arrays directly must call invalidate.
+
+  Tiles drawn by render_tile, and the tile atlases used by render, are kept in
+  tile_cache, a least recently used cache shared by all grids, whose budget
+  can be set with Grid.tile_cache.max_bytes.
+  """
+
+  tile_cache = tile_atlas.TileCache()
+
+  def __init__(self, width, height):
+    assert width >= 3
+    assert height >= 3
+
+    self.width = width
+    self.height = height
+
+    self.objects = np.full((width, height), None, dtype=object)
+    self.encoding = np.empty((width, height, 3), dtype=np.uint8)
+    self.encoding[:, :] = _EMPTY_ENCODING
+    self.opaque = np.zeros((width, height), dtype=bool)
+    self.tracked = {}
+    self.dirty = np.zeros((width, height), dtype=bool)
+    # Encoding and opacity last written by sync for each tracked object
+    self._synced = {}
+
+  @classmethod
+  def from_arrays(cls, objects, encoding, opaque, tracked):
+    """Build a grid around existing arrays, without copying them."""
+    grid = cls.__new__(cls)
+    grid.width, grid.height = objects.shape
+    grid.objects = objects
+    grid.encoding = encoding
+    grid.opaque = opaque
+    grid.tracked = tracked
+    grid.dirty = np.zeros(objects.shape, dtype=bool)
+    grid._synced = {}  # pylint: disable=protected-access
+    return grid
+
+  @property
+  def grid(self):
+    """Flat, row-major list of the grid contents, as stored by minigrid."""
+    return list(self.objects.T.ravel())
+
+  def set(self, i, j, v):
+    assert i >= 0 and i < self.width
+    assert j >= 0 and j < self.height
+    self.objects[i, j] = v
+    self.dirty[i, j] = True
+    if v is None:
+      self.encoding[i, j] = _EMPTY_ENCODING
+      self.opaque[i, j] = False
+      self.tracked.pop((i, j), None)
+      self._synced.pop((i, j), None)
+    else:
+      state = (encode_obj(v), not v.see_behind())
+      self.encoding[i, j], self.opaque[i, j] = state
+      if type(v) in _PLAIN_OBJECTS:
+        self.tracked.pop((i, j), None)
+        self._synced.pop((i, j), None)
+      else:
+        self.tracked[(i, j)] = v
+        self._synced[(i, j)] = state
+
+  def horz_wall(self, x, y, length=None, obj_type=minigrid.Wall):
+    if length is None:
+      length = self.width - x
+    for i in range(0, length):
+      self.set(x + i, y, _new_obj(obj_type))
+
+  def vert_wall(self, x, y, length=None, obj_type=minigrid.Wall):
+    if length is None:
+      length = self.height - y
+    for j in range(0, length):
+      self.set(x, y + j, _new_obj(obj_type))
+
+  def get(self, i, j):
+    assert i >= 0 and i < self.width
+    assert j >= 0 and j < self.height
+    return self.objects[i, j]
+
+  def free_mask(self, top=(0, 0), bottom=None):
+    """Get a mask of the empty cells in a rectangle.
+
+    No object encodes as empty, so the mask is read from the encoding without
+    visiting the objects.
+
+    Args:
+      top: (x, y) position of the top-left corner of the rectangle.
+      bottom: (x, y) position of the bottom-right corner of the rectangle,
+        excluded from it. Defaults to the bottom-right corner of the grid.
+
+    Returns:
+      Boolean array with the shape of the rectangle, True for empty cells.
+    """
+    if bottom is None:
+      bottom = (self.width, self.height)
+    return self.encoding[top[0]:bottom[0], top[1]:bottom[1], 0] == _EMPTY_IDX
+
+  def free_cells(self, top=(0, 0), bottom=None):
+    """Get the (n, 2) positions of the empty cells in a rectangle."""
+    return np.argwhere(self.free_mask(top, bottom)) + np.asarray(top)
+
+  def sync(self):
+    """Refresh the encoding and opacity of tracked objects.
+
+    Only the cells of the objects whose state changed are written, and marked
+    as dirty.
+    """
+    for pos, v in self.tracked.items():
+      state = (encode_obj(v), not v.see_behind())
+      if self._synced.get(pos) != state:
+        self._synced[pos] = state
+        self.encoding[pos] = state[0]
+        self.opaque[pos] = state[1]
+        self.dirty[pos] = True
+
+  def invalidate(self):
+    """Mark every cell as dirty, after writing to the arrays directly."""
+    self._synced.clear()
+    self.dirty[:] = True
+
+  def encode(self, vis_mask=None):
+    """Produce a compact numpy encoding of the grid."""
+    self.sync()
+    if vis_mask is None:
+      return self.encoding.copy()
+    return self.encoding * vis_mask[:, :, np.newaxis]
 
   @classmethod
   def render_tile(cls,
@@ -162,56 +393,69 @@ class Grid(minigrid.Grid):
                   tile_size=minigrid.TILE_PIXELS,
                   subdivs=3,
                   cell_type=None):
-    """Render a tile and cache the result."""
-    # Hash map lookup key for the cache
-    if isinstance(highlight, list):
-      key = (tuple(highlight), tile_size)
-    else:
-      key = (highlight, tile_size)
-    key = obj.encode() + key if obj else key
-
-    if key in cls.tile_cache:
-      return cls.tile_cache[key]
-
-    img = np.zeros(
-        shape=(tile_size * subdivs, tile_size * subdivs, 3), dtype=np.uint8)
+    """Render a tile, caching it without its highlight.
 
-    # Draw the grid lines (top and left edges)
-    rendering.fill_coords(img, rendering.point_in_rect(0, 0.031, 0, 1),
-                          (100, 100, 100))
-    rendering.fill_coords(img, rendering.point_in_rect(0, 1, 0, 0.031),
-                          (100, 100, 100))
+    Args:
+      obj: WorldObj to render, or None for an empty cell.
+      highlight: Whether each agent sees the cell, as a list of booleans, or a
+        single boolean for the white highlight of partial observations.
+      tile_size: Tile size in pixels.
+      subdivs: Supersampling factor used to draw the tile.
+      cell_type: Type of obj, walls are never highlighted.
 
-    if obj is not None and obj.type != 'agent':
-      obj.render(img)
+    Returns:
+      (tile_size, tile_size, 3) uint8 tile.
+    """
+    # The cache key doesn't depend on the highlight, which is blended over the
+    # cached tile, so it doesn't grow with the number of agents
+    key = (obj.encode() if obj else ()) + (tile_size, subdivs)
+    layers = cls.tile_cache.get(key)
+    if layers is None:
+      layers = tile_atlas.draw_tile(obj, tile_size, subdivs)
+      cls.tile_cache.put(key, layers)
 
     # Highlight the cell if needed (do not highlight walls)
-    if highlight and not (cell_type is not None and cell_type == 'wall'):
-      if isinstance(highlight, list):
-        for a, agent_highlight in enumerate(highlight):
-          if agent_highlight:
-            rendering.highlight_img(img, color=AGENT_COLOURS[a])
-      else:
-        # Default highlighting for agent's partially observed views
-        rendering.highlight_img(img)
-
-    # Render agents after highlight to avoid highlighting agent triangle (the
-    # combination of colours makes it difficult to ID agent)
-    if obj is not None and obj.type == 'agent':
-      obj.render(img)
-
-    # Downsample the image to perform supersampling/anti-aliasing
-    img = rendering.downsample(img, subdivs)
-
-    # Cache the rendered tile
-    cls.tile_cache[key] = img
+    if not highlight or cell_type == 'wall':
+      colors = ()
+    elif isinstance(highlight, list):
+      colors = [AGENT_COLOURS[a] for a, seen in enumerate(highlight) if seen]
+    else:
+      # Default highlighting for agent's partially observed views
+      colors = [tile_atlas.WHITE]
 
-    return img
+    # Agents are composited over the highlight, as the combination of colours
+    # would make the agent triangle difficult to identify
+    return tile_atlas.compose_tile(layers, colors)
 
   def render(self,
              tile_size,
              highlight_mask=None):
-    """Render this grid at a given scale.
+    """Render this grid at a given scale, from the shared tile atlas.
+
+    Args:
+      tile_size: Tile size in pixels.
+      highlight_mask: An array of binary masks, showing which part of the grid
+        should be highlighted for each agent. Can also be used in partial
+        observation for single agent, which must be handled differently.
+
+    Returns:
+      An image of the rendered Grid.
+    """
+    atlas = tile_atlas.get_atlas(self.tile_cache, tile_size)
+    if highlight_mask is None:
+      masks, colors = None, None
+    elif isinstance(highlight_mask, list):
+      masks, colors = highlight_mask, AGENT_COLOURS[:len(highlight_mask)]
+    else:
+      masks, colors = [highlight_mask], [tile_atlas.WHITE]
+    return atlas.compose(atlas.indices(self), masks, colors)
+
+  def render_by_tile(self,
+                     tile_size,
+                     highlight_mask=None):
+    """Render this grid tile by tile, with render_tile.
+
+    Reference implementation of render.
 
     Args:
       tile_size: Tile size in pixels.
@@ -278,45 +522,123 @@ class Grid(minigrid.Grid):
 
     return grid, vis_mask
 
-  def rotate_left(self):
-    """Rotate the grid counter-clockwise, including agents within it."""
-    grid = Grid(self.height, self.width)
+  @staticmethod
+  def render_observations(observations, tile_size, highlight=True):
+    """Render a batch of encoded observations, without decoding them.
 
-    for i in range(self.width):
-      for j in range(self.height):
-        v = self.get(i, j)
+    Equivalent to rendering the grid given by decode for each observation,
+    highlighting its visible cells, but tiles are looked up in the shared
+    atlas from the (type, color, state) of each cell.
 
-        # Directions are relative to the agent so must be modified
-        if v is not None and v.type == 'agent':
-          # Make a new agent so original grid isn't modified
-          v = Agent(v.agent_id, v.dir)
-          v.dir -= 1
-          if v.dir < 0:
-            v.dir += 4
+    Args:
+      observations: (..., width, height, 3) array of encoded grids, e.g. the
+        agents' partially observed views.
+      tile_size: Tile size in pixels.
+      highlight: Whether to highlight the cells that aren't unseen.
 
-        grid.set(j, grid.height - 1 - i, v)
+    Returns:
+      (..., height * tile_size, width * tile_size, 3) uint8 images.
+    """
+    observations = np.asarray(observations)
+    atlas = tile_atlas.get_atlas(Grid.tile_cache, tile_size)
+    indices = atlas.encoding_indices(observations, WorldObj.decode)
+    if not highlight:
+      return atlas.compose(indices)
+    vis_mask = observations[..., 0] != minigrid.OBJECT_TO_IDX['unseen']
+    return atlas.compose(indices, [vis_mask], [tile_atlas.WHITE])
+
+  def rotate_left(self):
+    """Rotate the grid counter-clockwise, including agents within it."""
+    self.sync()
+
+    # Cell (i, j) moves to (j, width - 1 - i)
+    tracked = {(j, self.width - 1 - i): v
+               for (i, j), v in self.tracked.items()}
+    grid = Grid.from_arrays(
+        np.ascontiguousarray(np.rot90(self.objects, -1)),
+        np.ascontiguousarray(np.rot90(self.encoding, -1)),
+        np.ascontiguousarray(np.rot90(self.opaque, -1)),
+        tracked)
+
+    # Directions are relative to the agent so must be modified
+    is_agent = grid.encoding[:, :, 0] == minigrid.OBJECT_TO_IDX['agent']
+    for i, j in zip(*np.nonzero(is_agent)):
+      v = grid.objects[i, j]
+      # Make a new agent so original grid isn't modified
+      grid.set(i, j, Agent(v.agent_id, (v.dir - 1) % 4))
 
     return grid
 
   def slice(self, top_x, top_y, width, height, agent_pos=None):
     """Get a subset of the grid for agents' partial observations."""
-
-    grid = Grid(width, height)
-
-    for j in range(0, height):
-      for i in range(0, width):
-        x = top_x + i
-        y = top_y + j
-
-        if x >= 0 and x < self.width and \
-           y >= 0 and y < self.height:
-          v = self.get(x, y)
-        else:
-          v = minigrid.Wall()
-
-        grid.set(i, j, v)
-
-    return grid
+    self.sync()
+
+    # Cells outside of the grid are walls
+    objects = np.full((width, height), None, dtype=object)
+    objects.fill(shared_obj('wall'))
+    encoding = np.empty((width, height, 3), dtype=np.uint8)
+    encoding[:, :] = _WALL_ENCODING
+    opaque = np.ones((width, height), dtype=bool)
+    tracked = {}
+
+    # Part of the slice overlapping with the grid
+    x0, y0 = max(top_x, 0), max(top_y, 0)
+    x1 = min(top_x + width, self.width)
+    y1 = min(top_y + height, self.height)
+    if x0 < x1 and y0 < y1:
+      src = np.s_[x0:x1, y0:y1]
+      dst = np.s_[x0 - top_x:x1 - top_x, y0 - top_y:y1 - top_y]
+      objects[dst] = self.objects[src]
+      encoding[dst] = self.encoding[src]
+      opaque[dst] = self.opaque[src]
+      for (i, j), v in self.tracked.items():
+        if x0 <= i < x1 and y0 <= j < y1:
+          tracked[(i - top_x, j - top_y)] = v
+
+    return Grid.from_arrays(objects, encoding, opaque, tracked)
+
+
+# Types of the plain objects whose attributes change during an episode, e.g.
+# cur_pos when they are picked up. Walls, floors, goals and lava never change.
+_IS_MUTABLE_TYPE = np.zeros(256, dtype=bool)
+_IS_MUTABLE_TYPE[[
+    minigrid.OBJECT_TO_IDX[t] for t in ['agent', 'ball', 'key', 'box']
+]] = True
+
+
+def _copy_state_value(value):
+  """Copy lists, dicts, arrays and other values with a copy() method."""
+  if hasattr(value, 'copy') and not isinstance(value, minigrid.WorldObj):
+    return value.copy()
+  return value
+
+
+class EnvState(object):
+  """Snapshot of the dynamic state of a MultiGridEnv, see get_state.
+
+  The grid and agent kinematics are held as copies of the env arrays. Objects
+  keep their identity: the grid holds the same WorldObj instances, and the
+  attributes of those which can change are saved separately.
+  """
+
+  def __init__(self, grid, objects, encoding, opaque, tracked, agent_pos,
+               agent_dir, agent_map, rng_state, fields, object_attrs):
+    self.grid = grid
+    self.objects = objects
+    self.encoding = encoding
+    self.opaque = opaque
+    self.tracked = tracked
+    self.agent_pos = agent_pos
+    self.agent_dir = agent_dir
+    self.agent_map = agent_map
+    self.rng_state = rng_state
+    self.fields = fields
+    self.object_attrs = object_attrs
+
+
+# Rules resolving the conflicts between agents acting simultaneously, see the
+# simultaneous_moves argument of MultiGridEnv.
+CONFLICT_RULES = ('block', 'priority')
 
 
 class MultiGridEnv(minigrid.MiniGridEnv):
@@ -335,7 +657,11 @@ class MultiGridEnv(minigrid.MiniGridEnv):
       competitive=False,
       fixed_environment=False,
       minigrid_mode=False,
-      fully_observed=False
+      fully_observed=False,
+      array_obs=False,
+      copy_obs=True,
+      lazy_reset=False,
+      simultaneous_moves=None
   ):
     """Constructor for multi-agent gridworld environment generator.
 
@@ -362,8 +688,30 @@ class MultiGridEnv(minigrid.MiniGridEnv):
       fully_observed: If True, each agent will receive an observation of the
         full environment state, rather than a partially observed, ego-centric
         observation.
+      array_obs: If True, observations are written into persistent arrays
+        matching image_obs_space, direction_obs_space and position_obs_space,
+        rather than returned as lists with an entry per agent.
+      copy_obs: Only used with array_obs. If True, reset and step return
+        copies of the observation arrays. Otherwise, they return the arrays
+        themselves, which are overwritten by the next call.
+      lazy_reset: If True, the grid is not generated until the first call to
+        reset, which then generates the grid the constructor would have.
+        Until then, the grid is empty and no agent is placed.
+      simultaneous_moves: If None, agents act one after the other in a random
+        order at each step. Otherwise, all agents act on the state at the
+        start of the step, and agents acting on the same cell are resolved by
+        this rule, one of CONFLICT_RULES. See resolve_simultaneous_actions.
     """
+    assert simultaneous_moves in (None,) + CONFLICT_RULES, simultaneous_moves
+    self.simultaneous_moves = simultaneous_moves
     self.fully_observed = fully_observed
+    self.array_obs = array_obs
+    self.copy_obs = copy_obs
+    self._obs_buffers = {}
+    self._visibility = None
+    self._views = None
+    self._layout_templates = {}
+    self.profiler = None
 
     # Can't set both grid_size and width/height
     if grid_size:
@@ -448,9 +796,25 @@ class MultiGridEnv(minigrid.MiniGridEnv):
     self.max_steps = max_steps
     self.see_through_walls = see_through_walls
 
-    # Current position and direction of the agent
-    self.agent_pos = [None] * self.n_agents
-    self.agent_dir = [None] * self.n_agents
+    # Position and direction of the agents, and the vectors derived from them.
+    # They are only exposed as read-only views, and updated through
+    # set_agent_pos and set_agent_dir.
+    self._agent_pos = np.empty((self.n_agents, 2), dtype=np.int64)
+    self._agent_dir = np.empty(self.n_agents, dtype=np.int64)
+    self._dir_vec = np.empty((self.n_agents, 2), dtype=np.int64)
+    self._right_vec = np.empty((self.n_agents, 2), dtype=np.int64)
+    self._front_pos = np.empty((self.n_agents, 2), dtype=np.int64)
+    self._kinematics_views = {
+        'agent_pos': _read_only(self._agent_pos),
+        'agent_dir': _read_only(self._agent_dir),
+        'dir_vec': _read_only(self._dir_vec),
+        'right_vec': _read_only(self._right_vec),
+        'front_pos': _read_only(self._front_pos),
+    }
+
+    # ID of the agent in each cell of the grid, -1 where there is none
+    self.agent_map = None
+    self._reset_kinematics()
 
     # Maintain a done variable for each agent
     self.done = [False] * self.n_agents
@@ -460,8 +824,13 @@ class MultiGridEnv(minigrid.MiniGridEnv):
     self.seed(seed=seed)
     self.fixed_environment = fixed_environment
 
-    # Initialize the state
-    self.reset()
+    # Initialize the state, or placeholders until the first reset
+    if lazy_reset:
+      self.grid = Grid(width, height)
+      self.carrying = [None] * self.n_agents
+      self.step_count = 0
+    else:
+      self.reset()
 
   def _get_actions(self):
     return MultiGridEnv.Actions
@@ -471,8 +840,7 @@ class MultiGridEnv(minigrid.MiniGridEnv):
       self.seed(self.seed_value)
 
     # Current position and direction of the agent
-    self.agent_pos = [None] * self.n_agents
-    self.agent_dir = [None] * self.n_agents
+    self._reset_kinematics()
     self.done = [False] * self.n_agents
 
     # Generate the grid. Will be random by default, or same environment if
@@ -481,8 +849,7 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
     # These fields should be defined by _gen_grid
     for a in range(self.n_agents):
-      assert self.agent_pos[a] is not None
-      assert self.agent_dir[a] is not None
+      assert self.agent_is_placed(a)
 
       # Check that the agent doesn't overlap with an object
       start_cell = self.grid.get(*self.agent_pos[a])
@@ -500,6 +867,77 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
     return obs
 
+  # Methods timed as phases once profiling is enabled. Subclasses may add
+  # their own.
+  profiled_methods = (
+      'reset', '_gen_grid', 'step', 'resolve_simultaneous_actions',
+      'step_one_agent', '_forward', '_pickup', '_drop', '_toggle', 'gen_obs',
+      'cached_agent_views', 'gen_agent_views', 'visibility_masks', 'place_obj',
+      'place_agent', 'render')
+
+  def enable_profiling(self, trace=False):
+    """Time the phases of the env, i.e. the calls to profiled_methods.
+
+    The methods are wrapped on this instance only, and unwrapped by
+    disable_profiling, so a disabled env runs exactly as before. place_obj
+    also counts its tries under 'place_obj/tries'.
+
+    Args:
+      trace: If True, keep every call to export it as a Chrome trace.
+
+    Returns:
+      The profiling.Profiler accumulating the timings, also set as
+      self.profiler.
+    """
+    self.disable_profiling()
+    self.profiler = profiling.Profiler(trace=trace)
+    for name in self.profiled_methods:
+      setattr(self, name, self.profiler.wrap(name, getattr(self, name)))
+    return self.profiler
+
+  def disable_profiling(self):
+    """Stop profiling, returning the Profiler with the timings so far."""
+    for name in self.profiled_methods:
+      self.__dict__.pop(name, None)
+    profiler, self.profiler = self.profiler, None
+    return profiler
+
+  def _gen_layout(self, width, height):
+    """Generate the static part of the grid, e.g. its walls.
+
+    Envs whose layout never changes between episodes implement this and call
+    layout_grid from _gen_grid, instead of rebuilding the layout every reset.
+
+    Args:
+      width: Width of the grid.
+      height: Height of the grid.
+
+    Returns:
+      A Grid holding only objects which never change during an episode.
+    """
+    raise NotImplementedError
+
+  def layout_grid(self, width, height):
+    """Copy of the grid generated by _gen_layout.
+
+    The layout is generated once and kept as a template, which later calls
+    restore with an array copy. The copies share the template's objects.
+
+    Args:
+      width: Width of the grid.
+      height: Height of the grid.
+
+    Returns:
+      A new Grid holding the layout, ready for the agents to be placed.
+    """
+    template = self._layout_templates.get((width, height))
+    if template is None:
+      template = self._gen_layout(width, height)
+      template.sync()
+      self._layout_templates[(width, height)] = template
+    return Grid.from_arrays(template.objects.copy(), template.encoding.copy(),
+                            template.opaque.copy(), dict(template.tracked))
+
   def __str__(self):
     """Produce a pretty string of the environment's grid along with the agent.
 
@@ -532,8 +970,7 @@ class MultiGridEnv(minigrid.MiniGridEnv):
         # Draw agents
         agent_here = False
         for a in range(self.n_agents):
-          if self.agent_pos[a] is not None and (i == self.agent_pos[a][0] and
-                                                j == self.agent_pos[a][1]):
+          if i == self.agent_pos[a][0] and j == self.agent_pos[a][1]:
             text += str(a) + agent_dir_to_str[self.agent_dir[a]]
             agent_here = True
         if agent_here:
@@ -569,6 +1006,10 @@ class MultiGridEnv(minigrid.MiniGridEnv):
                 max_tries=math.inf):
     """Place an object at an empty position in the grid.
 
+    The position is drawn uniformly from the empty cells of the rectangle not
+    occupied by an agent, dropping any position rejected by reject_fn, so the
+    search is bounded by the number of such cells.
+
     Args:
       obj: Instance of Minigrid WorldObj class (such as Door, Key, etc.).
       top: (x,y) position of the top-left corner of rectangle where to place.
@@ -579,6 +1020,10 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
     Returns:
       Position where object was placed.
+
+    Raises:
+      gym.error.RetriesExceededError: If no position is valid, or none was
+        found within max_tries tries.
     """
     if top is None:
       top = (0, 0)
@@ -587,49 +1032,61 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
     if size is None:
       size = (self.grid.width, self.grid.height)
+    bottom = (min(top[0] + size[0], self.grid.width),
+              min(top[1] + size[1], self.grid.height))
+
+    # Don't place the object on top of another object, or where an agent is.
+    # Candidates are flat indices in the rectangle, in row-major order.
+    free = self.grid.free_mask(top, bottom)
+    if self.agent_map is not None:
+      free &= self.agent_map[top[0]:bottom[0], top[1]:bottom[1]] < 0
+    candidates = np.flatnonzero(free)
+    n_candidates = len(candidates)
+    rect_height = free.shape[1]
 
     num_tries = 0
 
     while True:
-      # This is to handle with rare cases where rejection sampling
-      # gets stuck in an infinite loop
+      if n_candidates == 0:
+        raise gym.error.RetriesExceededError(
+            'No valid position to place the object in place_obj')
+
       if num_tries > max_tries:
         raise gym.error.RetriesExceededError(
             'Rejection sampling failed in place_obj')
 
       num_tries += 1
 
-      pos = np.array((self._rand_int(top[0],
-                                     min(top[0] + size[0], self.grid.width)),
-                      self._rand_int(top[1],
-                                     min(top[1] + size[1], self.grid.height))))
-
-      # Don't place the object on top of another object
-      if self.grid.get(*pos) is not None:
-        continue
-
-      # Don't place the object where the agent is
-      pos_no_good = False
-      for a in range(self.n_agents):
-        if np.array_equal(pos, self.agent_pos[a]):
-          pos_no_good = True
-      if pos_no_good:
-        continue
+      k = self._rand_int(0, n_candidates)
+      x, y = divmod(int(candidates[k]), rect_height)
+      pos = np.array((top[0] + x, top[1] + y))
 
-      # Check if there is a filtering criterion
+      # Check if there is a filtering criterion, and never draw a rejected
+      # position again
       if reject_fn and reject_fn(self, pos):
+        n_candidates -= 1
+        candidates[k] = candidates[n_candidates]
         continue
 
       break
 
     self.grid.set(pos[0], pos[1], obj)
+    if self.profiler is not None:
+      self.profiler.count('place_obj/tries', num_tries)
 
-    if obj is not None:
+    if obj is not None and not is_shared(obj):
       obj.init_pos = pos
       obj.cur_pos = pos
 
     return pos
 
+  def put_obj(self, obj, i, j):
+    """Put an object at a specific position in the grid."""
+    self.grid.set(i, j, obj)
+    if not is_shared(obj):
+      obj.init_pos = (i, j)
+      obj.cur_pos = (i, j)
+
   def place_agent(self, top=None, size=None, rand_dir=True, max_tries=math.inf):
     """Set the starting point of all agents in the world.
 
@@ -656,7 +1113,7 @@ class MultiGridEnv(minigrid.MiniGridEnv):
                       agent_obj=None):
     """Set the agent's starting point at an empty position in the grid."""
 
-    self.agent_pos[agent_id] = None
+    self.set_agent_pos(agent_id, None)
     pos = self.place_obj(None, top, size, max_tries=max_tries)
 
     self.place_agent_at_pos(agent_id, pos, agent_obj=agent_obj,
@@ -665,9 +1122,9 @@ class MultiGridEnv(minigrid.MiniGridEnv):
     return pos
 
   def place_agent_at_pos(self, agent_id, pos, agent_obj=None, rand_dir=True):
-    self.agent_pos[agent_id] = pos
+    self.set_agent_pos(agent_id, pos)
     if rand_dir:
-      self.agent_dir[agent_id] = self._rand_int(0, 4)
+      self.set_agent_dir(agent_id, self._rand_int(0, 4))
 
     # Place the agent object into the grid
     if not agent_obj:
@@ -678,33 +1135,186 @@ class MultiGridEnv(minigrid.MiniGridEnv):
     agent_obj.cur_pos = pos
     self.grid.set(pos[0], pos[1], agent_obj)
 
-  @property
-  def dir_vec(self):
-    """Get the direction vector for the agent (points toward forward movement).
+  # Attributes changing during an episode, saved by get_state. Subclasses
+  # extend this with their own.
+  state_fields = ('step_count', 'done', 'carrying')
+
+  def state_objects(self):
+    """Objects whose attributes are saved by get_state, besides the grid's.
 
     Returns:
-      An array of directions that each agent is facing.
+      The WorldObj instances held by the state fields, directly or in lists.
+      Subclasses may add objects only reachable from other objects.
     """
+    objects = []
+    for name in self.state_fields:
+      value = getattr(self, name)
+      values = value if isinstance(value, (list, tuple)) else [value]
+      objects.extend(v for v in values if isinstance(v, minigrid.WorldObj))
+    return objects
 
-    for a in range(self.n_agents):
-      assert self.agent_dir[a] >= 0 and self.agent_dir[a] < 4
-    return [
-        minigrid.DIR_TO_VEC[self.agent_dir[a]] for a in range(self.n_agents)
+  def get_state(self):
+    """Capture the dynamic state of the env, to restore it with set_state.
+
+    Static data, e.g. spaces or the rendering window, isn't copied. The env
+    RNG is saved, which draws all the randomness of the env dynamics.
+
+    Returns:
+      An EnvState.
+    """
+    grid = self.grid
+    grid.sync()
+
+    # Objects whose attributes may change, without repeating shared ones
+    mutable = _IS_MUTABLE_TYPE[grid.encoding[..., 0]]
+    objects = {}
+    for obj in itertools.chain(grid.objects[mutable], grid.tracked.values(),
+                               self.state_objects()):
+      objects[id(obj)] = obj
+    object_attrs = [
+        (obj, {k: _copy_state_value(v) for k, v in vars(obj).items()})
+        for obj in objects.values()
     ]
 
+    if hasattr(self.np_random, 'bit_generator'):
+      rng_state = self.np_random.bit_generator.state
+    else:
+      rng_state = self.np_random.get_state()
+
+    return EnvState(
+        grid=grid,
+        objects=grid.objects.copy(),
+        encoding=grid.encoding.copy(),
+        opaque=grid.opaque.copy(),
+        tracked=dict(grid.tracked),
+        agent_pos=self._agent_pos.copy(),
+        agent_dir=self._agent_dir.copy(),
+        agent_map=None if self.agent_map is None else self.agent_map.copy(),
+        rng_state=rng_state,
+        fields={name: _copy_state_value(getattr(self, name))
+                for name in self.state_fields},
+        object_attrs=object_attrs)
+
+  def set_state(self, state):
+    """Restore a state captured by get_state on this env.
+
+    The state isn't modified, so it can be restored several times, e.g. to
+    branch from it in tree search.
+
+    Args:
+      state: EnvState returned by get_state.
+    """
+    grid = state.grid
+    np.copyto(grid.objects, state.objects)
+    np.copyto(grid.encoding, state.encoding)
+    np.copyto(grid.opaque, state.opaque)
+    grid.tracked.clear()
+    grid.tracked.update(state.tracked)
+    grid.invalidate()
+    self._views = None
+    self.grid = grid
+
+    self._agent_pos[:] = state.agent_pos
+    self._agent_dir[:] = state.agent_dir
+    self._dir_vec[:] = _DIR_VECS[state.agent_dir]
+    self._right_vec[:] = _RIGHT_VECS[state.agent_dir]
+    self._front_pos[:] = self._agent_pos + self._dir_vec
+    if state.agent_map is None:
+      self.agent_map = None
+    else:
+      self.agent_map = state.agent_map.copy()
+
+    if hasattr(self.np_random, 'bit_generator'):
+      self.np_random.bit_generator.state = state.rng_state
+    else:
+      self.np_random.set_state(state.rng_state)
+
+    for name, value in state.fields.items():
+      setattr(self, name, _copy_state_value(value))
+    for obj, attrs in state.object_attrs:
+      obj_attrs = vars(obj)
+      obj_attrs.clear()
+      obj_attrs.update((k, _copy_state_value(v)) for k, v in attrs.items())
+
+  def _reset_kinematics(self, agent_dir=0):
+    """Remove all agents from the world, facing agent_dir."""
+    self._agent_pos[:] = -1
+    self._agent_dir[:] = agent_dir
+    self._dir_vec[:] = _DIR_VECS[agent_dir]
+    self._right_vec[:] = _RIGHT_VECS[agent_dir]
+    self._front_pos[:] = self._agent_pos + self._dir_vec
+    self.agent_map = None
+
+  def set_agent_pos(self, agent_id, pos):
+    """Set the position of an agent, keeping agent_map and front_pos up to date.
+
+    Args:
+      agent_id: ID of the agent.
+      pos: New (x, y) position of the agent, or None to remove it from the
+        world. The position of a removed agent is (-1, -1).
+    """
+    if self.agent_map is None:
+      self.agent_map = np.full((self.grid.width, self.grid.height), -1,
+                               dtype=np.int64)
+    if self.agent_is_placed(agent_id):
+      x, y = self._agent_pos[agent_id]
+      if self.agent_map[x, y] == agent_id:
+        self.agent_map[x, y] = -1
+    if pos is None:
+      self._agent_pos[agent_id] = -1
+    else:
+      self._agent_pos[agent_id] = pos
+      self.agent_map[pos[0], pos[1]] = agent_id
+    self._front_pos[agent_id] = self._agent_pos[agent_id] + self._dir_vec[
+        agent_id]
+
+  def set_agent_dir(self, agent_id, direction):
+    """Set the direction of an agent, and update the vectors derived from it."""
+    assert 0 <= direction < 4
+    self._agent_dir[agent_id] = direction
+    self._dir_vec[agent_id] = _DIR_VECS[direction]
+    self._right_vec[agent_id] = _RIGHT_VECS[direction]
+    self._front_pos[agent_id] = self._agent_pos[agent_id] + self._dir_vec[
+        agent_id]
+
+  @property
+  def agent_pos(self):
+    """Read-only (n_agents, 2) array with the position of each agent."""
+    return self._kinematics_views['agent_pos']
+
+  @property
+  def agent_dir(self):
+    """Read-only (n_agents,) array with the direction of each agent."""
+    return self._kinematics_views['agent_dir']
+
+  @property
+  def dir_vec(self):
+    """Read-only (n_agents, 2) array with the vector each agent is facing."""
+    return self._kinematics_views['dir_vec']
+
   @property
   def right_vec(self):
-    """Get the vector pointing to the right of the agents."""
-    return [np.array((-dy, dx)) for (dx, dy) in self.dir_vec]
+    """Read-only (n_agents, 2) array with the vector to each agent's right."""
+    return self._kinematics_views['right_vec']
 
   @property
   def front_pos(self):
-    """Get the position of the cell that is right in front of the agent."""
-    front_pos = [None] * self.n_agents
-    for a in range(self.n_agents):
-      assert self.agent_pos[a] is not None and self.dir_vec[a] is not None
-      front_pos[a] = self.agent_pos[a] + self.dir_vec[a]
-    return front_pos
+    """Read-only (n_agents, 2) array with the cell in front of each agent.
+
+    Rows are views that change when the agent moves or turns, copy them to
+    keep a position.
+    """
+    return self._kinematics_views['front_pos']
+
+  def agent_is_placed(self, agent_id):
+    """Check if an agent is in the world."""
+    return self._agent_pos[agent_id, 0] >= 0
+
+  def agent_at(self, pos):
+    """Get the ID of the agent at a grid position, or -1 if there is none."""
+    if self.agent_map is None:
+      return -1
+    return self.agent_map[pos[0], pos[1]]
 
   def get_view_coords(self, i, j, agent_id):
     """Convert grid coordinates into agent's partially observed view.
@@ -804,23 +1414,65 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
   def agent_sees(self, x, y, agent_id):
     """Check if a non-empty grid position is visible to the agent."""
-    coordinates = self.relative_coords(x, y, agent_id)
-    if coordinates is None:
+    if not (0 <= x < self.width and 0 <= y < self.height):
+      return False
+    if not self.visibility_masks()[agent_id, x, y]:
       return False
-    vx, vy = coordinates
 
-    obs = self.gen_obs()
-    obs_grid, _ = Grid.decode(obs['image'][agent_id])
-    obs_cell = obs_grid.get(vx, vy)
+    # At its own position the agent sees what it's carrying instead
+    if (x, y) == tuple(self.agent_pos[agent_id]):
+      return False
+
+    # Objects encoded as another type (e.g. LavaWall) aren't recognized
     world_cell = self.grid.get(x, y)
+    return (world_cell is not None and self.grid.encoding[x, y, 0] ==
+            minigrid.OBJECT_TO_IDX[world_cell.type])
+
+  def visibility_masks(self):
+    """Cells of the world visible to each agent.
 
-    return obs_cell is not None and obs_cell.type == world_cell.type
+    The masks are computed for all agents at once, and cached until the
+    agents move or the opacity of the grid changes.
+
+    Returns:
+      Read-only (n_agents, width, height) boolean array. Agents that aren't
+      placed see nothing.
+    """
+    self.grid.sync()
+    cache = self._visibility
+    if (cache is not None and cache[0] is self.grid and
+        np.array_equal(cache[1], self.grid.opaque) and
+        np.array_equal(cache[2], self._agent_pos) and
+        np.array_equal(cache[3], self._agent_dir)):
+      return cache[4]
+
+    masks = observation.world_visibility(
+        self.grid, self._agent_pos, self._agent_dir, self.agent_view_size,
+        see_through_walls=self.see_through_walls)
+    masks[self._agent_pos[:, 0] < 0] = False
+    masks.setflags(write=False)
+    self._visibility = (self.grid, self.grid.opaque.copy(),
+                        self._agent_pos.copy(), self._agent_dir.copy(), masks)
+    return masks
+
+  def visible_cells(self, agent_ids):
+    """Cells of the world visible to several agents.
+
+    Args:
+      agent_ids: IDs of the agents.
+
+    Returns:
+      (len(agent_ids), width, height) boolean array, True where the agent
+      sees the cell.
+    """
+    return self.visibility_masks()[list(agent_ids)]
 
   def agent_is_done(self, agent_id):
     # Remove correspnding agent object from the grid
     pos = self.agent_pos[agent_id]
     agent_obj = self.grid.get(pos[0], pos[1])
     self.grid.set(pos[0], pos[1], None)
+    self.set_agent_pos(agent_id, None)
 
     self.done[agent_id] = True
 
@@ -844,7 +1496,7 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
     # Update the agent position in grid and environment
     self.grid.set(old_pos[0], old_pos[1], None)
-    self.agent_pos[agent_id] = new_pos
+    self.set_agent_pos(agent_id, new_pos)
     agent_obj.cur_pos = new_pos
     self.grid.set(new_pos[0], new_pos[1], agent_obj)
     assert (self.grid.get(
@@ -865,18 +1517,16 @@ class MultiGridEnv(minigrid.MiniGridEnv):
     reward = 0
 
     # Get the position in front of the agent
-    fwd_pos = self.front_pos[agent_id]
+    fwd_pos = self.front_pos[agent_id].copy()
 
     # Rotate left
     if action == self.actions.left:
-      self.agent_dir[agent_id] -= 1
-      if self.agent_dir[agent_id] < 0:
-        self.agent_dir[agent_id] += 4
+      self.set_agent_dir(agent_id, (self.agent_dir[agent_id] - 1) % 4)
       self.rotate_agent(agent_id)
 
     # Rotate right
     elif action == self.actions.right:
-      self.agent_dir[agent_id] = (self.agent_dir[agent_id] + 1) % 4
+      self.set_agent_dir(agent_id, (self.agent_dir[agent_id] + 1) % 4)
       self.rotate_agent(agent_id)
 
     # Move forward
@@ -911,10 +1561,8 @@ class MultiGridEnv(minigrid.MiniGridEnv):
     """Attempts to move the forward one cell, returns True if successful."""
     fwd_cell = self.grid.get(*fwd_pos)
     # Make sure agents can't walk into each other
-    agent_blocking = False
-    for a in range(self.n_agents):
-      if a != agent_id and np.array_equal(self.agent_pos[a], fwd_pos):
-        agent_blocking = True
+    other_agent = self.agent_at(fwd_pos)
+    agent_blocking = other_agent >= 0 and other_agent != agent_id
 
     # Deal with object interactions
     if not agent_blocking:
@@ -964,6 +1612,80 @@ class MultiGridEnv(minigrid.MiniGridEnv):
         return fwd_cell.toggle(self, fwd_pos)
     return False
 
+  def resolve_simultaneous_actions(self, actions):
+    """Decide which agents act, and in which order, for simultaneous moves.
+
+    An agent acts on the cell in front of it when it moves forward into a cell
+    it can enter, or picks up, drops or toggles what the cell holds. Agents
+    acting on the same cell conflict: with the 'block' rule none of them acts,
+    with the 'priority' rule only the one with the lowest ID does. An agent
+    moving into the cell of another agent only acts if that agent moves out,
+    so agents never swap places or move around a cycle. Agents moving onto a
+    goal or lava leave the grid after all the other moves, so their cells
+    can't be entered during the step.
+
+    Applied in the returned order, the actions of the acting agents don't
+    change the outcome of each other. Agents not acting on a cell, e.g.
+    turning, always act.
+
+    Args:
+      actions: Action of each agent.
+
+    Returns:
+      Array with the IDs of the agents which act: first those which don't
+      move, then those which move, each one before the agent moving into its
+      cell, and last those moving onto a goal or lava.
+    """
+    actions = np.asarray(actions).reshape(self.n_agents)
+    front_pos = self._front_pos
+    in_grid = ((self._agent_pos[:, 0] >= 0) & (front_pos[:, 0] >= 0) &
+               (front_pos[:, 0] < self.grid.width) & (front_pos[:, 1] >= 0) &
+               (front_pos[:, 1] < self.grid.height))
+    occupant = np.full(self.n_agents, -1)
+    if self.agent_map is not None:
+      occupant[in_grid] = self.agent_map[front_pos[in_grid, 0],
+                                         front_pos[in_grid, 1]]
+
+    # Picking up, dropping or toggling does nothing to another agent
+    forward = in_grid & (actions == self.actions.forward)
+    acting = forward | (in_grid & (occupant < 0) & np.isin(
+        actions, [self.actions.pickup, self.actions.drop, self.actions.toggle]))
+    terminal = np.zeros(self.n_agents, dtype=bool)
+    for a in np.flatnonzero(forward & (occupant < 0)):
+      cell = self.grid.get(*front_pos[a])
+      if cell is not None and not cell.can_overlap():
+        acting[a] = forward[a] = False
+      elif cell is not None and cell.type in ('goal', 'lava'):
+        terminal[a] = True
+
+    # Resolve the agents acting on the same cell, IDs being in increasing order
+    ids = np.flatnonzero(acting)
+    cells = front_pos[ids, 0] * self.grid.height + front_pos[ids, 1]
+    _, first, inverse, counts = np.unique(
+        cells, return_index=True, return_inverse=True, return_counts=True)
+    blocked = np.zeros(self.n_agents, dtype=bool)
+    if self.simultaneous_moves == 'block':
+      blocked[ids] = counts[inverse.reshape(-1)] > 1
+    else:
+      blocked[ids] = True
+      blocked[ids[first]] = False
+
+    # Number of moves to apply before each move, following the chains of
+    # agents moving into each other's cells
+    moving = forward & ~terminal & ~blocked
+    wave = np.where(moving & (occupant < 0), 0, -1)
+    following = moving & (occupant >= 0)
+    for k in range(1, self.n_agents + 1):
+      leading = following & (wave < 0) & (wave[occupant] == k - 1)
+      if not leading.any():
+        break
+      wave[leading] = k
+    blocked |= following & (wave < 0)
+
+    order = np.where(terminal, self.n_agents + 1, np.where(moving, wave, -1))
+    ids = np.flatnonzero(~blocked)
+    return ids[np.argsort(order[ids], kind='stable')]
+
   def step(self, actions):
     # Maintain backwards compatibility with MiniGrid when there is one agent
     if not isinstance(actions, list) and self.n_agents == 1:
@@ -973,9 +1695,12 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
     rewards = [0] * self.n_agents
 
-    # Randomize order in which agents act for fairness
-    agent_ordering = np.arange(self.n_agents)
-    np.random.shuffle(agent_ordering)
+    if self.simultaneous_moves:
+      agent_ordering = self.resolve_simultaneous_actions(actions)
+    else:
+      # Randomize order in which agents act for fairness
+      agent_ordering = np.arange(self.n_agents)
+      self.np_random.shuffle(agent_ordering)
 
     # Step each agent
     for a in agent_ordering:
@@ -1022,8 +1747,9 @@ class MultiGridEnv(minigrid.MiniGridEnv):
     # Process occluders and visibility
     # Note that this incurs some performance cost
     if not self.see_through_walls:
-      vis_mask = grid.process_vis(
-          agent_pos=(self.agent_view_size // 2, self.agent_view_size - 1))
+      vis_mask = visibility.vis_masks(grid.opaque[np.newaxis])[0]
+      for i, j in zip(*np.nonzero(~vis_mask)):
+        grid.set(i, j, None)
     else:
       vis_mask = np.ones(shape=(grid.width, grid.height), dtype=np.bool)
 
@@ -1038,20 +1764,47 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
     return grid, vis_mask
 
+  def obs_buffer(self, key):
+    """Persistent array holding an entry of the observations in array_obs mode.
+
+    The array is allocated from the matching observation space on first use,
+    and again if the space changes (e.g. when a subclass extends it).
+
+    Args:
+      key: Observation key, one of 'image', 'direction' or 'position'.
+
+    Returns:
+      The array, with the shape and dtype of the observation space.
+    """
+    space = self.observation_space[key]
+    buf = self._obs_buffers.get(key)
+    if buf is None or buf.shape != space.shape or buf.dtype != space.dtype:
+      buf = np.zeros(space.shape, dtype=space.dtype)
+      self._obs_buffers[key] = buf
+    return buf
+
   def gen_obs(self):
-    """Generate the stacked observation for all agents."""
-    images = []
-    dirs = []
-    positions = []
-    for a in range(self.n_agents):
-      if self.fully_observed:
-        image = self.grid.encode()
-        direction = self.agent_dir[a]
-      else:
-        image, direction = self.gen_agent_obs(a)
-      images.append(image)
-      dirs.append(direction)
-      positions.append(self.agent_pos[a])
+    """Generate the stacked observation for all agents.
+
+    When fully observed, the grid is encoded once and every agent gets the
+    same read-only encoding as its image. Code editing an image in place, e.g.
+    obs['image'][i][...] = x in a wrapper, must copy it first, as writing to
+    it raises a ValueError.
+
+    Returns:
+      Dictionary with the observations of the agents.
+    """
+    if self.array_obs:
+      return self.gen_array_obs()
+
+    if self.fully_observed:
+      encoding = self.grid.encode()
+      encoding.flags.writeable = False
+      images = [encoding] * self.n_agents
+    else:
+      images = list(self.cached_agent_views().copy())
+    dirs = list(self.agent_dir)
+    positions = list(self.agent_pos.copy())
 
     # Backwards compatibility: if there is a single agent do not return an array
     if self.minigrid_mode:
@@ -1070,6 +1823,35 @@ class MultiGridEnv(minigrid.MiniGridEnv):
 
     return obs
 
+  def gen_array_obs(self):
+    """Generate the observation for all agents, in the persistent arrays.
+
+    Positions fill the first two columns of the position array, subclasses
+    can write extra information in the remaining ones.
+
+    Returns:
+      Dictionary with the observation arrays, or copies of them if copy_obs.
+    """
+    images = self.obs_buffer('image')
+    if self.fully_observed:
+      self.grid.sync()
+      images.reshape((self.n_agents,) + self.grid.encoding.shape)[:] = (
+          self.grid.encoding)
+    else:
+      views = self.cached_agent_views()
+      images.reshape(views.shape)[:] = views
+    self.obs_buffer('direction')[:] = self.agent_dir
+
+    obs = {'image': images, 'direction': self.obs_buffer('direction')}
+    if self.fully_observed:
+      positions = self.obs_buffer('position')
+      positions.reshape(self.n_agents, -1)[:, :2] = self.agent_pos
+      obs['position'] = positions
+
+    if self.copy_obs:
+      obs = {key: value.copy() for key, value in obs.items()}
+    return obs
+
   def gen_agent_obs(self, agent_id):
     """Generate the agent's view (partially observed, low-resolution encoding).
 
@@ -1079,60 +1861,99 @@ class MultiGridEnv(minigrid.MiniGridEnv):
     Returns:
       3-dimensional partially observed agent-centric view, and int direction
     """
-    grid, vis_mask = self.gen_obs_grid(agent_id)
-
-    # Encode the partially observable view into a numpy array
-    image = grid.encode(vis_mask)
-
+    image = self.gen_agent_views([agent_id])[0]
     return image, self.agent_dir[agent_id]
 
-  def get_obs_render(self, obs, tile_size=minigrid.TILE_PIXELS // 2):
-    """Render an agent observation for visualization."""
+  def gen_agent_views(self, agent_ids, out=None):
+    """Encode the partially observed views of several agents at once.
 
-    grid, vis_mask = Grid.decode(obs)
+    Equivalent to encoding the sub-grid given by gen_obs_grid for each agent,
+    without building intermediate Grid objects.
 
-    # Render the whole grid
-    img = grid.render(
-        tile_size,
-        # agent_pos=self.agent_pos,
-        # agent_dir=self.agent_dir,
-        highlight_mask=vis_mask)
+    Args:
+      agent_ids: IDs of the agents for which to generate the views.
+      out: Optional uint8 array in which to write the views.
 
-    return img
+    Returns:
+      Array of shape (len(agent_ids), agent_view_size, agent_view_size, 3).
+    """
+    agent_ids = list(agent_ids)
+    images, _ = observation.egocentric_views(
+        self.grid,
+        self.agent_pos[agent_ids],
+        self.agent_dir[agent_ids],
+        [encode_obj(self.carrying[a]) for a in agent_ids],
+        self.agent_view_size,
+        see_through_walls=self.see_through_walls,
+        out=out)
+    return images
+
+  def cached_agent_views(self):
+    """Views of all agents, encoding again only those which may have changed.
+
+    The views are kept between calls. A view is encoded again if its agent
+    moved, turned or changed what it carries, or if a dirty cell of the grid
+    is within it. The dirty cells are then cleared, so the views always
+    reflect the grid as of the last call.
 
-  def compute_agent_visibility_mask(self, agent_id):
-    # Mask of which cells to highlight
-    highlight_mask = np.zeros(shape=(self.width, self.height), dtype=np.bool)
-
-    # Compute which cells are visible to the agent
-    _, vis_mask = self.gen_obs_grid(agent_id)
-
-    # Compute the world coordinates of the bottom-left corner
-    # of the agent's view area
-    f_vec = self.dir_vec[agent_id]
-    r_vec = self.right_vec[agent_id]
-    top_left = self.agent_pos[agent_id] + f_vec * (self.agent_view_size-1) - \
-        r_vec * (self.agent_view_size // 2)
-
-    # For each cell in the visibility mask
-    for vis_j in range(0, self.agent_view_size):
-      for vis_i in range(0, self.agent_view_size):
-        # If this cell is not visible, don't highlight it
-        if not vis_mask[vis_i, vis_j]:
-          continue
+    Returns:
+      Read-only (n_agents, agent_view_size, agent_view_size, 3) array, which
+      the next call updates in place.
+    """
+    grid = self.grid
+    grid.sync()
+    agent_pos = self._agent_pos.tolist()
+    agent_dir = self._agent_dir.tolist()
+    carried = [encode_obj(obj) for obj in self.carrying]
+    cache = self._views
+    if cache is None or cache[0] is not grid:
+      views = self.gen_agent_views(range(self.n_agents))
+    else:
+      _, views, prev_pos, prev_dir, prev_carried = cache
+      stale = [agent_pos[a] != prev_pos[a] or agent_dir[a] != prev_dir[a] or
+               carried[a] != prev_carried[a] for a in range(self.n_agents)]
+
+      # Agents which didn't change only need a new view if it has dirty cells
+      unchanged = [a for a in range(self.n_agents) if not stale[a]]
+      if unchanged and grid.dirty.any():
+        cells = np.argwhere(grid.dirty).tolist()
+        size = self.agent_view_size
+        offsets = observation.top_offsets(size)
+        for a in unchanged:
+          x = agent_pos[a][0] + offsets[agent_dir[a]][0]
+          y = agent_pos[a][1] + offsets[agent_dir[a]][1]
+          stale[a] = any(x <= i < x + size and y <= j < y + size
+                         for i, j in cells)
+
+      agent_ids = [a for a in range(self.n_agents) if stale[a]]
+      if agent_ids:
+        views[agent_ids] = self.gen_agent_views(agent_ids)
+    grid.dirty.fill(False)
+    self._views = (grid, views, agent_pos, agent_dir, carried)
+    views = views.view()
+    views.flags.writeable = False
+    return views
 
-        # Compute the world coordinates of this cell
-        abs_i, abs_j = top_left - (f_vec * vis_j) + (r_vec * vis_i)
+  def get_obs_render(self, obs, tile_size=minigrid.TILE_PIXELS // 2):
+    """Render an agent observation for visualization."""
+    return Grid.render_observations(obs, tile_size)
 
-        if abs_i < 0 or abs_i >= self.width:
-          continue
-        if abs_j < 0 or abs_j >= self.height:
-          continue
+  def get_obs_render_batch(self, observations,
+                           tile_size=minigrid.TILE_PIXELS // 2):
+    """Render a (batch, view_size, view_size, 3) array of agent observations.
 
-        # Mark this cell to be highlighted
-        highlight_mask[abs_i, abs_j] = True
+    Args:
+      observations: Encoded observations, e.g. from a replay buffer.
+      tile_size: Tile size in pixels.
 
-    return highlight_mask
+    Returns:
+      (batch, view_size * tile_size, view_size * tile_size, 3) uint8 images.
+    """
+    return Grid.render_observations(observations, tile_size)
+
+  def compute_agent_visibility_mask(self, agent_id):
+    """Mask of the cells of the world visible to the agent."""
+    return self.visibility_masks()[agent_id].copy()
 
   def render(self,
              mode='human',
@@ -1152,10 +1973,10 @@ class MultiGridEnv(minigrid.MiniGridEnv):
       self.window.show(block=False)
 
     if highlight:
-      highlight_mask = []
-      for a in range(self.n_agents):
-        if self.agent_pos[a] is not None:
-          highlight_mask.append(self.compute_agent_visibility_mask(a))
+      masks = self.visibility_masks()
+      highlight_mask = [
+          masks[a] for a in range(self.n_agents) if self.agent_is_placed(a)
+      ]
     else:
       highlight_mask = None
 
@@ -0,0 +1,117 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Timers and counters for the phases of an env, see enable_profiling.
+
+Phases are functions wrapped by a Profiler, which accumulates the number of
+calls, the total time spent in each phase and its self time, i.e. excluding
+the time spent in nested phases. Optionally, each call is also kept to be
+exported as a Chrome trace, viewable in chrome://tracing or Perfetto.
+"""
+import collections
+import functools
+import json
+import os
+import time
+
+PhaseStats = collections.namedtuple('PhaseStats',
+                                    ['calls', 'total', 'self_time'])
+
+
+class Profiler(object):
+  """Accumulates the time spent in the phases it wraps."""
+
+  def __init__(self, trace=False):
+    """Constructor.
+
+    Args:
+      trace: If True, keep every call to export them with chrome_trace.
+    """
+    self.trace = trace
+    self.calls = collections.Counter()
+    self.totals = collections.defaultdict(float)
+    self.self_totals = collections.defaultdict(float)
+    self.counters = collections.Counter()
+    self.events = []
+    self._children = []
+    self._origin = time.perf_counter()
+
+  def wrap(self, name, fn):
+    """Wrap a function so that its calls are timed as the phase name."""
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+      self._children.append(0.)
+      start = time.perf_counter()
+      try:
+        return fn(*args, **kwargs)
+      finally:
+        elapsed = time.perf_counter() - start
+        children = self._children.pop()
+        if self._children:
+          self._children[-1] += elapsed
+        self.calls[name] += 1
+        self.totals[name] += elapsed
+        self.self_totals[name] += elapsed - children
+        if self.trace:
+          self.events.append((name, start, elapsed))
+
+    return timed
+
+  def count(self, name, n=1):
+    """Add n to a counter."""
+    self.counters[name] += n
+
+  def clear(self):
+    """Forget all timings, counters and trace events."""
+    self.calls.clear()
+    self.totals.clear()
+    self.self_totals.clear()
+    self.counters.clear()
+    self.events = []
+
+  def stats(self):
+    """Get the PhaseStats of each phase, by decreasing total time."""
+    names = sorted(self.totals, key=self.totals.get, reverse=True)
+    return collections.OrderedDict(
+        (name, PhaseStats(self.calls[name], self.totals[name],
+                          self.self_totals[name]))
+        for name in names)
+
+  def report(self):
+    """Format the stats and counters as a table."""
+    lines = ['%-24s %10s %12s %12s %10s' %
+             ('phase', 'calls', 'total (s)', 'self (s)', 'us/call')]
+    for name, stats in self.stats().items():
+      lines.append('%-24s %10d %12.4f %12.4f %10.1f' % (
+          name, stats.calls, stats.total, stats.self_time,
+          1e6 * stats.total / stats.calls))
+    for name, value in sorted(self.counters.items()):
+      lines.append('%-24s %10d' % (name, value))
+    return '\n'.join(lines)
+
+  def chrome_trace(self):
+    """Get the trace events in the Chrome trace event format."""
+    pid = os.getpid()
+    events = [{'name': name, 'ph': 'X', 'pid': pid, 'tid': 0,
+               'ts': 1e6 * (start - self._origin), 'dur': 1e6 * elapsed}
+              for name, start, elapsed in self.events]
+    return {'traceEvents': events, 'displayTimeUnit': 'ms',
+            'otherData': {'counters': dict(self.counters)}}
+
+  def export_chrome_trace(self, path):
+    """Write the trace events to a Chrome trace JSON file."""
+    with open(path, 'w') as f:
+      json.dump(self.chrome_trace(), f)
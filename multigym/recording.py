@@ -0,0 +1,245 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compact binary recording of MultiGridEnv episodes, and their replay.
+
+An episode is recorded as the seed the env was reset with, a snapshot of its
+initial grid and agents, and the actions of each step. All the randomness of
+MultiGridEnv is drawn from the env RNG, so this is enough to replay it: the
+states and observations of the episode are rebuilt by stepping the env again.
+
+Episodes are appended to a data file as they end, and an index file next to it
+holds one INDEX_DTYPE entry per episode. Each record is a _HEADER, followed by
+the initial encoding of the grid (width, height, 3) as uint8, the initial
+agent positions (n_agents, 2) as int16 and directions (n_agents,) as uint8, and
+finally the actions (n_steps, n_agents) as uint8.
+"""
+import collections
+import struct
+
+import gym
+import numpy as np
+
+_MAGIC = b'MGEP'
+
+# Magic, seed, number of steps, number of agents, width and height
+_HEADER = struct.Struct('<4sqIHHH')
+
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('seed', '<i8'),
+                        ('n_steps', '<u4')])
+
+Episode = collections.namedtuple(
+    'Episode', ['seed', 'encoding', 'agent_pos', 'agent_dir', 'actions'])
+
+
+def _initial_state(env):
+  """Encoding of the grid and agent kinematics recorded with an episode."""
+  return (env.grid.encode(), np.array(env.agent_pos, dtype=np.int16),
+          np.array(env.agent_dir, dtype=np.uint8))
+
+
+class EpisodeRecorder(gym.Wrapper):
+  """Records the episodes of a MultiGridEnv in an append-only binary file.
+
+  The env is seeded before each reset, with seeds drawn from the seed of the
+  recorder. An episode is written when the next one starts, or when the
+  recorder is closed.
+  """
+
+  def __init__(self, env, path, seed=None):
+    """Constructor.
+
+    Args:
+      env: MultiGridEnv to record. Envs with fixed_environment set must have
+        been created with a seed, since they reseed themselves on reset.
+      path: Path of the data file, the index is written to path + '.idx'.
+        Episodes are appended to existing files.
+      seed: Seed of the episode seeds.
+    """
+    super().__init__(env)
+    self.path = path
+    self._seed_rng = np.random.default_rng(seed)
+    self._data = open(path, 'ab')
+    self._index = open(path + '.idx', 'ab')
+    self._seed = None
+    self._initial = None
+    self._actions = []
+
+  def reset(self, **kwargs):
+    self._write_episode()
+    self._seed = int(self._seed_rng.integers(2**63))
+    self.env.seed(self._seed)
+    obs = self.env.reset(**kwargs)
+    self._initial = _initial_state(self.env.unwrapped)
+    return obs
+
+  def step(self, action):
+    assert self._seed is not None, 'reset must be called before step'
+    actions = np.asarray(action).reshape(-1)
+    assert np.all((actions >= 0) & (actions < 256)), actions
+    self._actions.append(actions.astype(np.uint8))
+    return self.env.step(action)
+
+  def close(self):
+    self._write_episode()
+    self._data.close()
+    self._index.close()
+    return super().close()
+
+  def _write_episode(self):
+    """Append the current episode to the data file and the index."""
+    if self._seed is None:
+      return
+    encoding, agent_pos, agent_dir = self._initial
+    n_agents = len(agent_dir)
+    actions = np.array(self._actions, dtype=np.uint8).reshape(-1, n_agents)
+    width, height = encoding.shape[:2]
+
+    entry = np.array(
+        [(self._data.tell(), self._seed, len(actions))], dtype=INDEX_DTYPE)
+    self._data.write(_HEADER.pack(_MAGIC, self._seed, len(actions), n_agents,
+                                  width, height))
+    for array in [encoding, agent_pos, agent_dir, actions]:
+      self._data.write(np.ascontiguousarray(array).tobytes())
+    self._data.flush()
+    self._index.write(entry.tobytes())
+    self._index.flush()
+
+    self._seed = None
+    self._initial = None
+    self._actions = []
+
+
+class EpisodeReplayer(object):
+  """Rebuilds the states and observations of recorded episodes on demand.
+
+  The env is stepped from the nearest earlier checkpoint of the episode, which
+  are saved with get_state every checkpoint_interval steps of the episode
+  being replayed. Moving forward in an episode continues from the current
+  state, so reading an episode in order steps each action once.
+  """
+
+  def __init__(self, path, env_fn, checkpoint_interval=64):
+    """Constructor.
+
+    Args:
+      path: Path of the data file written by EpisodeRecorder.
+      env_fn: Function creating an env configured as the recorded one.
+      checkpoint_interval: Number of steps between checkpoints.
+    """
+    self.env = env_fn()
+    self.checkpoint_interval = checkpoint_interval
+    self.index = np.fromfile(path + '.idx', dtype=INDEX_DTYPE)
+    self._data = open(path, 'rb')
+    self._loaded = None
+    self._actions = None
+    self._step = None
+    self._checkpoints = {}
+
+  def __len__(self):
+    return len(self.index)
+
+  def close(self):
+    self._data.close()
+    self.env.close()
+
+  def episode(self, i):
+    """Read the recording of an episode.
+
+    Args:
+      i: Index of the episode, in the order they were recorded.
+
+    Returns:
+      An Episode with the seed, initial encoding, agent positions and
+      directions, and the (n_steps, n_agents) array of actions.
+    """
+    self._data.seek(int(self.index[i]['offset']))
+    magic, seed, n_steps, n_agents, width, height = _HEADER.unpack(
+        self._data.read(_HEADER.size))
+    if magic != _MAGIC:
+      raise ValueError('Episode %d is not a valid record' % i)
+
+    def read(shape, dtype):
+      size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+      return np.frombuffer(self._data.read(size), dtype=dtype).reshape(shape)
+
+    return Episode(
+        seed=seed,
+        encoding=read((width, height, 3), np.uint8),
+        agent_pos=read((n_agents, 2), np.int16),
+        agent_dir=read((n_agents,), np.uint8),
+        actions=read((n_steps, n_agents), np.uint8))
+
+  def state(self, i, step):
+    """State of an episode after some steps, see MultiGridEnv.get_state."""
+    self.seek(i, step)
+    return self.env.get_state()
+
+  def observation(self, i, step):
+    """Observation of the agents after some steps of an episode."""
+    self.seek(i, step)
+    return self.env.gen_obs()
+
+  def seek(self, i, step):
+    """Bring the env to the state of an episode after some steps.
+
+    Args:
+      i: Index of the episode.
+      step: Number of steps taken, between 0 for the initial state and the
+        number of steps of the episode.
+
+    Raises:
+      IndexError: If the episode doesn't have that many steps.
+      ValueError: If the env doesn't generate the recorded initial state,
+        e.g. because it isn't configured as the recorded one.
+    """
+    n_steps = int(self.index[i]['n_steps'])
+    if not 0 <= step <= n_steps:
+      raise IndexError('Step %d is out of episode %d of %d steps' %
+                       (step, i, n_steps))
+
+    if self._loaded != i:
+      self._load(i)
+
+    start = max(s for s in self._checkpoints if s <= step)
+    if not start <= self._step <= step:
+      self.env.set_state(self._checkpoints[start])
+      self._step = start
+
+    minigrid_mode = self.env.unwrapped.minigrid_mode
+    while self._step < step:
+      actions = [int(a) for a in self._actions[self._step]]
+      self.env.step(actions[0] if minigrid_mode else actions)
+      self._step += 1
+      if (self._step % self.checkpoint_interval == 0 and
+          self._step not in self._checkpoints):
+        self._checkpoints[self._step] = self.env.get_state()
+
+  def _load(self, i):
+    """Reset the env to the initial state of an episode."""
+    episode = self.episode(i)
+    self.env.seed(episode.seed)
+    self.env.reset()
+    encoding, agent_pos, agent_dir = _initial_state(self.env.unwrapped)
+    if not (np.array_equal(encoding, episode.encoding) and
+            np.array_equal(agent_pos, episode.agent_pos) and
+            np.array_equal(agent_dir, episode.agent_dir)):
+      raise ValueError(
+          'The env does not generate the initial state of episode %d' % i)
+
+    self._loaded = i
+    self._actions = episode.actions
+    self._step = 0
+    self._checkpoints = {0: self.env.get_state()}
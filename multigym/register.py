@@ -16,20 +16,29 @@
 """Register MultiGrid environments with OpenAI gym."""
 
 import gym
-from gym.envs.registration import register as gym_register
+from gym.envs.registration import EnvSpec
 
 env_list = []
 
 
 def register(env_id, entry_point, reward_threshold=0.95):
-  """Register a new environment with OpenAI gym based on id."""
+  """Register a new environment with OpenAI gym based on id.
+
+  The spec is added to the registry directly: gym.register looks for similar
+  names every time a new name is registered, which is slow with many envs.
+
+  Args:
+    env_id: ID of the env, starting with MultiGrid-. Registering it again
+      replaces the previous spec.
+    entry_point: Class of the env, or its 'module:name' string, imported on
+      the first gym.make.
+    reward_threshold: Reward at which the env is considered solved.
+  """
   assert env_id.startswith("MultiGrid-")
-  if env_id in env_list:
-    del gym.envs.registry.env_specs[id]
-  else:
+  if env_id not in env_list:
     # Add the environment to the set
-    env_list.append(id)
+    env_list.append(env_id)
 
   # Register the environment with OpenAI gym
-  gym_register(
-      id=env_id, entry_point=entry_point, reward_threshold=reward_threshold)
+  gym.envs.registry.env_specs[env_id] = EnvSpec(
+      env_id, entry_point=entry_point, reward_threshold=reward_threshold)
@@ -0,0 +1,283 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Vector environment running MultiGridEnv instances in worker processes.
+
+Intended for the environments whose logic can't be vectorized (see
+vector_env.VectorMultiGridEnv for those that can). Each worker runs a group of
+environments, and writes their observations, rewards and dones straight into
+shared memory blocks allocated by the parent process, so only actions and info
+dicts go through pipes.
+"""
+import math
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import sys
+import traceback
+
+import gym
+from gym.vector.utils import CloudpickleWrapper
+import numpy as np
+
+
+def _buffer_specs(env, num_envs):
+  """Shapes and dtypes of the shared buffers for a batch of environments."""
+  specs = {}
+  for key, space in env.observation_space.spaces.items():
+    specs['obs_' + key] = ((num_envs,) + space.shape, space.dtype)
+  reward_shape = () if env.minigrid_mode else (env.n_agents,)
+  specs['rewards'] = ((num_envs,) + reward_shape, np.dtype(np.float64))
+  specs['dones'] = ((num_envs,), np.dtype(bool))
+  return specs
+
+
+def _attach_buffers(names, specs):
+  """Map shared memory blocks to numpy arrays."""
+  blocks, buffers = {}, {}
+  for key, (shape, dtype) in specs.items():
+    blocks[key] = shared_memory.SharedMemory(name=names[key])
+    buffers[key] = np.ndarray(shape, dtype=dtype, buffer=blocks[key].buf)
+  return blocks, buffers
+
+
+def _write_obs(buffers, index, obs):
+  for key, buf in buffers.items():
+    if key.startswith('obs_'):
+      buf[index] = obs[key[len('obs_'):]]
+
+
+def _worker(env_fns, start, pipe, parent_pipe, names, specs):
+  """Run a group of environments, writing their outputs in shared memory."""
+  parent_pipe.close()
+  blocks, buffers = _attach_buffers(names, specs)
+  rewards, dones = buffers['rewards'], buffers['dones']
+  envs = []
+  try:
+    envs = [env_fn() for env_fn in env_fns.fn]
+    while True:
+      command, data = pipe.recv()
+      if command == 'reset':
+        for i, env in enumerate(envs):
+          _write_obs(buffers, start + i, env.reset())
+        pipe.send((None, True))
+      elif command == 'step':
+        infos = []
+        for i, env in enumerate(envs):
+          obs, reward, done, info = env.step(data[i])
+          if done:
+            obs = env.reset()
+          _write_obs(buffers, start + i, obs)
+          rewards[start + i] = np.reshape(reward, rewards.shape[1:])
+          dones[start + i] = done
+          infos.append(info)
+        pipe.send((infos, True))
+      elif command == 'seed':
+        for env, seed in zip(envs, data):
+          env.seed(seed)
+        pipe.send((None, True))
+      elif command == 'close':
+        pipe.send((None, True))
+        break
+      else:
+        raise RuntimeError('Received unknown command `%s`' % command)
+  except (KeyboardInterrupt, Exception):  # pylint: disable=broad-except
+    pipe.send((''.join(traceback.format_exception(*sys.exc_info())), False))
+  finally:
+    for env in envs:
+      env.close()
+    for block in blocks.values():
+      block.close()
+
+
+class SubprocVectorEnv(gym.vector.VectorEnv):
+  """Steps MultiGridEnv instances in parallel, in groups per worker process.
+
+  Observations are stacked along a first dimension of size num_envs, as are
+  rewards and dones. Finished environments are reset automatically, in which
+  case the returned observation is the first observation of the new episode.
+  """
+
+  def __init__(self, env_fns, envs_per_worker=1, copy=True, context=None):
+    """Constructor.
+
+    Args:
+      env_fns: List of functions creating the environments, which must all
+        have the same observation and action spaces.
+      envs_per_worker: Number of environments run by each worker process.
+      copy: If True, reset and step return copies of the observations.
+        Otherwise, they return views of the shared buffers, which are
+        overwritten by the next call.
+      context: Start method of the worker processes, see
+        multiprocessing.get_context. Uses the default method if None.
+    """
+    dummy_env = env_fns[0]()
+    super().__init__(len(env_fns), dummy_env.observation_space,
+                     dummy_env.action_space)
+    specs = _buffer_specs(dummy_env, self.num_envs)
+    dummy_env.close()
+
+    self.copy = copy
+    self.envs_per_worker = envs_per_worker
+    self.num_workers = int(math.ceil(self.num_envs / envs_per_worker))
+    self.slices = [
+        slice(w * envs_per_worker, min((w + 1) * envs_per_worker,
+                                       self.num_envs))
+        for w in range(self.num_workers)]
+
+    # Allocate the shared buffers
+    self._blocks = {}
+    for key, (shape, dtype) in specs.items():
+      size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+      self._blocks[key] = shared_memory.SharedMemory(create=True, size=size)
+    names = {key: block.name for key, block in self._blocks.items()}
+    self.buffers = {
+        key: np.ndarray(shape, dtype=dtype, buffer=self._blocks[key].buf)
+        for key, (shape, dtype) in specs.items()}
+
+    ctx = mp.get_context(context)
+    self.parent_pipes, self.processes = [], []
+    for worker_slice in self.slices:
+      parent_pipe, child_pipe = ctx.Pipe()
+      process = ctx.Process(
+          target=_worker,
+          name='SubprocVectorEnv-Worker-%d' % worker_slice.start,
+          args=(CloudpickleWrapper(env_fns[worker_slice]),
+                worker_slice.start, child_pipe, parent_pipe, names, specs),
+          daemon=True)
+      process.start()
+      child_pipe.close()
+      self.parent_pipes.append(parent_pipe)
+      self.processes.append(process)
+
+    self._waiting = None
+
+  def seed(self, seeds=None):
+    """Seed the environments, see gym.vector.VectorEnv.seed."""
+    self._assert_is_running()
+    if seeds is None:
+      seeds = [None] * self.num_envs
+    elif isinstance(seeds, int):
+      seeds = [seeds + i for i in range(self.num_envs)]
+    assert len(seeds) == self.num_envs
+    for pipe, worker_slice in zip(self.parent_pipes, self.slices):
+      pipe.send(('seed', seeds[worker_slice]))
+    self._receive()
+
+  def reset_async(self, seed=None, return_info=False, options=None,
+                  **kwargs):
+    """Start resetting the environments, seeding them first if seed is set."""
+    del return_info, options, kwargs  # Only used by reset_wait
+    if seed is not None:
+      self.seed(seed)
+    self._assert_is_running()
+    for pipe in self.parent_pipes:
+      pipe.send(('reset', None))
+    self._waiting = 'reset'
+
+  def reset_wait(self, timeout=None,  # pylint: disable=arguments-differ
+                 seed=None, return_info=False, options=None, **kwargs):
+    """Wait for the reset, returning the observations and optionally infos.
+
+    MultiGridEnv.reset doesn't return infos, so they are empty dicts.
+    """
+    del seed, options, kwargs  # Handled by reset_async
+    self._assert_waiting('reset')
+    self._receive(timeout)
+    if return_info:
+      return self._get_obs(), [{} for _ in range(self.num_envs)]
+    return self._get_obs()
+
+  def step_async(self, actions):
+    self._assert_is_running()
+    # Environments expect plain lists (or ints in minigrid mode) of actions
+    actions = [np.asarray(action).tolist() for action in actions]
+    assert len(actions) == self.num_envs
+    for pipe, worker_slice in zip(self.parent_pipes, self.slices):
+      pipe.send(('step', actions[worker_slice]))
+    self._waiting = 'step'
+
+  def step_wait(self, timeout=None):  # pylint: disable=arguments-differ
+    self._assert_waiting('step')
+    results = self._receive(timeout)
+    infos = [info for worker_infos in results for info in worker_infos]
+    rewards = self.buffers['rewards']
+    dones = self.buffers['dones']
+    if self.copy:
+      rewards, dones = rewards.copy(), dones.copy()
+    return self._get_obs(), rewards, dones, infos
+
+  def close_extras(self, timeout=None,  # pylint: disable=arguments-differ
+                   terminate=False):
+    try:
+      if self._waiting is not None and not terminate:
+        self._receive(timeout)
+      for pipe, process in zip(self.parent_pipes, self.processes):
+        if terminate or not process.is_alive():
+          continue
+        pipe.send(('close', None))
+        pipe.recv()
+    except (EOFError, BrokenPipeError, ConnectionResetError):
+      pass
+    finally:
+      for pipe, process in zip(self.parent_pipes, self.processes):
+        if terminate and process.is_alive():
+          process.terminate()
+        process.join()
+        pipe.close()
+      self.buffers = {}
+      for block in self._blocks.values():
+        block.close()
+        block.unlink()
+      self._blocks = {}
+
+  def _get_obs(self):
+    obs = {}
+    for key, buf in self.buffers.items():
+      if key.startswith('obs_'):
+        obs[key[len('obs_'):]] = buf.copy() if self.copy else buf
+    return obs
+
+  def _receive(self, timeout=None):
+    """Wait for all workers to reply, and raise any error they hit."""
+    self._waiting = None
+    results, errors = [], []
+    for w, pipe in enumerate(self.parent_pipes):
+      if timeout is not None and not pipe.poll(timeout):
+        raise mp.TimeoutError('Worker %d did not reply in time' % w)
+      result, success = pipe.recv()
+      if success:
+        results.append(result)
+      else:
+        errors.append('Worker %d failed:\n%s' % (w, result))
+    if errors:
+      self.close(terminate=True)
+      raise RuntimeError('\n'.join(errors))
+    return results
+
+  def _assert_is_running(self):
+    if self.closed:
+      raise gym.error.ClosedEnvironmentError(
+          'Trying to operate on `%s`, after a call to `close()`.' %
+          type(self).__name__)
+    if self._waiting is not None:
+      raise gym.error.AlreadyPendingCallError(
+          'Calling a method while waiting for a pending call to `%s` to '
+          'complete.' % self._waiting, self._waiting)
+
+  def _assert_waiting(self, command):
+    if self._waiting != command:
+      raise gym.error.NoAsyncCallError(
+          'Calling `%s_wait` without any prior call to `%s_async`.' %
+          (command, command), command)
@@ -0,0 +1,75 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Lint as: python3
+"""Checks that the agent occupancy map and kinematics follow the agents."""
+import gym_minigrid.minigrid as minigrid
+import numpy as np
+import pytest
+from multigym.envs import doorkey
+from multigym.envs import empty
+from multigym.envs import gather
+from multigym.envs import tasklist
+
+
+def expected_map(env):
+  agent_map = np.full((env.grid.width, env.grid.height), -1)
+  for a, pos in enumerate(env.agent_pos):
+    if pos is not None:
+      agent_map[pos[0], pos[1]] = a
+  return agent_map
+
+
+def check_kinematics(env):
+  for a in range(env.n_agents):
+    dx, dy = minigrid.DIR_TO_VEC[env.agent_dir[a]]
+    assert np.array_equal(env.dir_vec[a], (dx, dy))
+    assert np.array_equal(env.right_vec[a], (-dy, dx))
+    assert np.array_equal(env.front_pos[a], env.agent_pos[a] + (dx, dy))
+    assert env.grid.get(*env.agent_pos[a]).dir == env.agent_dir[a]
+
+
+def check_env(env, n_steps=200):
+  rng = np.random.RandomState(0)
+  env.reset()
+  for _ in range(n_steps):
+    assert np.array_equal(env.agent_map, expected_map(env))
+    check_kinematics(env)
+    actions = [int(a) for a in rng.randint(len(env.actions), size=env.n_agents)]
+    _, _, done, _ = env.step(actions)
+    if done:
+      env.reset()
+
+
+def test_agent_map():
+  check_env(doorkey.DoorKeyEnv(size=8, n_agents=3))
+  check_env(empty.EmptyEnv8x8())
+  check_env(empty.EmptyRandomEnv8x8())
+  check_env(gather.GatherEnv(n_agents=3))
+  check_env(tasklist.TaskListEnv8x8())
+
+
+def test_kinematics_are_read_only():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3)
+  for array in [env.agent_pos, env.agent_dir, env.dir_vec, env.right_vec,
+                env.front_pos]:
+    with pytest.raises(ValueError):
+      array[0] = 1
+
+
+if __name__ == '__main__':
+  test_agent_map()
+  test_kinematics_are_read_only()
@@ -0,0 +1,106 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Lint as: python3
+"""Checks array observations against the default per-agent lists."""
+import numpy as np
+import pytest
+from multigym.envs import coingame
+from multigym.envs import doorkey
+from multigym.envs import gather
+from multigym.envs import tasklist
+
+
+def make_env(env_fn, **kwargs):
+  env = env_fn(**kwargs)
+  env.seed(0)
+  return env
+
+
+def check_env(env_fn, n_steps=50, compare_lists=True):
+  envs = [make_env(env_fn, array_obs=True),
+          make_env(env_fn, array_obs=True, copy_obs=False)]
+  if compare_lists:
+    envs.append(make_env(env_fn))
+  spaces = envs[0].observation_space.spaces
+
+  all_obs = []
+  for env in envs:
+    all_obs.append(env.reset())
+
+  rng = np.random.RandomState(0)
+  for _ in range(n_steps):
+    array_obs, view_obs = all_obs[:2]
+    for key, space in spaces.items():
+      assert array_obs[key].shape == space.shape
+      assert array_obs[key].dtype == space.dtype
+      assert np.array_equal(view_obs[key], array_obs[key])
+      assert view_obs[key] is envs[1].obs_buffer(key)
+      if compare_lists:
+        expected = np.asarray(all_obs[2][key]).reshape(space.shape)
+        assert np.array_equal(array_obs[key], expected)
+
+    actions = [int(a) for a in rng.randint(len(envs[0].actions),
+                                           size=envs[0].n_agents)]
+    if envs[0].minigrid_mode:
+      actions = actions[0]
+    all_obs = []
+    for env in envs:
+      all_obs.append(env.step(actions)[0])
+
+
+def test_partially_observed():
+  check_env(lambda **kwargs: doorkey.DoorKeyEnv(size=8, n_agents=3, **kwargs))
+
+
+def test_extra_info():
+  check_env(tasklist.TaskListEnv8x8)
+  check_env(coingame.EmptyCoinGameEnv10x10)
+
+
+def test_minigrid_mode():
+  # The list observations of these environments fail in minigrid mode
+  check_env(tasklist.TaskListEnv8x8Minigrid, compare_lists=False)
+  check_env(coingame.EmptyCoinGameEnv10x10Minigrid, compare_lists=False)
+
+
+def test_fully_observed_images_are_shared():
+  env = gather.RandomGatherEnv8x8()
+  env.seed(0)
+  images = env.reset()['image']
+  assert len(images) == env.n_agents
+  assert images[0] is images[1]
+  assert all(image is images[0] for image in images)
+  assert not images[0].flags.writeable
+  # Editing an image in place requires copying it first
+  with pytest.raises(ValueError):
+    images[1][0, 0] = 0
+  expected = env.grid.encode()
+  np.testing.assert_array_equal(images[0], expected)
+
+  # The images are not views of the grid, which keeps changing
+  rng = np.random.RandomState(0)
+  for _ in range(10):
+    env.step([int(a) for a in rng.randint(3, size=env.n_agents)])
+  assert not np.array_equal(env.grid.encode(), expected)
+  np.testing.assert_array_equal(images[0], expected)
+
+
+if __name__ == '__main__':
+  test_partially_observed()
+  test_extra_info()
+  test_minigrid_mode()
+  test_fully_observed_images_are_shared()
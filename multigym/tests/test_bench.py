@@ -0,0 +1,91 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+"""Checks the benchmark results and their comparison to a baseline."""
+import json
+import os
+import tempfile
+from multigym import bench
+
+
+def test_env_ids():
+  ids = bench.env_ids(['maze'])
+  assert 'MultiGrid-Maze-v0' in ids
+  assert all(bench.env_family(env_id) == 'maze' for env_id in ids)
+  assert len(bench.env_ids()) > len(ids)
+
+
+def test_run_filters_by_agent_count():
+  ids = ['MultiGrid-Empty-5x5-Single-v0', 'MultiGrid-Empty-8x8-v0']
+  results = bench.run(ids, n_agents=[1], n_resets=2, n_steps=10, n_obs=2,
+                      n_renders=1, n_memory_steps=5)
+  assert list(results) == ids[:1]
+  result = results[ids[0]]
+  assert result['family'] == 'empty' and result['n_agents'] == 1
+  for metric in bench.METRICS:
+    assert result[metric] > 0
+
+
+def test_compare():
+  baseline = {'a': {'reset_ms': 1.0, 'steps_per_sec': 1000.0},
+              'b': {'reset_ms': 1.0}}
+  results = {'a': {'reset_ms': 1.05, 'steps_per_sec': 500.0},
+             'b': {'reset_ms': 2.0},
+             'c': {'reset_ms': 5.0}}
+  regressions = bench.compare(results, baseline, tolerance=0.1)
+  assert [(r.env_id, r.metric) for r in regressions] == [
+      ('a', 'steps_per_sec'), ('b', 'reset_ms')]
+  assert regressions[0].change == 1.0
+  assert not bench.compare(results, baseline, tolerance=1.5)
+
+
+def test_import_time():
+  assert bench.import_time('json', n_runs=2) > 0
+
+
+def test_compare_import_time():
+  baseline = {bench.IMPORT_ID: {'import_ms': 100.0}}
+  results = {bench.IMPORT_ID: {'import_ms': 150.0}}
+  regressions = bench.compare(results, baseline, tolerance=0.1)
+  assert [(r.env_id, r.metric) for r in regressions] == [
+      (bench.IMPORT_ID, 'import_ms')]
+
+
+def test_main():
+  with tempfile.TemporaryDirectory() as tmp:
+    output = os.path.join(tmp, 'results.json')
+    argv = ['--env_id', 'MultiGrid-Empty-5x5-Single-v0', '--n_resets', '2',
+            '--n_steps', '10', '--n_obs', '2', '--n_renders', '1']
+    assert bench.main(bench.parse_args(argv + ['--output', output])) == 0
+    with open(output) as f:
+      results = json.load(f)
+    assert results['config']['n_steps'] == 10
+    assert 'MultiGrid-Empty-5x5-Single-v0' in results['results']
+
+    # Regressions beyond the tolerance fail the run
+    results['results']['MultiGrid-Empty-5x5-Single-v0']['steps_per_sec'] *= 100
+    with open(output, 'w') as f:
+      json.dump(results, f)
+    assert bench.main(bench.parse_args(argv + ['--baseline', output])) == 1
+
+
+if __name__ == '__main__':
+  test_env_ids()
+  test_run_filters_by_agent_count()
+  test_compare()
+  test_import_time()
+  test_compare_import_time()
+  test_main()
@@ -0,0 +1,91 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+
+# Lint as: python3
+"""Checks collected datasets against stepping the envs again."""
+import os
+import tempfile
+import gym
+import numpy as np
+from multigym import dataset
+
+
+def check_shards(data):
+  """Replay the actions of each shard, comparing the observations."""
+  for i, shard in enumerate(data.manifest['shards']):
+    arrays = data.shard(i)
+    env = gym.make(data.manifest['env_id']).unwrapped
+    env.seed(shard['seed'])
+    obs = env.reset()
+    for t in range(shard['n_transitions']):
+      for key in data.observation_keys:
+        np.testing.assert_array_equal(
+            arrays[key][t], np.asarray(obs[key]).reshape(arrays[key].shape[1:]))
+      action = arrays['action'][t]
+      obs, reward, done, _ = env.step(
+          action.tolist() if action.ndim else int(action))
+      np.testing.assert_array_equal(arrays['reward'][t], reward)
+      assert arrays['done'][t] == done
+      if done:
+        obs = env.reset()
+
+
+def test_collect():
+  with tempfile.TemporaryDirectory() as tmp:
+    for env_id in ['MultiGrid-DoorKey-6x6-v0',
+                   'MultiGrid-Empty-Random-6x6-Minigrid-v0']:
+      path = os.path.join(tmp, env_id)
+      data = dataset.collect(env_id, path, n_transitions=250, shard_size=100,
+                             processes=0)
+      assert len(data) == 250
+      assert [s['n_transitions'] for s in data.manifest['shards']] == [
+          100, 100, 50]
+      check_shards(data)
+
+      # Worker processes collect the same shards
+      pooled = dataset.collect(env_id, path + '-pool', n_transitions=250,
+                               shard_size=100, processes=2)
+      for i in range(3):
+        for key, array in data.shard(i).items():
+          np.testing.assert_array_equal(pooled.shard(i)[key], array)
+
+
+def test_transitions():
+  with tempfile.TemporaryDirectory() as tmp:
+    data = dataset.collect('MultiGrid-DoorKey-6x6-v0',
+                           os.path.join(tmp, 'data'), n_transitions=250,
+                           shard_size=100, processes=0)
+    indices = np.array([[0, 99], [100, 249]])
+    batch = data.transitions(indices)
+    assert batch['image'].shape == (2, 2) + data.fields['image'][0]
+    for (i, j), index in np.ndenumerate(indices):
+      shard, row = divmod(index, 100)
+      arrays = data.shard(shard)
+      for key in ['image', 'direction', 'action', 'reward', 'done']:
+        np.testing.assert_array_equal(batch[key][i, j], arrays[key][row])
+      np.testing.assert_array_equal(batch['next_image'][i, j],
+                                    arrays['image'][row + 1])
+
+    batch = data.sample(32, rng=0)
+    assert batch['action'].shape == (32,) + data.fields['action'][0]
+    np.testing.assert_array_equal(data.sample(32, rng=0)['image'],
+                                  batch['image'])
+
+
+if __name__ == '__main__':
+  test_collect()
+  test_transitions()
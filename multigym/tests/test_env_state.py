@@ -0,0 +1,93 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Lint as: python3
+"""Checks that restored states replay the same trajectories."""
+import numpy as np
+from multigym.ctf import captureflag
+from multigym.envs import coingame
+from multigym.envs import doorkey
+from multigym.envs import gather
+from multigym.envs import stag_hunt
+from multigym.envs import tasklist
+
+
+def rollout(env, seed, n_steps=30):
+  rng = np.random.RandomState(seed)
+  trajectory = []
+  for _ in range(n_steps):
+    actions = [int(a) for a in rng.randint(len(env.actions), size=env.n_agents)]
+    obs, rewards, done, _ = env.step(actions)
+    trajectory.append((str(env), np.asarray(obs['image']).copy(),
+                       np.asarray(rewards).tolist(), done))
+  return trajectory
+
+
+def assert_same_trajectory(actual, expected):
+  assert len(actual) == len(expected)
+  for (grid, images, rewards, done), step in zip(actual, expected):
+    assert grid == step[0]
+    np.testing.assert_array_equal(images, step[1])
+    assert (rewards, done) == step[2:]
+
+
+def check_restores(env):
+  env.seed(0)
+  env.reset()
+  rollout(env, seed=0, n_steps=10)
+  state = env.get_state()
+
+  expected = rollout(env, seed=1)
+  env.set_state(state)
+  assert_same_trajectory(rollout(env, seed=1), expected)
+
+  # The state is left untouched by the branches, even across a reset
+  env.reset()
+  rollout(env, seed=2, n_steps=5)
+  env.set_state(state)
+  assert_same_trajectory(rollout(env, seed=1), expected)
+
+
+def test_doorkey():
+  check_restores(doorkey.DoorKeyEnv(size=8, n_agents=3))
+
+
+def test_envs_with_object_lists():
+  check_restores(tasklist.TaskListEnv8x8())
+  check_restores(stag_hunt.RandomStagHuntEnv8x8())
+  check_restores(coingame.EmptyCoinGameEnv10x10())
+  check_restores(gather.RandomGatherEnv8x8())
+
+
+def test_capture_the_flag():
+  # Players, the respawn pool and the flags are restored with the grid
+  check_restores(captureflag.CaptureFlagClassicEnv())
+
+
+def test_visibility_follows_restored_state():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3)
+  state = env.get_state()
+  masks = env.visibility_masks().copy()
+  rollout(env, seed=0)
+  env.set_state(state)
+  np.testing.assert_array_equal(env.visibility_masks(), masks)
+
+
+if __name__ == '__main__':
+  test_doorkey()
+  test_envs_with_object_lists()
+  test_capture_the_flag()
+  test_visibility_follows_restored_state()
@@ -0,0 +1,133 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+"""Checks the array-backed Grid against minigrid's list-of-objects Grid."""
+import gym_minigrid.minigrid as minigrid
+import numpy as np
+from multigym import multigrid
+from multigym.envs import cluttered
+
+
+def random_grid(rng, width=9, height=7):
+  grid = multigrid.Grid(width, height)
+  grid.wall_rect(0, 0, width, height)
+  makers = [
+      minigrid.Wall, minigrid.Goal, minigrid.Lava,
+      lambda: minigrid.Ball('red'), lambda: minigrid.Key('yellow'),
+      lambda: multigrid.Door('blue', is_locked=True),
+      lambda: multigrid.Agent(int(rng.randint(3)), int(rng.randint(4))),
+  ]
+  for i in range(1, width - 1):
+    for j in range(1, height - 1):
+      if rng.rand() < 0.5:
+        grid.set(i, j, makers[rng.randint(len(makers))]())
+  return grid
+
+
+def test_encode_matches_minigrid():
+  rng = np.random.RandomState(0)
+  grid = random_grid(rng)
+
+  # Open doors in place, without notifying the grid
+  for obj in grid.objects.ravel():
+    if isinstance(obj, minigrid.Door):
+      obj.is_locked = False
+      obj.is_open = True
+
+  vis_mask = rng.rand(grid.width, grid.height) < 0.7
+  assert np.array_equal(grid.encode(), minigrid.Grid.encode(grid))
+  assert np.array_equal(grid.encode(vis_mask),
+                        minigrid.Grid.encode(grid, vis_mask))
+
+
+def test_slice_matches_minigrid():
+  rng = np.random.RandomState(1)
+  grid = random_grid(rng)
+  for top_x, top_y in [(-3, -2), (2, 1), (5, 4), (-7, 6)]:
+    expected = minigrid.Grid.encode(
+        minigrid.Grid.slice(grid, top_x, top_y, 7, 7))
+    assert np.array_equal(grid.slice(top_x, top_y, 7, 7).encode(), expected)
+
+
+def test_rotate_left():
+  rng = np.random.RandomState(2)
+  grid = random_grid(rng)
+  rotated = grid.rotate_left()
+  assert (rotated.width, rotated.height) == (grid.height, grid.width)
+
+  # Agents are copied with their direction turned, the rest is moved as is
+  for i in range(grid.width):
+    for j in range(grid.height):
+      v = grid.get(i, j)
+      w = rotated.get(j, grid.width - 1 - i)
+      if v is not None and v.type == 'agent':
+        assert w is not v and w.dir == (v.dir - 1) % 4
+      else:
+        assert w is v
+
+  for _ in range(3):
+    rotated = rotated.rotate_left()
+  assert np.array_equal(rotated.encode(), grid.encode())
+
+
+def test_stateless_objects_are_shared():
+  wall = multigrid.shared_obj('wall')
+  assert multigrid.shared_obj('wall', 'grey') is wall
+  assert multigrid.shared_obj('wall', 'red') is not wall
+  assert multigrid.is_shared(wall)
+  assert not multigrid.is_shared(minigrid.Wall())
+
+  env = cluttered.ClutteredMultiGrid(n_agents=2, n_clutter=10, size=9)
+  grid = env.grid
+  walls = grid.objects[grid.encoding[:, :, 0] ==
+                       minigrid.OBJECT_TO_IDX['wall']]
+  assert len(walls) > 2 * (grid.width + grid.height)
+  assert all(v is wall for v in walls)
+  assert wall.cur_pos is None
+
+  view = grid.slice(-2, -2, 5, 5)
+  assert view.get(0, 0) is wall
+  decoded, _ = multigrid.Grid.decode(grid.encode())
+  assert decoded.get(0, 0) is wall
+
+
+def test_dirty_cells():
+  grid = multigrid.Grid(5, 5)
+  door = minigrid.Door('red')
+  grid.set(1, 2, door)
+  grid.set(3, 3, minigrid.Ball())
+  assert set(zip(*np.nonzero(grid.dirty))) == {(1, 2), (3, 3)}
+
+  # Tracked objects only dirty their cell when their encoding changes
+  grid.dirty.fill(False)
+  grid.sync()
+  assert not grid.dirty.any()
+  door.is_open = True
+  grid.sync()
+  assert set(zip(*np.nonzero(grid.dirty))) == {(1, 2)}
+  assert not grid.opaque[1, 2]
+
+  grid.dirty.fill(False)
+  grid.invalidate()
+  assert grid.dirty.all()
+
+
+if __name__ == '__main__':
+  test_encode_matches_minigrid()
+  test_slice_matches_minigrid()
+  test_rotate_left()
+  test_stateless_objects_are_shared()
+  test_dirty_cells()
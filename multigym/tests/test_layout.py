@@ -0,0 +1,96 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+
+# Lint as: python3
+"""Checks grids built from cached layouts against generating them anew."""
+import gym_minigrid.minigrid as minigrid
+import numpy as np
+from multigym import multigrid
+from multigym.envs import empty
+from multigym.envs import fourrooms
+from multigym.envs import maze
+
+
+def fourrooms_walls(env, width, height):
+  """Four rooms walls, generated with their doors as the env used to."""
+  rand_int = env._rand_int  # pylint: disable=protected-access
+  grid = multigrid.Grid(width, height)
+  grid.horz_wall(0, 0)
+  grid.horz_wall(0, height - 1)
+  grid.vert_wall(0, 0)
+  grid.vert_wall(width - 1, 0)
+  room_w = width // 2
+  room_h = height // 2
+  for j in range(0, 2):
+    for i in range(0, 2):
+      x_left = i * room_w
+      y_top = j * room_h
+      x_right = x_left + room_w
+      y_bottom = y_top + room_h
+      if i + 1 < 2:
+        grid.vert_wall(x_right, y_top, room_h)
+        if not (j == 1 and env.two_rooms and height < 7):
+          pos = (x_right, rand_int(y_top + 1, y_bottom))
+          if not (pos[0] <= 1 or pos[0] >= width -1 or
+                  pos[1] <= 0 or pos[1] >= height -1):
+            grid.set(*pos, None)
+      if not env.two_rooms and j + 1 < 2:
+        grid.horz_wall(x_left, y_bottom, room_w)
+        pos = (rand_int(x_left + 1, x_right), y_bottom)
+        if not (pos[0] <= 1 or pos[0] >= width -1 or
+                pos[1] <= 0 or pos[1] >= height -1):
+          grid.set(*pos, None)
+  return grid
+
+
+def test_fourrooms_doors_match_generating_walls_anew():
+  wall = minigrid.OBJECT_TO_IDX['wall']
+  for size in (6, 7, 8, 16, 19):
+    for two_rooms in (False, True):
+      env = fourrooms.FourRoomsEnv(grid_size=size, two_rooms=two_rooms,
+                                   n_agents=2)
+      reference = fourrooms.FourRoomsEnv(grid_size=size, two_rooms=two_rooms,
+                                         n_agents=2)
+      for seed in range(10):
+        env.seed(seed)
+        env.reset()
+        reference.seed(seed)
+        expected = fourrooms_walls(reference, size, size)
+        np.testing.assert_array_equal(env.grid.encoding[..., 0] == wall,
+                                      expected.encoding[..., 0] == wall)
+
+
+def test_episodes_do_not_change_the_layout():
+  for env in [maze.MazeEnv(), empty.EmptyEnv8x8(),
+              fourrooms.FourRoomsEnv(agent_pos=(1, 1), goal_pos=(17, 17))]:
+    env.reset()
+    templates = env._layout_templates  # pylint: disable=protected-access
+    template = templates[(env.width, env.height)]
+    expected = template.encoding.copy()
+
+    # Knock down a wall of the episode's grid
+    env.grid.set(0, 1, None)
+    env.reset()
+    assert env.grid.get(0, 1).type == 'wall'
+    assert env.grid.objects is not template.objects
+    assert templates == {(env.width, env.height): template}
+    np.testing.assert_array_equal(template.encoding, expected)
+
+
+if __name__ == '__main__':
+  test_fourrooms_doors_match_generating_walls_anew()
+  test_episodes_do_not_change_the_layout()
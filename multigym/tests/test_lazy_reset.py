@@ -0,0 +1,78 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+"""Checks that envs constructed with lazy_reset generate the same grids."""
+import numpy as np
+from multigym.envs import adversarial
+from multigym.envs import doorkey
+from multigym.envs import gather
+from multigym.envs import maze
+from multigym.envs import tasklist
+
+
+def check_same_grids(env_fn):
+  eager = env_fn()
+  lazy = env_fn(lazy_reset=True)
+  for _ in range(3):
+    lazy_obs = lazy.reset()
+    assert str(lazy) == str(eager)
+    np.testing.assert_array_equal(lazy.grid.encode(), eager.grid.encode())
+    np.testing.assert_array_equal(np.asarray(lazy_obs['image']),
+                                  np.asarray(eager.gen_obs()['image']))
+    eager.reset()
+
+
+def test_first_reset_matches_eager_constructor():
+  check_same_grids(lambda **kwargs: doorkey.DoorKeyEnv(size=8, **kwargs))
+  check_same_grids(maze.MazeEnv)
+  check_same_grids(tasklist.TaskListEnv8x8)
+  check_same_grids(gather.RandomGatherEnv8x8)
+
+
+def test_attributes_before_reset():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3, lazy_reset=True)
+  assert (env.grid.width, env.grid.height) == (8, 8)
+  assert env.grid.get(0, 0) is None
+  assert not any(env.agent_is_placed(a) for a in range(env.n_agents))
+  assert env.carrying == [None] * 3
+  assert env.step_count == 0
+  assert env.observation_space['image'].shape == (3, 7, 7, 3)
+
+
+def test_adversarial_graph_built_by_reset():
+  calls = []
+  grid_graph = adversarial.grid_graph
+
+  def counted_grid_graph(**kwargs):
+    calls.append(kwargs)
+    return grid_graph(**kwargs)
+
+  adversarial.grid_graph = counted_grid_graph
+  try:
+    env = adversarial.MiniAdversarialEnv(lazy_reset=True)
+    assert not calls and env.graph is None
+    env.reset()
+    assert len(calls) == 1 and env.graph.number_of_nodes() == 16
+    adversarial.MiniAdversarialEnv()
+    assert len(calls) == 2
+  finally:
+    adversarial.grid_graph = grid_graph
+
+
+if __name__ == '__main__':
+  test_first_reset_matches_eager_constructor()
+  test_attributes_before_reset()
+  test_adversarial_graph_built_by_reset()
@@ -0,0 +1,151 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+"""Checks the vectorized views against the Grid slicing and rotation path."""
+import gym_minigrid.minigrid as minigrid
+import numpy as np
+from multigym import multigrid
+from multigym.envs import doorkey
+from multigym.envs import fourrooms
+
+
+def legacy_obs(env, agent_id):
+  grid, vis_mask = env.gen_obs_grid(agent_id)
+  return grid.encode(vis_mask)
+
+
+def legacy_visibility_mask(env, agent_id):
+  mask = np.zeros((env.width, env.height), dtype=bool)
+  _, vis_mask = env.gen_obs_grid(agent_id)
+  f_vec = env.dir_vec[agent_id]
+  r_vec = env.right_vec[agent_id]
+  top_left = (env.agent_pos[agent_id] + f_vec * (env.agent_view_size - 1) -
+              r_vec * (env.agent_view_size // 2))
+  for vis_i, vis_j in zip(*np.nonzero(vis_mask)):
+    i, j = top_left - f_vec * vis_j + r_vec * vis_i
+    if 0 <= i < env.width and 0 <= j < env.height:
+      mask[i, j] = True
+  return mask
+
+
+def legacy_agent_sees(env, x, y, agent_id):
+  coordinates = env.relative_coords(x, y, agent_id)
+  if coordinates is None:
+    return False
+  obs_grid, _ = multigrid.Grid.decode(legacy_obs(env, agent_id))
+  obs_cell = obs_grid.get(*coordinates)
+  world_cell = env.grid.get(x, y)
+  return obs_cell is not None and obs_cell.type == world_cell.type
+
+
+def check_env(env, n_steps=50):
+  rng = np.random.RandomState(0)
+  env.reset()
+  for _ in range(n_steps):
+    for a in range(env.n_agents):
+      image, _ = env.gen_agent_obs(a)
+      assert np.array_equal(image, legacy_obs(env, a))
+    # The legacy world to view mapping is shifted for even view sizes
+    if env.agent_view_size % 2:
+      for a in range(env.n_agents):
+        assert np.array_equal(env.visible_cells([a])[0],
+                              legacy_visibility_mask(env, a))
+      for x, y in rng.randint(env.width, size=(5, 2)):
+        a = rng.randint(env.n_agents)
+        assert env.agent_sees(x, y, a) == legacy_agent_sees(env, x, y, a)
+    actions = [int(a) for a in rng.randint(len(env.actions), size=env.n_agents)]
+    env.step(actions)
+
+
+def test_doorkey_views():
+  for view_size in [3, 4, 5, 7, 8]:
+    env = doorkey.DoorKeyEnv(size=8, n_agents=3, agent_view_size=view_size)
+    check_env(env)
+
+
+def test_fourrooms_views():
+  env = fourrooms.FourRoomsEnv(n_agents=5, agent_view_size=7)
+  check_env(env)
+  env = fourrooms.FourRoomsEnv(n_agents=2, agent_view_size=5)
+  env.see_through_walls = True
+  check_env(env)
+
+
+def test_visibility_follows_the_grid():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=2)
+  env.reset()
+  masks = env.visibility_masks()
+  assert env.visibility_masks() is masks
+
+  # Wall off a cell seen by agent 0
+  x, y = np.argwhere(masks[0] & env.grid.free_mask())[0]
+  env.grid.set(x, y, minigrid.Wall())
+  assert env.visibility_masks() is not masks
+  assert np.array_equal(env.visible_cells([0])[0],
+                        legacy_visibility_mask(env, 0))
+
+
+def test_cached_views_follow_the_env():
+  env = doorkey.DoorKeyEnv(size=16, n_agents=3)
+  env.seed(0)
+  env.reset()
+  rng = np.random.RandomState(0)
+  state = None
+  for t in range(200):
+    actions = [int(a) for a in rng.randint(len(env.actions), size=env.n_agents)]
+    _, _, done, _ = env.step(actions)
+    if t == 20:
+      state = env.get_state()
+    if t == 100:
+      env.set_state(state)
+    if done:
+      env.reset()
+    np.testing.assert_array_equal(env.cached_agent_views(),
+                                  env.gen_agent_views(range(env.n_agents)))
+
+
+def test_unchanged_views_are_reused():
+  env = fourrooms.FourRoomsEnv(n_agents=3, agent_view_size=5)
+  env.seed(0)
+  env.reset()
+  encoded = []
+  gen_agent_views = env.gen_agent_views
+
+  def counted_gen_agent_views(agent_ids, out=None):
+    encoded.append(list(agent_ids))
+    return gen_agent_views(agent_ids, out)
+
+  env.gen_agent_views = counted_gen_agent_views
+  env.step([env.actions.done] * env.n_agents)
+  assert not encoded
+
+  # Changing a cell in the view of agent 0 only encodes the views it is in
+  x, y = next((x, y) for x, y in np.argwhere(env.grid.free_mask())
+              if env.relative_coords(x, y, 0) is not None)
+  env.grid.set(x, y, minigrid.Ball())
+  views = env.cached_agent_views()
+  in_view = [env.relative_coords(x, y, a) is not None
+             for a in range(env.n_agents)]
+  assert encoded == [list(np.flatnonzero(in_view))]
+  np.testing.assert_array_equal(views, gen_agent_views(range(env.n_agents)))
+
+
+if __name__ == '__main__':
+  test_doorkey_views()
+  test_fourrooms_views()
+  test_visibility_follows_the_grid()
+  test_cached_views_follow_the_env()
+  test_unchanged_views_are_reused()
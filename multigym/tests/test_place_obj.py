@@ -0,0 +1,63 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Lint as: python3
+"""Checks placement of objects among the free cells of the grid."""
+import gym
+import gym_minigrid.minigrid as minigrid
+import pytest
+from multigym.envs import cluttered
+from multigym.envs import doorkey
+
+
+def test_free_cells():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3)
+  expected = [(i, j) for i in range(env.width) for j in range(env.height)
+              if env.grid.get(i, j) is None]
+  assert [tuple(pos) for pos in env.grid.free_cells()] == expected
+  expected = [(i, j) for i, j in expected if 2 <= i < 5 and 3 <= j < 7]
+  assert [tuple(pos) for pos in env.grid.free_cells((2, 3), (5, 7))] == expected
+
+
+def test_respects_rectangle_and_reject_fn():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3)
+  reject_fn = lambda env, pos: pos[0] == 2
+  for _ in range(50):
+    obj = minigrid.Ball('red')
+    pos = env.place_obj(obj, top=(1, 1), size=(3, 3), reject_fn=reject_fn)
+    assert 1 <= pos[0] < 4 and 1 <= pos[1] < 4 and pos[0] != 2
+    assert env.agent_at(pos) < 0
+    assert env.grid.get(*pos) is obj
+    env.grid.set(*pos, None)
+
+
+def test_raises_without_valid_cells():
+  env = cluttered.Cluttered50Minigrid()
+  for pos in env.grid.free_cells():
+    if env.agent_at(pos) < 0:
+      env.grid.set(*pos, minigrid.Wall())
+  with pytest.raises(gym.error.RetriesExceededError):
+    env.place_obj(minigrid.Ball('red'))
+
+  env = cluttered.Cluttered50Minigrid()
+  with pytest.raises(gym.error.RetriesExceededError):
+    env.place_obj(minigrid.Ball('red'), reject_fn=lambda env, pos: True)
+
+
+if __name__ == '__main__':
+  test_free_cells()
+  test_respects_rectangle_and_reject_fn()
+  test_raises_without_valid_cells()
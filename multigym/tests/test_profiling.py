@@ -0,0 +1,113 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+
+# Lint as: python3
+"""Checks the phase timers of profiled envs."""
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from multigym import profiling
+from multigym.envs import doorkey
+
+
+def run(env, n_steps=20):
+  env.seed(0)
+  observations = [env.reset()]
+  rng = np.random.RandomState(0)
+  for _ in range(n_steps):
+    actions = [int(a) for a in rng.randint(len(env.actions),
+                                           size=env.n_agents)]
+    observations.append(env.step(actions)[0])
+  return observations
+
+
+def test_counts_phases():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3)
+  profiler = env.enable_profiling()
+  run(env)
+  stats = profiler.stats()
+  assert stats['reset'].calls == stats['_gen_grid'].calls == 1
+  assert stats['step'].calls == 20
+  assert stats['step_one_agent'].calls == 60
+  assert stats['gen_obs'].calls == 21
+  assert profiler.counters['place_obj/tries'] >= 2
+  for phase in stats.values():
+    assert 0 <= phase.self_time <= phase.total
+  assert 'step_one_agent' in profiler.report()
+
+
+def test_self_time_excludes_nested_phases():
+  profiler = profiling.Profiler()
+  inner = profiler.wrap('inner', lambda: time.sleep(0.02))
+
+  def outer_fn():
+    time.sleep(0.01)
+    inner()
+    inner()
+
+  profiler.wrap('outer', outer_fn)()
+  stats = profiler.stats()
+  assert list(stats) == ['outer', 'inner']
+  assert stats['inner'].calls == 2
+  assert stats['inner'].self_time == stats['inner'].total >= 0.04
+  assert 0.01 <= stats['outer'].self_time < stats['inner'].total
+  assert np.isclose(stats['outer'].total,
+                    stats['outer'].self_time + stats['inner'].total)
+
+
+def test_disabled_env_is_unchanged():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3)
+  expected = run(env)
+  env.enable_profiling()
+  profiler = env.disable_profiling()
+  assert env.profiler is None
+  assert not set(env.profiled_methods) & set(vars(env))
+  for obs, step_obs in zip(run(env), expected):
+    np.testing.assert_array_equal(obs['image'], step_obs['image'])
+  assert not profiler.calls
+
+
+def test_chrome_trace():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3)
+  profiler = env.enable_profiling(trace=True)
+  run(env, n_steps=5)
+  env.render('rgb_array')
+  with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'trace.json')
+    profiler.export_chrome_trace(path)
+    with open(path) as f:
+      trace = json.load(f)
+  events = trace['traceEvents']
+  assert len(events) == sum(profiler.calls.values())
+  assert {e['name'] for e in events} >= {'step', 'gen_obs', 'render'}
+
+  # Nested phases lie within the step calling them
+  steps = [e for e in events if e['name'] == 'step']
+  for event in events:
+    if event['name'] == 'step_one_agent':
+      assert any(s['ts'] <= event['ts'] and
+                 event['ts'] + event['dur'] <= s['ts'] + s['dur'] + 1e-3
+                 for s in steps)
+
+
+if __name__ == '__main__':
+  test_counts_phases()
+  test_self_time_excludes_nested_phases()
+  test_disabled_env_is_unchanged()
+  test_chrome_trace()
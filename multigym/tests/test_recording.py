@@ -0,0 +1,102 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+
+# Lint as: python3
+"""Checks that recorded episodes replay the observations of the env."""
+import os
+import tempfile
+import numpy as np
+import pytest
+from multigym import recording
+from multigym.envs import doorkey
+from multigym.envs import empty
+from multigym.envs import gather
+
+
+def record(env_fn, path, episode_lengths):
+  env = recording.EpisodeRecorder(env_fn(), path, seed=0)
+  rng = np.random.RandomState(0)
+  episodes = []
+  for n_steps in episode_lengths:
+    observations = [env.reset()]
+    for _ in range(n_steps):
+      actions = [int(a) for a in rng.randint(3, size=env.n_agents)]
+      if env.minigrid_mode:
+        actions = actions[0]
+      observations.append(env.step(actions)[0])
+    episodes.append(observations)
+  env.close()
+  return episodes
+
+
+def assert_same_obs(actual, expected):
+  assert actual.keys() == expected.keys()
+  for key in expected:
+    np.testing.assert_array_equal(actual[key], expected[key])
+
+
+def check_replays(env_fn, episode_lengths=(30, 0, 45)):
+  with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'episodes')
+    episodes = record(env_fn, path, episode_lengths)
+    replayer = recording.EpisodeReplayer(path, env_fn, checkpoint_interval=8)
+    assert len(replayer) == len(episode_lengths)
+    for i, n_steps in enumerate(episode_lengths):
+      assert replayer.episode(i).actions.shape == (n_steps, env_fn().n_agents)
+
+    # Jump around the episodes, backwards as well as forwards
+    rng = np.random.RandomState(1)
+    for i in rng.permutation(np.repeat(np.arange(len(episodes)), 10)):
+      step = rng.randint(len(episodes[i]))
+      assert_same_obs(replayer.observation(i, step), episodes[i][step])
+    replayer.close()
+
+
+def test_replays_observations():
+  check_replays(lambda: doorkey.DoorKeyEnv(size=8, n_agents=3))
+  check_replays(gather.RandomGatherEnv8x8)
+  check_replays(empty.EmptyRandomEnv6x6Minigrid)
+
+
+def test_replay_state_is_restorable():
+  with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'episodes')
+    env_fn = lambda: doorkey.DoorKeyEnv(size=8, n_agents=3)
+    episodes = record(env_fn, path, [20])
+    replayer = recording.EpisodeReplayer(path, env_fn)
+    state = replayer.state(0, 10)
+    replayer.seek(0, 20)
+    replayer.env.set_state(state)
+    assert_same_obs(replayer.env.gen_obs(), episodes[0][10])
+    replayer.close()
+
+
+def test_rejects_other_envs():
+  with tempfile.TemporaryDirectory() as tmp:
+    path = os.path.join(tmp, 'episodes')
+    record(lambda: doorkey.DoorKeyEnv(size=8, n_agents=3), path, [5])
+    replayer = recording.EpisodeReplayer(
+        path, lambda: doorkey.DoorKeyEnv(size=8, n_agents=2))
+    with pytest.raises(ValueError):
+      replayer.observation(0, 0)
+    replayer.close()
+
+
+if __name__ == '__main__':
+  test_replays_observations()
+  test_replay_state_is_restorable()
+  test_rejects_other_envs()
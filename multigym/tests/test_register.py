@@ -0,0 +1,96 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+
+# Lint as: python3
+"""Checks that envs are registered without importing their modules."""
+import subprocess
+import sys
+
+import gym
+import multigym
+from multigym import multigrid
+from multigym import register
+from multigym.envs import maze
+
+
+def _modules_after(script):
+  """Names of the multigym and networkx modules imported by a script."""
+  script += '''
+import sys
+prefixes = ('multigym', 'networkx')
+print(' '.join(m for m in sys.modules if m.startswith(prefixes)))
+'''
+  output = subprocess.run([sys.executable, '-c', script], check=True,
+                          stdout=subprocess.PIPE).stdout.decode()
+  return set(output.split('\n')[-2].split())
+
+
+def test_import_does_not_import_envs():
+  modules = _modules_after('import multigym')
+  assert modules == {'multigym', 'multigym.envs', 'multigym.register'}
+
+
+def test_make_imports_the_env_module():
+  modules = _modules_after(
+      'import gym, multigym\ngym.make("MultiGrid-Maze-v0")')
+  assert 'multigym.envs.maze' in modules
+  assert 'multigym.envs.adversarial' not in modules
+  assert 'networkx' not in modules
+
+
+def test_envs_are_registered():
+  assert 'MultiGrid-Maze-v0' in register.env_list
+  assert 'MultiGrid-CTF-Classic-v0' in register.env_list
+  spec = gym.spec('MultiGrid-Maze-v0')
+  assert spec.entry_point == 'multigym.envs.maze:MazeEnv'
+  assert spec.reward_threshold == 0.95
+
+
+def test_reregister():
+  n_envs = len(register.env_list)
+  register.register('MultiGrid-Maze-v0', 'multigym.envs.maze:MiniMazeEnv')
+  try:
+    assert len(register.env_list) == n_envs
+    assert isinstance(gym.make('MultiGrid-Maze-v0').unwrapped,
+                      maze.MiniMazeEnv)
+  finally:
+    register.register('MultiGrid-Maze-v0', 'multigym.envs.maze:MazeEnv')
+
+
+def test_lazy_attributes():
+  assert multigym.envs.MazeEnv is maze.MazeEnv
+  assert multigym.MultiGridEnv is multigrid.MultiGridEnv
+  assert multigym.Grid is multigrid.Grid
+
+
+def test_star_import():
+  namespace = {}
+  exec('from multigym import *', namespace)  # pylint: disable=exec-used
+  assert namespace['MultiGridEnv'] is multigrid.MultiGridEnv
+  assert namespace['Grid'] is multigrid.Grid
+  assert namespace['MazeEnv'] is maze.MazeEnv
+  assert 'EmptyEnv' in namespace and 'DoorKeyEnv' in namespace
+  assert multigym.DoorKeyEnv is namespace['DoorKeyEnv']
+
+
+if __name__ == '__main__':
+  test_import_does_not_import_envs()
+  test_make_imports_the_env_module()
+  test_envs_are_registered()
+  test_reregister()
+  test_lazy_attributes()
+  test_star_import()
@@ -0,0 +1,113 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+# Lint as: python3
+"""Tests the resolution of the actions of agents acting simultaneously."""
+import gym_minigrid.minigrid as minigrid
+import numpy as np
+from multigym.envs import empty
+from multigym.envs import gather
+
+RIGHT, DOWN, LEFT, UP = range(4)
+
+
+def make_env(rule, agents):
+  """Empty 7x7 env with agents at given positions and directions."""
+  env = empty.EmptyEnv(n_agents=len(agents), size=7,
+                       simultaneous_moves=rule)
+  # Move the agents away from their start cells first, to avoid collisions
+  for a in range(env.n_agents):
+    env.move_agent(a, np.array([5, a + 1]))
+  for a, (pos, direction) in enumerate(agents):
+    env.move_agent(a, np.array(pos))
+    env.set_agent_dir(a, direction)
+    env.rotate_agent(a)
+  return env
+
+
+def test_agents_entering_one_cell():
+  agents = [((2, 2), DOWN), ((2, 4), UP)]
+  forward = [minigrid.MiniGridEnv.Actions.forward] * 2
+
+  env = make_env('block', agents)
+  env.step(forward)
+  assert env.agent_pos.tolist() == [[2, 2], [2, 4]]
+
+  env = make_env('priority', agents)
+  env.step(forward)
+  assert env.agent_pos.tolist() == [[2, 3], [2, 4]]
+
+
+def test_swaps_are_blocked():
+  for rule in ['block', 'priority']:
+    env = make_env(rule, [((2, 2), RIGHT), ((3, 2), LEFT)])
+    env.step([minigrid.MiniGridEnv.Actions.forward] * 2)
+    assert env.agent_pos.tolist() == [[2, 2], [3, 2]]
+
+
+def test_chains_move_together():
+  for rule in ['block', 'priority']:
+    env = make_env(rule, [((1, 1), RIGHT), ((2, 1), RIGHT), ((3, 1), RIGHT)])
+    env.step([minigrid.MiniGridEnv.Actions.forward] * 3)
+    assert env.agent_pos.tolist() == [[2, 1], [3, 1], [4, 1]]
+    assert env.agent_map[1, 1] == -1
+
+
+def test_picking_up_one_object():
+  agents = [((2, 3), RIGHT), ((4, 3), LEFT)]
+  pickup = [minigrid.MiniGridEnv.Actions.pickup] * 2
+
+  env = make_env('block', agents)
+  ball = minigrid.Ball()
+  env.put_obj(ball, 3, 3)
+  env.step(pickup)
+  assert env.carrying == [None, None]
+  assert env.grid.get(3, 3) is ball
+
+  env = make_env('priority', agents)
+  ball = minigrid.Ball()
+  env.put_obj(ball, 3, 3)
+  env.step(pickup)
+  assert env.carrying == [ball, None]
+  assert env.grid.get(3, 3) is None
+
+
+def test_rollouts_are_deterministic():
+  trajectories = []
+  for _ in range(2):
+    env = gather.GatherEnv(n_agents=3, simultaneous_moves='block')
+    env.seed(1)
+    env.reset()
+    rng = np.random.RandomState(0)
+    positions = []
+    for _ in range(100):
+      actions = [int(a) for a in rng.randint(len(env.actions), size=3)]
+      env.step(actions)
+      positions.append(env.agent_pos.tolist())
+      agent_map = np.full((env.grid.width, env.grid.height), -1)
+      for a, pos in enumerate(env.agent_pos):
+        agent_map[pos[0], pos[1]] = a
+      assert np.array_equal(env.agent_map, agent_map)
+    trajectories.append(positions)
+  assert trajectories[0] == trajectories[1]
+
+
+if __name__ == '__main__':
+  test_agents_entering_one_cell()
+  test_swaps_are_blocked()
+  test_chains_move_together()
+  test_picking_up_one_object()
+  test_rollouts_are_deterministic()
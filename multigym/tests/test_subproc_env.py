@@ -0,0 +1,76 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+"""Checks SubprocVectorEnv against stepping environments in process."""
+import numpy as np
+from multigym import subproc_env
+from multigym.envs import cluttered
+from multigym.envs import stag_hunt
+from multigym.envs import tasklist
+
+
+def test_matches_sequential_envs():
+  env_fn = cluttered.ClutteredMultiGridSingle6x6
+  num_envs = 5
+  envs = [env_fn() for _ in range(num_envs)]
+  venv = subproc_env.SubprocVectorEnv([env_fn] * num_envs, envs_per_worker=2)
+  assert venv.num_workers == 3
+  for i, env in enumerate(envs):
+    env.seed(i)
+  venv.seed(0)
+
+  scalar_obs = [env.reset() for env in envs]
+  vector_obs = venv.reset()
+  rng = np.random.RandomState(0)
+  for _ in range(100):
+    for i, obs in enumerate(scalar_obs):
+      for key in obs:
+        assert np.array_equal(vector_obs[key][i], obs[key])
+
+    actions = rng.randint(3, size=(num_envs, 1))
+    vector_obs, rewards, dones, infos = venv.step(actions)
+    assert len(infos) == num_envs
+    for i, env in enumerate(envs):
+      obs, reward, done, _ = env.step([int(actions[i, 0])])
+      assert rewards[i] == reward and dones[i] == done
+      scalar_obs[i] = env.reset() if done else obs
+  venv.close()
+
+
+def test_observation_shapes():
+  for env_fn in [stag_hunt.EmptyStagHuntEnv8x8, tasklist.TaskListEnv8x8]:
+    venv = subproc_env.SubprocVectorEnv([env_fn] * 3, envs_per_worker=2,
+                                        copy=False)
+    obs = venv.reset()
+    assert venv.observation_space.contains(obs)
+    for _ in range(10):
+      obs, rewards, dones, _ = venv.step(venv.action_space.sample())
+      assert rewards.shape == (3, venv.single_action_space.shape[0])
+      assert dones.shape == (3,)
+    venv.close()
+
+
+def test_reset_seed_and_info():
+  env_fn = cluttered.ClutteredMultiGridSingle6x6
+  envs = [env_fn() for _ in range(3)]
+  for i, env in enumerate(envs):
+    env.seed(7 + i)
+  venv = subproc_env.SubprocVectorEnv([env_fn] * 3, envs_per_worker=2)
+  obs, infos = venv.reset(seed=7, return_info=True)
+  assert infos == [{}, {}, {}]
+  for i, env in enumerate(envs):
+    assert np.array_equal(obs['image'][i], env.reset()['image'])
+  venv.close()
@@ -0,0 +1,176 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Lint as: python3
+"""Checks atlas rendering against rendering the grid tile by tile."""
+import itertools
+import gym_minigrid.minigrid as minigrid
+import numpy as np
+from multigym import multigrid
+from multigym import tile_atlas
+from multigym.envs import doorkey
+from multigym.envs import lava_walls
+
+TILE_SIZE = 16
+
+
+def make_env():
+  env = doorkey.DoorKeyEnv(size=8, n_agents=3)
+  env.seed(0)
+  env.reset()
+  for _ in range(10):
+    env.step([int(a) for a in env.np_random.randint(3, size=env.n_agents)])
+  return env
+
+
+def test_matches_render_by_tile():
+  env = make_env()
+  multigrid.Grid.tile_cache.clear()
+  expected = env.grid.render_by_tile(TILE_SIZE)
+  np.testing.assert_array_equal(env.grid.render(TILE_SIZE), expected)
+
+  mask = env.compute_agent_visibility_mask(0)
+  expected = env.grid.render_by_tile(TILE_SIZE, highlight_mask=mask)
+  actual = env.grid.render(TILE_SIZE, highlight_mask=mask)
+  assert np.abs(actual.astype(int) - expected).max() <= 1
+
+
+def test_agent_highlights_blend_in_order():
+  env = make_env()
+  env.grid.set(1, 1, None)
+  env.grid.set(2, 1, None)
+  masks = [np.zeros((env.width, env.height), dtype=bool)
+           for _ in range(env.n_agents)]
+  masks[0][1, 1] = masks[1][1, 1] = True
+  masks[1][2, 1] = True
+
+  plain = env.grid.render(TILE_SIZE).astype(float)
+  img = env.grid.render(TILE_SIZE, highlight_mask=masks).astype(float)
+
+  tile = np.s_[TILE_SIZE:2 * TILE_SIZE]
+  colors = multigrid.AGENT_COLOURS
+  expected = plain[tile, tile]
+  for color in colors[:2]:
+    expected = expected + tile_atlas.HIGHLIGHT_ALPHA * (color - expected)
+  assert np.abs(img[tile, tile] - expected).max() <= 1
+
+  # Walls are never highlighted
+  np.testing.assert_array_equal(img[:TILE_SIZE], plain[:TILE_SIZE])
+
+  expected = env.grid.render_by_tile(TILE_SIZE, highlight_mask=masks)
+  assert np.abs(img - expected).max() <= 1
+
+
+def test_tracked_objects_keep_their_appearance():
+  grid = multigrid.Grid(3, 3)
+  grid.set(0, 0, minigrid.Wall())
+  grid.set(1, 0, lava_walls.LavaWall())
+  img = grid.render(TILE_SIZE)[:TILE_SIZE]
+
+  wall = img[:, :TILE_SIZE]
+  lava = img[:, TILE_SIZE:2 * TILE_SIZE]
+  assert np.any(wall != lava)
+  for i, obj in enumerate([minigrid.Wall(), lava_walls.LavaWall(), None]):
+    multigrid.Grid.tile_cache.clear()
+    expected = multigrid.Grid.render_tile(obj, tile_size=TILE_SIZE).astype(
+        np.uint8)
+    np.testing.assert_array_equal(
+        img[:, i * TILE_SIZE:(i + 1) * TILE_SIZE], expected)
+
+
+def test_render_observations_matches_decoded_grids():
+  env = make_env()
+  observations = [env.gen_agent_views(range(env.n_agents))]
+  for _ in range(5):
+    env.step([int(a) for a in env.np_random.randint(3, size=env.n_agents)])
+    observations.append(env.gen_agent_views(range(env.n_agents)))
+  observations = np.stack(observations)
+
+  images = multigrid.Grid.render_observations(observations, TILE_SIZE)
+  view_px = env.agent_view_size * TILE_SIZE
+  assert images.shape == observations.shape[:2] + (view_px, view_px, 3)
+  for index in np.ndindex(*observations.shape[:2]):
+    grid, vis_mask = multigrid.Grid.decode(observations[index])
+    expected = grid.render_by_tile(TILE_SIZE, highlight_mask=vis_mask)
+    assert np.abs(images[index].astype(int) - expected).max() <= 1
+  np.testing.assert_array_equal(
+      env.get_obs_render(observations[0, 0], tile_size=TILE_SIZE),
+      images[0, 0])
+
+
+def test_tile_cache_evicts_least_recently_used():
+  tile = np.zeros((TILE_SIZE, TILE_SIZE, 3), dtype=np.uint8)
+  cache = tile_atlas.TileCache(max_bytes=2 * tile.nbytes)
+  cache.put('a', tile)
+  cache.put('b', tile)
+  assert cache.get('a') is tile
+  cache.put('c', tile)
+  assert 'b' not in cache and 'a' in cache and 'c' in cache
+  assert cache.get('b') is None
+  assert cache.info() == tile_atlas.CacheInfo(
+      hits=1, misses=1, evictions=1, entries=2, nbytes=2 * tile.nbytes,
+      max_bytes=2 * tile.nbytes)
+
+  cache.max_bytes = tile.nbytes
+  assert len(cache) == 1 and 'c' in cache
+
+
+def test_render_tile_caches_one_tile_per_object():
+  multigrid.Grid.tile_cache.clear()
+  agent = multigrid.Agent(0, 0)
+  for n_agents in range(1, 6):
+    for highlight in itertools.product([False, True], repeat=n_agents):
+      multigrid.Grid.render_tile(agent, highlight=list(highlight),
+                                 tile_size=TILE_SIZE)
+  info = multigrid.Grid.tile_cache.info()
+  assert info.entries == 1 and info.misses == 1
+
+
+def test_atlases_count_against_the_tile_cache():
+  cache = tile_atlas.TileCache()
+  atlas = tile_atlas.get_atlas(cache, TILE_SIZE)
+  assert tile_atlas.get_atlas(cache, TILE_SIZE) is atlas
+  assert cache.info().hits == 1 and cache.nbytes == atlas.nbytes
+
+  # Growing the atlas past its room keeps the tiles and updates the cache
+  colors = range(len(minigrid.COLOR_NAMES))
+  encodings = np.array([[minigrid.OBJECT_TO_IDX[t], c, 0]
+                        for t in ['ball', 'key', 'box', 'door']
+                        for c in colors])
+  indices = atlas.encoding_indices(encodings, multigrid.WorldObj.decode)
+  assert len(atlas) == len(encodings) > tile_atlas._INITIAL_CAPACITY
+  assert cache.nbytes == atlas.nbytes
+  for index, encoding in zip(indices, encodings):
+    expected = tile_atlas.draw_tile(multigrid.WorldObj.decode(*encoding),
+                                    TILE_SIZE)[0]
+    np.testing.assert_array_equal(atlas.background[index], expected)
+
+  # Another atlas evicts it once over budget
+  cache.max_bytes = cache.nbytes
+  other = tile_atlas.get_atlas(cache, TILE_SIZE, subdivs=2)
+  assert cache.info().evictions == 1
+  assert tile_atlas.get_atlas(cache, TILE_SIZE, subdivs=2) is other
+  assert tile_atlas.get_atlas(cache, TILE_SIZE) is not atlas
+
+
+if __name__ == '__main__':
+  test_matches_render_by_tile()
+  test_agent_highlights_blend_in_order()
+  test_tracked_objects_keep_their_appearance()
+  test_render_observations_matches_decoded_grids()
+  test_tile_cache_evicts_least_recently_used()
+  test_render_tile_caches_one_tile_per_object()
+  test_atlases_count_against_the_tile_cache()
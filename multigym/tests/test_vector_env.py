@@ -0,0 +1,94 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+"""Checks VectorMultiGridEnv against stepping MultiGridEnv instances."""
+import numpy as np
+import pytest
+from multigym import vector_env
+from multigym.envs import cluttered
+from multigym.envs import doorkey
+from multigym.envs import empty
+from multigym.envs import fourrooms
+from multigym.envs import lava_walls
+from multigym.envs import maze
+
+
+def check_env(env_fn, num_envs=3, n_steps=300):
+  envs = [env_fn() for _ in range(num_envs)]
+  venv = vector_env.VectorMultiGridEnv([env_fn] * num_envs, seed=0)
+  for i, env in enumerate(envs):
+    env.seed(10 + i)
+  venv.seed(10)
+
+  scalar_obs = [env.reset() for env in envs]
+  vector_obs = venv.reset()
+  rng = np.random.RandomState(0)
+  for _ in range(n_steps):
+    for i, obs in enumerate(scalar_obs):
+      assert np.array_equal(vector_obs['image'][i], np.array(obs['image']))
+      assert np.array_equal(vector_obs['direction'][i], obs['direction'])
+
+    actions = rng.randint(3, size=(num_envs, venv.n_agents))
+    vector_obs, rewards, dones, _ = venv.step(actions)
+    for i, env in enumerate(envs):
+      action = [int(a) for a in actions[i]]
+      if env.minigrid_mode:
+        action = action[0]
+      obs, reward, done, _ = env.step(action)
+      assert np.array_equal(rewards[i], reward)
+      assert dones[i] == done
+      scalar_obs[i] = env.reset() if done else obs
+
+
+def test_empty():
+  check_env(empty.EmptyEnv8x8)
+  check_env(empty.EmptyRandomEnv8x8)
+  check_env(empty.EmptyRandomEnv6x6Minigrid)
+
+
+def test_cluttered():
+  check_env(cluttered.ClutteredMultiGrid)
+  check_env(cluttered.ClutteredMinigridLava)
+
+
+def test_fourrooms():
+  check_env(fourrooms.FourRoomsEnv)
+  check_env(fourrooms.MiniFourRoomsEnvMinigrid)
+
+
+def test_maze():
+  check_env(maze.MazeEnv)
+
+
+def test_walls_are_lava():
+  check_env(lava_walls.WallsAreLavaMultiGrid)
+
+
+def test_reset_seed_and_info():
+  venv = vector_env.VectorMultiGridEnv([empty.EmptyRandomEnv8x8] * 3)
+  obs = venv.reset(seed=3)
+  venv.step(np.zeros((3, venv.n_agents), dtype=np.int64))
+  obs_again, infos = venv.reset(seed=3, return_info=True)
+  assert infos == [{}, {}, {}]
+  for key in obs:
+    np.testing.assert_array_equal(obs_again[key], obs[key])
+  # Each copy gets its own seed
+  assert not np.array_equal(obs['image'][0], obs['image'][1])
+
+
+def test_unsupported_env():
+  with pytest.raises(ValueError):
+    vector_env.VectorMultiGridEnv([doorkey.DoorKeyEnv6x6])
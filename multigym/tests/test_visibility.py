@@ -0,0 +1,63 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Lint as: python3
+"""Checks the visibility tables against minigrid's process_vis."""
+import gym_minigrid.minigrid as minigrid
+import numpy as np
+from multigym import multigrid
+from multigym import visibility
+
+
+def process_vis(opaque):
+  width, height = opaque.shape
+  grid = multigrid.Grid(width, height)
+  for i, j in zip(*np.nonzero(opaque)):
+    grid.set(i, j, minigrid.Wall())
+  return minigrid.Grid.process_vis(grid, (width // 2, height - 1))
+
+
+def check_view_size(view_size, n_views=200):
+  rng = np.random.RandomState(view_size)
+  for density in [0.1, 0.3, 0.5, 0.8]:
+    opaque = rng.rand(n_views, view_size, view_size) < density
+    vis_masks = visibility.vis_masks(opaque)
+    assert vis_masks.shape == opaque.shape
+    for i in range(n_views):
+      assert np.array_equal(vis_masks[i], process_vis(opaque[i]))
+
+
+def test_view_size_5():
+  check_view_size(5)
+
+
+def test_view_size_7():
+  check_view_size(7)
+
+
+def test_other_view_sizes():
+  for view_size in [3, 4, 6, 8]:
+    check_view_size(view_size, n_views=50)
+
+  # Views too large for precomputed tables
+  view_size = visibility.MAX_TABLE_VIEW_SIZE + 2
+  assert visibility.get_table(view_size).row_mask is None
+  check_view_size(view_size, n_views=50)
+
+
+if __name__ == '__main__':
+  test_view_size_5()
+  test_view_size_7()
+  test_other_view_sizes()
@@ -0,0 +1,431 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Renders whole grids by compositing tiles from an atlas.
+
+Every object appearance met so far is rendered once into an atlas of tiles.
+A grid is then rendered by mapping its cells to atlas indices and gathering
+the tiles into the frame at once. Each distinct combination of a tile and the
+agents highlighting it is blended once per frame, with the agents, which are
+drawn over the highlights, composited last from premultiplied tiles.
+
+Grid.render_tile draws and highlights single tiles in the same way, from
+draw_tile and compose_tile. The single tiles and the atlases of each tile size
+are kept in the same TileCache, bounded in bytes.
+"""
+import collections
+
+import gym_minigrid.minigrid as minigrid
+import gym_minigrid.rendering as rendering
+import numpy as np
+
+# Opacity of the highlights, as in rendering.highlight_img
+HIGHLIGHT_ALPHA = 0.3
+WHITE = np.array([255, 255, 255])
+
+_EMPTY_KEY = (minigrid.OBJECT_TO_IDX['empty'], 0, 0)
+
+# Default budget in bytes of Grid.tile_cache
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Number of tiles an atlas has room for when created
+_INITIAL_CAPACITY = 16
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo',
+    ['hits', 'misses', 'evictions', 'entries', 'nbytes', 'max_bytes'])
+
+
+def _downsample(img, factor):
+  """Average blocks of factor x factor pixels."""
+  height, width = img.shape[0] // factor, img.shape[1] // factor
+  img = img.reshape((height, factor, width, factor) + img.shape[2:])
+  return img.mean(axis=(1, 3))
+
+
+def _pack(encodings):
+  """Pack (type, color, state) encodings into single integers."""
+  types, colors, states = np.moveaxis(encodings.astype(np.int64), -1, 0)
+  return (types << 16) | (colors << 8) | states
+
+
+def draw_tile(obj, tile_size, subdivs=3):
+  """Draw the layers of the tile of an object.
+
+  Args:
+    obj: WorldObj to draw, or None for an empty cell.
+    tile_size: Tile size in pixels.
+    subdivs: Supersampling factor used to draw the tile.
+
+  Returns:
+    background: (tile_size, tile_size, 3) uint8 tile drawn below the
+      highlights, i.e. the grid lines and the object, unless it's an agent.
+    foreground: (tile_size, tile_size, 3) float32 agent drawn over the
+      highlights, premultiplied by alpha, or None if obj isn't an agent.
+    alpha: (tile_size, tile_size, 1) float32 coverage of the foreground, or
+      None if obj isn't an agent.
+  """
+  size = tile_size * subdivs
+  img = np.zeros((size, size, 3), dtype=np.uint8)
+
+  # Draw the grid lines (top and left edges)
+  rendering.fill_coords(img, rendering.point_in_rect(0, 0.031, 0, 1),
+                        (100, 100, 100))
+  rendering.fill_coords(img, rendering.point_in_rect(0, 1, 0, 0.031),
+                        (100, 100, 100))
+  background = _downsample(img, subdivs).astype(np.uint8)
+
+  if obj is None:
+    return background, None, None
+  if obj.type != 'agent':
+    obj.render(img)
+    return _downsample(img, subdivs).astype(np.uint8), None, None
+
+  # Drawing over two backgrounds tells which pixels are covered
+  foreground = np.zeros((size, size, 3), dtype=np.uint8)
+  obj.render(foreground)
+  other = np.ones((size, size, 3), dtype=np.uint8)
+  obj.render(other)
+  coverage = (foreground != 0).any(axis=2) | (other != 1).any(axis=2)
+  foreground = _downsample(foreground, subdivs).astype(np.float32)
+  alpha = _downsample(coverage[..., np.newaxis], subdivs).astype(np.float32)
+  return background, foreground, alpha
+
+
+def compose_tile(layers, colors=()):
+  """Render a tile from its layers, highlighted with some colors.
+
+  Args:
+    layers: (background, foreground, alpha) tuple, as given by draw_tile.
+    colors: RGB colors of the highlights, blended in order.
+
+  Returns:
+    (tile_size, tile_size, 3) uint8 tile.
+  """
+  background, foreground, alpha = layers
+  if not colors and foreground is None:
+    return background
+
+  tile = background.astype(np.float32)
+  for color in colors:
+    tile += HIGHLIGHT_ALPHA * (np.asarray(color, dtype=np.float32) - tile)
+  if foreground is not None:
+    tile = foreground + (1 - alpha) * tile
+  return tile.astype(np.uint8)
+
+
+def _nbytes(value):
+  """Size of an array, a tuple of arrays, or a TileAtlas."""
+  if isinstance(value, tuple):
+    return sum(_nbytes(v) for v in value if v is not None)
+  return value.nbytes
+
+
+class TileCache(object):
+  """Maps keys to tiles, evicting the least recently used over a byte budget.
+
+  A tile is a numpy array, or a tuple of arrays (and None) for tiles stored
+  in layers. Whole TileAtlas instances are cached too, see get_atlas.
+  """
+
+  def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+    """Constructor.
+
+    Args:
+      max_bytes: Upper bound on the total size of the cached tiles.
+    """
+    self._entries = collections.OrderedDict()
+    # Size of each entry when it was put, atlases growing in place
+    self._sizes = {}
+    self._max_bytes = max_bytes
+    self.nbytes = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def __len__(self):
+    return len(self._entries)
+
+  def __contains__(self, key):
+    return key in self._entries
+
+  @property
+  def max_bytes(self):
+    return self._max_bytes
+
+  @max_bytes.setter
+  def max_bytes(self, max_bytes):
+    self._max_bytes = max_bytes
+    self._evict()
+
+  def get(self, key):
+    """Get a tile and mark it as recently used, or None if it's not cached."""
+    value = self._entries.get(key)
+    if value is None:
+      self.misses += 1
+      return None
+    self.hits += 1
+    self._entries.move_to_end(key)
+    return value
+
+  def put(self, key, value):
+    """Cache a tile, then evict tiles until the cache is within budget."""
+    if key in self._entries:
+      del self._entries[key]
+      self.nbytes -= self._sizes.pop(key)
+    self._entries[key] = value
+    self._sizes[key] = _nbytes(value)
+    self.nbytes += self._sizes[key]
+    self._evict()
+
+  def clear(self):
+    """Remove all the tiles and reset the counters."""
+    self._entries.clear()
+    self._sizes.clear()
+    self.nbytes = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+  def info(self):
+    """Get the counters and size of the cache, as a CacheInfo."""
+    return CacheInfo(self.hits, self.misses, self.evictions,
+                     len(self._entries), self.nbytes, self._max_bytes)
+
+  def _evict(self):
+    while self._entries and self.nbytes > self._max_bytes:
+      key, _ = self._entries.popitem(last=False)
+      self.nbytes -= self._sizes.pop(key)
+      self.evictions += 1
+
+
+class TileAtlas(object):
+  """Tiles of every object appearance met so far, for a given tile size.
+
+  Each entry holds:
+    - background: the tile drawn below the highlights, i.e. the grid lines and
+      the object, unless it's an agent.
+    - foreground: the agent drawn over the highlights, premultiplied by alpha.
+    - alpha: the coverage of the foreground, in [0, 1].
+    - no_highlight: True for walls, which are never highlighted.
+  The arrays have room for more tiles than len(self), and double in size when
+  they are full.
+  """
+
+  def __init__(self, tile_size, subdivs=3, cache=None, cache_key=None):
+    """Constructor.
+
+    Args:
+      tile_size: Tile size in pixels.
+      subdivs: Supersampling factor used to draw the tiles.
+      cache: Optional TileCache holding the atlas under cache_key, which is
+        updated with the size of the atlas whenever it grows.
+      cache_key: Key of the atlas in cache.
+    """
+    self.tile_size = tile_size
+    self.subdivs = subdivs
+    self.cache = cache
+    self.cache_key = cache_key
+    self.keys = {}
+    self.background = np.zeros(
+        (_INITIAL_CAPACITY, tile_size, tile_size, 3), dtype=np.uint8)
+    self.foreground = np.zeros(
+        (_INITIAL_CAPACITY, tile_size, tile_size, 3), dtype=np.float32)
+    self.alpha = np.zeros(
+        (_INITIAL_CAPACITY, tile_size, tile_size, 1), dtype=np.float32)
+    self.no_highlight = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+    self.has_foreground = np.zeros(_INITIAL_CAPACITY, dtype=bool)
+
+  def __len__(self):
+    return len(self.keys)
+
+  @property
+  def nbytes(self):
+    """Memory held by the arrays of the atlas, including their free room."""
+    return sum(array.nbytes for array in [
+        self.background, self.foreground, self.alpha, self.no_highlight,
+        self.has_foreground])
+
+  def _grow(self):
+    """Double the room for tiles, and update the size held by the cache."""
+    for name in ['background', 'foreground', 'alpha', 'no_highlight',
+                 'has_foreground']:
+      array = getattr(self, name)
+      grown = np.zeros((2 * len(array),) + array.shape[1:], dtype=array.dtype)
+      grown[:len(array)] = array
+      setattr(self, name, grown)
+    if self.cache is not None and self.cache_key in self.cache:
+      self.cache.put(self.cache_key, self)
+
+  def index(self, key, obj):
+    """Get the atlas index of an appearance, drawing it if it's new.
+
+    Args:
+      key: Hashable key of the appearance.
+      obj: WorldObj with this appearance, or None for an empty cell.
+
+    Returns:
+      The integer index of the tiles in the atlas.
+    """
+    if key in self.keys:
+      return self.keys[key]
+
+    background, foreground, alpha = draw_tile(obj, self.tile_size,
+                                              self.subdivs)
+    is_agent = foreground is not None
+    if not is_agent:
+      foreground = np.zeros(background.shape, dtype=np.float32)
+      alpha = np.zeros(background.shape[:2] + (1,), dtype=np.float32)
+
+    index = len(self.keys)
+    if index == len(self.background):
+      self._grow()
+    self.background[index] = background
+    self.foreground[index] = foreground
+    self.alpha[index] = alpha
+    self.no_highlight[index] = obj is not None and obj.type == 'wall'
+    self.has_foreground[index] = is_agent
+
+    self.keys[key] = index
+    return index
+
+  def indices(self, grid):
+    """Map every cell of a grid to its atlas index.
+
+    Objects fully described by their encoding are looked up once per distinct
+    encoding. Tracked objects are looked up by class and encode(), since
+    their appearance may not be captured by the grid encoding.
+
+    Args:
+      grid: multigrid.Grid instance.
+
+    Returns:
+      (width, height) integer array of atlas indices.
+    """
+    codes = _pack(grid.encoding)
+    for cell in grid.tracked:
+      codes[cell] = -1
+
+    codes, first, inverse = np.unique(
+        codes, return_index=True, return_inverse=True)
+    lut = np.zeros(len(codes), dtype=np.int64)
+    for u, (code, cell) in enumerate(zip(codes.tolist(), first)):
+      if code < 0:
+        continue
+      key = (code >> 16, (code >> 8) & 255, code & 255)
+      obj = None if key == _EMPTY_KEY else grid.objects.flat[cell]
+      lut[u] = self.index(key, obj)
+    indices = lut[inverse].reshape(grid.width, grid.height)
+
+    for (i, j), obj in grid.tracked.items():
+      indices[i, j] = self.index((type(obj),) + tuple(obj.encode()), obj)
+    return indices
+
+  def encoding_indices(self, encodings, decode):
+    """Map encoded cells, e.g. a batch of observations, to atlas indices.
+
+    No object is built for encodings already in the atlas, and new ones are
+    decoded once to draw their tile.
+
+    Args:
+      encodings: (..., 3) integer array of (type, color, state) encodings.
+      decode: Function building a WorldObj, or None, from an encoding, e.g.
+        WorldObj.decode.
+
+    Returns:
+      Integer array of atlas indices, with shape encodings.shape[:-1].
+    """
+    encodings = np.asarray(encodings)
+    codes, inverse = np.unique(_pack(encodings), return_inverse=True)
+    lut = np.empty(len(codes), dtype=np.int64)
+    for u, code in enumerate(codes.tolist()):
+      key = (code >> 16, (code >> 8) & 255, code & 255)
+      if key not in self.keys:
+        self.index(key, decode(*key))
+      lut[u] = self.keys[key]
+    return lut[inverse].reshape(encodings.shape[:-1])
+
+  def compose(self, indices, highlight_mask=None, colors=None):
+    """Render frames from grids of atlas indices.
+
+    Args:
+      indices: (..., width, height) integer array of atlas indices, with any
+        number of leading batch dimensions.
+      highlight_mask: List of boolean masks of the cells to highlight with
+        each color, blended in order, with the shape of indices.
+      colors: RGB color of each highlight mask.
+
+    Returns:
+      (..., height * tile_size, width * tile_size, 3) uint8 images.
+    """
+    batch_shape = indices.shape[:-2]
+    width, height = indices.shape[-2:]
+    ts = self.tile_size
+    indices = np.swapaxes(indices, -1, -2)
+
+    # Number each distinct combination of a tile and its highlights
+    codes = indices
+    if highlight_mask is not None:
+      can_highlight = ~self.no_highlight[indices]
+      codes = indices << len(highlight_mask)
+      for a, mask in enumerate(highlight_mask):
+        mask = np.swapaxes(mask, -1, -2) & can_highlight
+        codes = codes | mask.astype(np.int64) << a
+    codes, inverse = np.unique(codes, return_inverse=True)
+    inverse = inverse.reshape(indices.shape)
+
+    # Blend each combination once
+    if highlight_mask is None:
+      tiles = self.background[codes]
+    else:
+      tiles = self.background[codes >> len(highlight_mask)].astype(np.float32)
+      for a, color in enumerate(colors):
+        blend = ((codes >> a) & 1).astype(bool)
+        tiles[blend] += HIGHLIGHT_ALPHA * (color - tiles[blend])
+      codes >>= len(highlight_mask)
+    agents = self.has_foreground[codes]
+    if agents.any() or tiles.dtype != np.uint8:
+      tiles = tiles.astype(np.float32)
+      tiles[agents] *= 1 - self.alpha[codes[agents]]
+      tiles[agents] += self.foreground[codes[agents]]
+      tiles = tiles.astype(np.uint8)
+
+    # Gather the tile rows straight into the (..., height, ts, width, ts, 3)
+    # layout of the frames
+    rows = tiles.reshape(len(tiles), ts, ts * 3)
+    frames = rows[inverse[..., :, np.newaxis, :], np.arange(ts)[:, np.newaxis]]
+    return frames.reshape(batch_shape + (height * ts, width * ts, 3))
+
+
+def get_atlas(cache, tile_size, subdivs=3):
+  """Get the shared atlas for a tile size, from a cache.
+
+  The atlas counts against the byte budget of the cache like any tile, and is
+  created again once evicted.
+
+  Args:
+    cache: TileCache holding the atlases, e.g. Grid.tile_cache.
+    tile_size: Tile size in pixels.
+    subdivs: Supersampling factor used to draw the tiles.
+
+  Returns:
+    The TileAtlas.
+  """
+  key = ('atlas', tile_size, subdivs)
+  atlas = cache.get(key)
+  if atlas is None:
+    atlas = TileAtlas(tile_size, subdivs=subdivs, cache=cache, cache_key=key)
+    cache.put(key, atlas)
+  return atlas
@@ -0,0 +1,337 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Batched version of the grid-navigation environments.
+
+VectorMultiGridEnv holds the state of N copies of an environment as (N, ...)
+arrays, and steps all of them with the same set of array operations, instead
+of stepping a list of MultiGridEnv instances one by one.
+
+Only the navigation environments are supported (Empty, Cluttered, FourRooms,
+Maze and WallsAreLava). Their worlds only contain walls, goals and lava, so
+agents can only turn, move forward, reach a goal or die in lava. Layouts are
+still generated by the original environments, which are kept as generators
+and only used when an environment is reset.
+"""
+import gym
+import gym_minigrid.minigrid as minigrid
+from multigym import observation
+from multigym.envs import cluttered
+from multigym.envs import empty
+from multigym.envs import fourrooms
+from multigym.envs import lava_walls
+from multigym.envs import maze
+import numpy as np
+
+SUPPORTED_ENVS = (
+    empty.EmptyEnv,
+    cluttered.ClutteredMultiGrid,
+    fourrooms.FourRoomsEnv,
+    maze.MazeEnv,
+    lava_walls.WallsAreLavaMultiGrid,
+)
+
+# What happens to an agent moving into a cell
+FREE = 0
+BLOCKED = 1
+GOAL = 2
+LAVA = 3
+
+AGENT_IDX = minigrid.OBJECT_TO_IDX['agent']
+EMPTY_IDX = minigrid.OBJECT_TO_IDX['empty']
+EMPTY_ENCODING = (EMPTY_IDX, 0, 0)
+
+DIR_TO_VEC = np.array(minigrid.DIR_TO_VEC)
+
+
+def cell_kind(obj):
+  """Get the kind of a cell, given the object it holds."""
+  if obj is None or obj.type == 'agent':
+    return FREE
+  if obj.type == 'goal':
+    return GOAL
+  if obj.type == 'lava':
+    return LAVA
+  if obj.type == 'wall':
+    return BLOCKED
+  raise ValueError(
+      'VectorMultiGridEnv does not support %s objects' % obj.type)
+
+
+class VectorMultiGridEnv(gym.vector.VectorEnv):
+  """Steps a batch of grid-navigation environments as one array program.
+
+  Observations, rewards and dones are stacked along a first dimension of size
+  num_envs, and actions are expected as a (num_envs, n_agents) array. Finished
+  environments are reset automatically, in which case the returned observation
+  is the first observation of the new episode.
+
+  Agents are ordered with the random number generator of each environment,
+  so given the same seeds, the environments follow the same trajectories as
+  their MultiGridEnv counterparts.
+  """
+
+  def __init__(self, env_fns, seed=None):
+    """Constructor.
+
+    Args:
+      env_fns: List of functions creating the environments, which must all
+        have the same class and configuration.
+      seed: If not None, seed of the environments, see seed. Otherwise each
+        environment keeps its own seed, so copies of an environment with a
+        fixed default seed follow the same trajectory until they are seeded.
+    """
+    self.envs = [env_fn() for env_fn in env_fns]
+    env = self.envs[0]
+    if not isinstance(env, SUPPORTED_ENVS):
+      raise ValueError(
+          'VectorMultiGridEnv does not support %s' % type(env).__name__)
+    for other in self.envs[1:]:
+      assert type(other) is type(env)
+      assert (other.width, other.height) == (env.width, env.height)
+    super().__init__(len(self.envs), env.observation_space, env.action_space)
+
+    self.actions = env.actions
+    self.n_agents = env.n_agents
+    self.width = env.width
+    self.height = env.height
+    self.max_steps = env.max_steps
+    self.agent_view_size = env.agent_view_size
+    self.see_through_walls = env.see_through_walls
+    self.competitive = env.competitive
+    self.minigrid_mode = env.minigrid_mode
+    self.fully_observed = env.fully_observed
+
+    # Worlds are padded with walls, so views can be gathered at any position
+    n, pad = self.num_envs, self.agent_view_size
+    shape = (n, self.width + 2 * pad, self.height + 2 * pad)
+    self.encoding = np.empty(shape + (3,), dtype=np.uint8)
+    self.encoding[:] = observation.WALL_ENCODING
+    self.opaque = np.ones(shape, dtype=bool)
+    self.kind = np.full(shape, BLOCKED, dtype=np.uint8)
+
+    # Agent positions are in the coordinates of the unpadded worlds
+    self.agent_pos = np.zeros((n, self.n_agents, 2), dtype=np.int64)
+    self.agent_dir = np.zeros((n, self.n_agents), dtype=np.int64)
+    self.carrying = np.empty((n, self.n_agents, 3), dtype=np.uint8)
+    self.carrying[:] = EMPTY_ENCODING
+    self.done = np.zeros((n, self.n_agents), dtype=bool)
+    self.step_count = np.zeros(n, dtype=np.int64)
+    self.agent_ordering = np.tile(np.arange(self.n_agents), (n, 1))
+    self._actions = None
+    if seed is not None:
+      self.seed(seed)
+
+  def seed(self, seeds=None):
+    """Seed the environments, see gym.vector.VectorEnv.seed."""
+    if seeds is None:
+      seeds = [None] * self.num_envs
+    elif isinstance(seeds, int):
+      seeds = [seeds + i for i in range(self.num_envs)]
+    assert len(seeds) == self.num_envs
+    for env, seed in zip(self.envs, seeds):
+      env.seed(seed)
+
+  def reset_wait(self, seed=None, return_info=False, **kwargs):
+    """Reset the environments, seeding them first if seed is set.
+
+    Args:
+      seed: If not None, seed of the environments, see seed.
+      return_info: If True, also return a list with an empty info dict per
+        environment.
+      **kwargs: Other arguments of gym.vector.VectorEnv.reset, unused.
+
+    Returns:
+      The observations, and the infos if return_info is set.
+    """
+    if seed is not None:
+      self.seed(seed)
+    for i in range(self.num_envs):
+      self._load(i)
+    if return_info:
+      return self.gen_obs(), [{} for _ in range(self.num_envs)]
+    return self.gen_obs()
+
+  def step_async(self, actions):
+    self._actions = np.asarray(actions, dtype=np.int64).reshape(
+        self.num_envs, self.n_agents)
+
+  def step_wait(self, **kwargs):
+    actions, self._actions = self._actions, None
+    n, pad = self.num_envs, self.agent_view_size
+    envs = np.arange(n)
+
+    self.step_count += 1
+    rewards = np.zeros((n, self.n_agents))
+    success_reward = 1 - 0.9 * (self.step_count / self.max_steps)
+
+    # Randomize order in which agents act for fairness
+    self.agent_ordering[:] = np.arange(self.n_agents)
+    for env, ordering in zip(self.envs, self.agent_ordering):
+      env.np_random.shuffle(ordering)
+
+    # Agents acting at the same rank are stepped together in all environments
+    for rank in range(self.n_agents):
+      agents = self.agent_ordering[:, rank]
+      action = actions[envs, agents]
+      pos = self.agent_pos[envs, agents]
+      x, y = pos[:, 0] + pad, pos[:, 1] + pad
+
+      # Rotate left or right
+      direction = self.agent_dir[envs, agents]
+      direction[action == self.actions.left] += 3
+      direction[action == self.actions.right] += 1
+      direction %= 4
+      self.agent_dir[envs, agents] = direction
+      self.encoding[envs, x, y, 2] = direction
+
+      # Move forward, unless another agent is in the way
+      fwd_pos = pos + DIR_TO_VEC[direction]
+      fwd_x, fwd_y = fwd_pos[:, 0] + pad, fwd_pos[:, 1] + pad
+      fwd_kind = self.kind[envs, fwd_x, fwd_y]
+      forward = ((action == self.actions.forward) &
+                 (self.encoding[envs, fwd_x, fwd_y, 0] != AGENT_IDX))
+
+      move = forward & (fwd_kind == FREE)
+      self.encoding[envs[move], x[move], y[move]] = EMPTY_ENCODING
+      self.encoding[envs[move], fwd_x[move], fwd_y[move]] = np.stack(
+          [np.full(move.sum(), AGENT_IDX), agents[move], direction[move]],
+          axis=1)
+      self.agent_pos[envs[move], agents[move]] = fwd_pos[move]
+
+      goal = forward & (fwd_kind == GOAL)
+      rewards[envs[goal], agents[goal]] = success_reward[goal]
+
+      for i in np.flatnonzero(goal | (forward & (fwd_kind == LAVA))):
+        self.agent_is_done(i, agents[i])
+
+    # In competitive version, if one agent finishes the episode is over.
+    if self.competitive:
+      dones = self.done.any(axis=1)
+    else:
+      dones = np.zeros(n, dtype=bool)
+
+    # Running out of time applies to all agents
+    dones |= self.step_count >= self.max_steps
+
+    for i in np.flatnonzero(dones):
+      self._load(i)
+
+    # Backwards compatibility
+    if self.minigrid_mode:
+      rewards = rewards[:, 0]
+
+    return self.gen_obs(), rewards, dones, [{} for _ in range(n)]
+
+  def close_extras(self, **kwargs):
+    for env in self.envs:
+      env.close()
+
+  def gen_obs(self):
+    """Generate the stacked observations of all environments."""
+    n, pad = self.num_envs, self.agent_view_size
+    if self.fully_observed:
+      world = self.encoding[:, pad:-pad, pad:-pad]
+      images = np.repeat(world[:, np.newaxis], self.n_agents, axis=1)
+    else:
+      images, _ = observation.gather_views(
+          self.encoding, self.opaque,
+          self.agent_pos.reshape(-1, 2),
+          self.agent_dir.reshape(-1),
+          self.carrying.reshape(-1, 3),
+          self.agent_view_size,
+          see_through_walls=self.see_through_walls,
+          world_idx=np.repeat(np.arange(n), self.n_agents))
+      images = images.reshape((n, self.n_agents) + images.shape[1:])
+
+    # Backwards compatibility: if there is a single agent do not return an array
+    if self.minigrid_mode:
+      images = images[:, 0]
+
+    obs = {
+        'image': images,
+        'direction': self.agent_dir.copy()
+    }
+    if self.fully_observed:
+      obs['position'] = self.agent_pos.copy()
+
+    return obs
+
+  def agent_is_done(self, env_idx, agent_id):
+    """Remove a finished agent from the world and respawn it.
+
+    Args:
+      env_idx: Index of the environment.
+      agent_id: ID of the agent.
+    """
+    pad = self.agent_view_size
+    x, y = self.agent_pos[env_idx, agent_id] + pad
+    self.encoding[env_idx, x, y] = EMPTY_ENCODING
+    self.done[env_idx, agent_id] = True
+    self.place_one_agent(env_idx, agent_id)
+
+  def place_one_agent(self, env_idx, agent_id):
+    """Respawn an agent, the same way its environment would.
+
+    Random positions and directions are drawn from the random number generator
+    of the environment, in the same order as MultiGridEnv.place_one_agent.
+
+    Args:
+      env_idx: Index of the environment.
+      agent_id: ID of the agent.
+    """
+    env = self.envs[env_idx]
+    pad = self.agent_view_size
+    start_pos = getattr(env, 'agent_start_pos', None)
+
+    if start_pos is not None:
+      # Move any other agent in this one's start spot back to its own start
+      pos = np.asarray(start_pos[agent_id])
+      other = self.encoding[env_idx, pos[0] + pad, pos[1] + pad]
+      if other[0] == AGENT_IDX:
+        self.place_one_agent(env_idx, int(other[1]))
+      direction = env.agent_start_dir[agent_id]
+    else:
+      # Uniform draw among the empty cells, as in MultiGridEnv.place_obj
+      world = self.encoding[env_idx, pad:-pad, pad:-pad, 0]
+      candidates = np.flatnonzero(world == EMPTY_IDX)
+      k = env.np_random.randint(0, len(candidates))
+      pos = np.array(divmod(int(candidates[k]), self.height))
+      direction = env.np_random.randint(0, 4)
+
+    self.agent_pos[env_idx, agent_id] = pos
+    self.agent_dir[env_idx, agent_id] = direction
+    self.encoding[env_idx, pos[0] + pad, pos[1] + pad] = (
+        AGENT_IDX, agent_id, direction)
+
+  def _load(self, env_idx):
+    """Reset an environment, and load its new world into the arrays."""
+    env = self.envs[env_idx]
+    env.reset()
+
+    grid = env.grid
+    grid.sync()
+    assert (grid.width, grid.height) == (self.width, self.height)
+    world = np.s_[env_idx, self.agent_view_size:-self.agent_view_size,
+                  self.agent_view_size:-self.agent_view_size]
+    self.encoding[world] = grid.encoding
+    self.opaque[world] = grid.opaque
+    self.kind[world] = [[cell_kind(obj) for obj in column]
+                        for column in grid.objects]
+
+    self.agent_pos[env_idx] = env.agent_pos
+    self.agent_dir[env_idx] = env.agent_dir
+    self.done[env_idx] = False
+    self.step_count[env_idx] = 0
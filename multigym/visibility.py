@@ -0,0 +1,165 @@
+# coding=utf-8
+# Copyright 2021 The Google Research Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Vectorized computation of the agents' visibility masks.
+
+Produces the same masks as minigrid's Grid.process_vis, for a batch of views.
+process_vis sweeps the view row by row, starting from the agent's row. Within
+a row, light spreads from every lit transparent cell along its run of
+transparent cells, up to and including the opaque cells bounding the run. Every
+lit transparent cell then lights the cell above it and its two diagonal
+neighbours in the row above.
+
+The outcome of a row only depends on which of its cells are transparent and
+which are lit from below. For small views, both are encoded as bit fields and
+the outcome of every combination is precomputed, so that computing the masks
+takes one table lookup per row for the whole batch.
+"""
+import functools
+
+import numpy as np
+
+# Largest view size with precomputed row tables, which have 4 ** view_size
+# entries. Larger views are processed run by run.
+MAX_TABLE_VIEW_SIZE = 9
+
+
+def _light_row(lit, transparent, neighbours):
+  """Propagate light along a batch of rows.
+
+  Args:
+    lit: (batch, size) boolean array of the cells lit from the row below.
+    transparent: (batch, size) boolean array of the transparent cells.
+    neighbours: (size, 3) array with the indices of each cell and its
+      horizontal neighbours.
+
+  Returns:
+    The (batch, size) visibility mask of the rows, and the cells they light in
+    the row above.
+  """
+  size = lit.shape[1]
+  columns = np.arange(size)
+
+  # Each transparent cell belongs to the run of transparent cells strictly
+  # between the opaque cells at indices before and after
+  before = np.maximum.accumulate(np.where(transparent, -1, columns), axis=1)
+  after = np.where(transparent, size, columns)[:, ::-1]
+  after = np.minimum.accumulate(after, axis=1)[:, ::-1]
+
+  # Count the lit transparent cells in the run of each cell
+  counts = np.zeros((lit.shape[0], size + 1), dtype=np.int64)
+  np.cumsum(lit & transparent, axis=1, out=counts[:, 1:])
+  in_lit_run = (
+      np.take_along_axis(counts, after, axis=1) >
+      np.take_along_axis(counts, before + 1, axis=1))
+  in_lit_run &= transparent
+
+  # Lit runs light their bounds in this row, and the row above
+  spread = in_lit_run[:, neighbours].any(axis=2)
+  return lit | spread, spread
+
+
+class VisibilityTable(object):
+  """Precomputed visibility rules for square views of a given size."""
+
+  def __init__(self, view_size):
+    """Constructor.
+
+    Args:
+      view_size: Number of tiles in the side of the view.
+    """
+    self.view_size = view_size
+
+    # The agent always stands at the bottom-center of its view
+    self.agent_pos = (view_size // 2, view_size - 1)
+
+    self.columns = np.arange(view_size)
+    self.bits = 1 << self.columns
+
+    # Cells of a row lighting cell i of the row above: i - 1, i and i + 1
+    self.neighbours = np.stack([
+        np.maximum(self.columns - 1, 0),
+        self.columns,
+        np.minimum(self.columns + 1, view_size - 1),
+    ], axis=1)
+
+    # Visibility mask and cells lit in the row above, indexed by the
+    # transparent and the lit cells of a row, all encoded as bit fields:
+    # entry (transparent << view_size) | lit
+    self.row_mask = None
+    self.row_spread = None
+    if view_size <= MAX_TABLE_VIEW_SIZE:
+      codes = np.arange(1 << view_size)
+      fields = (codes[:, np.newaxis] & self.bits) > 0
+      transparent = np.repeat(fields, len(codes), axis=0)
+      lit = np.tile(fields, (len(codes), 1))
+      row_mask, spread = _light_row(lit, transparent, self.neighbours)
+      self.row_mask = (row_mask @ self.bits).astype(np.int64)
+      self.row_spread = (spread @ self.bits).astype(np.int64)
+
+  def vis_masks(self, opaque):
+    """Compute the visibility masks of a batch of views.
+
+    Args:
+      opaque: (batch, view_size, view_size) boolean array, True where the
+        agent can't see behind the cell.
+
+    Returns:
+      Boolean visibility masks of shape (batch, view_size, view_size).
+    """
+    opaque = np.asarray(opaque, dtype=bool)
+    batch, size = opaque.shape[0], self.view_size
+    assert opaque.shape[1:] == (size, size), opaque.shape
+    transparent = ~opaque
+
+    if self.row_mask is None:
+      mask = np.empty((batch, size, size), dtype=bool)
+      lit = np.zeros((batch, size), dtype=bool)
+      lit[:, self.agent_pos[0]] = True
+      for j in reversed(range(size)):
+        mask[:, :, j], lit = _light_row(lit, transparent[:, :, j],
+                                        self.neighbours)
+      return mask
+
+    # Bit field of the transparent cells of each row, shifted to index tables
+    rows = (transparent.transpose(0, 2, 1) @ self.bits) << size
+
+    mask = np.empty((batch, size), dtype=np.int64)
+    lit = np.full(batch, 1 << self.agent_pos[0], dtype=np.int64)
+    for j in reversed(range(size)):
+      entry = rows[:, j] | lit
+      mask[:, j] = self.row_mask[entry]
+      lit = self.row_spread[entry]
+
+    return (mask[:, np.newaxis, :] & self.bits[:, np.newaxis]) > 0
+
+
+@functools.lru_cache(maxsize=None)
+def get_table(view_size):
+  """Get the (shared) visibility table for a given view size."""
+  return VisibilityTable(view_size)
+
+
+def vis_masks(opaque):
+  """Compute the visibility masks of a batch of square views.
+
+  Args:
+    opaque: (batch, view_size, view_size) boolean array, True where the agent
+      can't see behind the cell.
+
+  Returns:
+    Boolean visibility masks of shape (batch, view_size, view_size).
+  """
+  return get_table(np.shape(opaque)[-1]).vis_masks(opaque)